@@ -0,0 +1,180 @@
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from iolite_client.entity import Device
+from iolite_client.model_event import PropertyChange
+from iolite_client.telemetry import (
+    TRACKED_ATTRIBUTES,
+    WindowStats,
+    is_number,
+    summarize,
+)
+
+if TYPE_CHECKING:
+    from iolite_client.client import Discovered
+
+
+class Column:
+    """The values of one numeric attribute across devices, in a dense array.
+
+    Setting a value is O(1) in place; removing one moves the last value into its
+    slot. Statistics are computed over the whole array at once and cached until
+    the next change.
+    """
+
+    __slots__ = ("values", "identifiers", "_slots", "_stats")
+
+    def __init__(self):
+        self.values = array("d")
+        self.identifiers: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._stats: Optional[WindowStats] = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def set(self, identifier: str, value: float):
+        slot = self._slots.get(identifier)
+        if slot is None:
+            self._slots[identifier] = len(self.values)
+            self.identifiers.append(identifier)
+            self.values.append(value)
+        elif self.values[slot] == value:
+            return
+        else:
+            self.values[slot] = value
+        self._stats = None
+
+    def remove(self, identifier: str):
+        slot = self._slots.pop(identifier, None)
+        if slot is None:
+            return
+
+        last_value = self.values.pop()
+        last_identifier = self.identifiers.pop()
+        if slot < len(self.values):
+            self.values[slot] = last_value
+            self.identifiers[slot] = last_identifier
+            self._slots[last_identifier] = slot
+        self._stats = None
+
+    def stats(self) -> Optional[WindowStats]:
+        if self._stats is None:
+            self._stats = summarize(self.values)
+        return self._stats
+
+
+class Aggregates:
+    """Columnar aggregates of numeric device attributes per room and for the home.
+
+    Keeps a Column per (room, attribute) and per attribute for the whole home,
+    updated as single values change, so statistics such as the average room
+    temperature do not iterate over the devices. A Client given aggregates keeps
+    them in step with discovery and model events, e.g.::
+
+        aggregates = Aggregates()
+        client = Client(sid, username, password, aggregates=aggregates)
+        ...
+        aggregates.room_stats(room.identifier, "current_env_temp").mean
+        aggregates.valve_demand(room.identifier)
+    """
+
+    def __init__(self):
+        self._rooms: Dict[Tuple[str, str], Column] = {}
+        self._home: Dict[str, Column] = {}
+        # The room each device is aggregated in, to move or remove it
+        self._places: Dict[str, str] = {}
+
+    def load(self, discovered: "Discovered"):
+        """Replace the aggregates with those of every discovered device."""
+        self._rooms.clear()
+        self._home.clear()
+        self._places.clear()
+        for device in discovered.get_devices():
+            self.add_device(device)
+
+    def add_device(self, device: Device):
+        """Aggregate every tracked attribute of the device in its room."""
+        previous = self._places.get(device.identifier)
+        if previous is not None and previous != device.place_identifier:
+            self.remove_device(device.identifier)
+
+        self._places[device.identifier] = device.place_identifier
+        for attribute in TRACKED_ATTRIBUTES.get(type(device), ()):
+            self._set(
+                device.place_identifier,
+                device.identifier,
+                attribute,
+                getattr(device, attribute),
+            )
+
+    def remove_device(self, identifier: str):
+        place_identifier = self._places.pop(identifier, None)
+        if place_identifier is None:
+            return
+
+        for attribute, column in self._home.items():
+            column.remove(identifier)
+            room = self._rooms.get((place_identifier, attribute))
+            if room is not None:
+                room.remove(identifier)
+
+    def apply_change(self, change: PropertyChange):
+        """Update the aggregates with a change to a device attribute."""
+        device = change.entity
+        if not isinstance(device, Device) or device.identifier not in self._places:
+            return
+        if change.attribute not in TRACKED_ATTRIBUTES.get(type(device), ()):
+            return
+
+        self._set(
+            device.place_identifier,
+            device.identifier,
+            change.attribute,
+            change.new_value,
+        )
+
+    def _set(self, place_identifier: str, identifier: str, attribute: str, value):
+        room = self._rooms.get((place_identifier, attribute))
+        if room is None:
+            room = self._rooms[(place_identifier, attribute)] = Column()
+        home = self._home.get(attribute)
+        if home is None:
+            home = self._home[attribute] = Column()
+
+        if is_number(value):
+            room.set(identifier, value)
+            home.set(identifier, value)
+        else:
+            room.remove(identifier)
+            home.remove(identifier)
+
+    def room_stats(
+        self, place_identifier: str, attribute: str
+    ) -> Optional[WindowStats]:
+        """
+        :param place_identifier: The identifier of the room
+        :param attribute: The device attribute, e.g. "current_env_temp"
+        :return: The minimum, maximum and mean over the room, None without values
+        """
+        column = self._rooms.get((place_identifier, attribute))
+        return column.stats() if column is not None else None
+
+    def home_stats(self, attribute: str) -> Optional[WindowStats]:
+        """
+        :param attribute: The device attribute, e.g. "humidity_level"
+        :return: The minimum, maximum and mean over the home, None without values
+        """
+        column = self._home.get(attribute)
+        return column.stats() if column is not None else None
+
+    def valve_demand(self, place_identifier: Optional[str] = None) -> Optional[float]:
+        """
+        :param place_identifier: The room, or None for the whole home
+        :return: The mean valve position of the radiator valves, None without any
+        """
+        if place_identifier is None:
+            stats = self.home_stats("valve_position")
+        else:
+            stats = self.room_stats(place_identifier, "valve_position")
+        return stats.mean if stats is not None else None
@@ -1,37 +1,90 @@
 import asyncio
-import json
+import copy
 import logging
 import ssl
+import time
 from base64 import b64encode
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+from urllib.parse import urlsplit
 
 import websockets
 
 from iolite_client import entity_factory
-from iolite_client.entity import Device, Heating, Room
-from iolite_client.exceptions import UnsupportedDeviceError
+from iolite_client.aggregation import Aggregates
+from iolite_client.coalesce import WriteCoalescer
+from iolite_client.codec import Frame, JsonCodec, get_codec
+from iolite_client.dispatch import ResponseDispatcher, ResponseHandler
+from iolite_client.entity import Device, Entity, Heating, Room, intern
+from iolite_client.events import EventBus, OverflowPolicy, Subscription
+from iolite_client.exceptions import SessionClosedError, UnsupportedDeviceError
+from iolite_client.loop_thread import LoopThread
+from iolite_client.metrics import Metrics
+from iolite_client.model_event import (
+    DEVICE_PROPERTY_ATTRIBUTES,
+    HEATING_PROPERTY_ATTRIBUTES,
+    PropertyChange,
+    PropertyUpdate,
+    changes_topology,
+    parse_model_event,
+)
+from iolite_client.outbound import OutboundScheduler, Priority
+from iolite_client.query import DeviceIndex, DeviceQuery
+from iolite_client.reconnect import Backoff, ConnectionStats
+from iolite_client.recording import (
+    APPLICATION,
+    HEATING,
+    INBOUND,
+    OUTBOUND,
+    FrameRecorder,
+)
 from iolite_client.request_handler import ClassMap, RequestHandler
+from iolite_client.snapshot import (
+    SnapshotError,
+    SnapshotPolicy,
+    load_snapshot,
+    save_snapshot,
+)
+from iolite_client.telemetry import TelemetryStore
+from iolite_client.tracing import Tracer
 
 logger = logging.getLogger(__name__)
 
 
 class Discovered:
-    """Contains the discovered devices."""
+    """Contains the discovered devices.
+
+    Rooms are indexed by identifier and name and devices, mapped or not, by
+    identifier, type, manufacturer, model name and room, see `query`. The indexes
+    follow changes made through these methods; renaming a room or changing those
+    attributes of a device directly bypasses them.
+    """
 
     def __init__(self):
         self.discovered_rooms: Dict[str, Room] = {}
         self.unmapped_entities: defaultdict = defaultdict(list)
+        self._rooms_by_name: Dict[str, List[Room]] = defaultdict(list)
+        self._devices: Dict[str, Device] = {}
+        self._device_index = DeviceIndex()
 
     def add_room(self, room: Room):
         """
-        Add a room.
+        Add a room. An already known room is renamed in place, keeping its devices.
 
         :param room: The room to add
         :return:
         """
+        existing = self.discovered_rooms.get(room.identifier)
+        if existing:
+            if existing.name != room.name:
+                self._unindex_room_name(existing)
+                existing.name = room.name
+                self._rooms_by_name[existing.name].append(existing)
+            return
+
         self.discovered_rooms[room.identifier] = room
+        self._rooms_by_name[room.name].append(room)
 
         if room.identifier in self.unmapped_entities:
             for entity in self.unmapped_entities[room.identifier]:
@@ -39,8 +92,15 @@ class Discovered:
                     room.add_heating(entity)
                 else:
                     room.add_device(entity)
+                    self._index_device(entity)
             self.unmapped_entities.pop(room.identifier)
 
+    def _unindex_room_name(self, room: Room):
+        rooms = self._rooms_by_name[room.name]
+        rooms.remove(room)
+        if not rooms:
+            del self._rooms_by_name[room.name]
+
     def add_device(self, device: Device):
         """
         Add a device. If the room exists will map it, otherwise will add to unmapped dict.
@@ -48,12 +108,165 @@ class Discovered:
         :param device: The device to add
         :return:
         """
-        room = self.find_room_by_identifier(device.place_identifier)
+        room = self.discovered_rooms.get(device.place_identifier)
 
         if room:
             room.add_device(device)
         else:
             self.unmapped_entities[device.place_identifier].append(device)
+        self._index_device(device)
+
+    def _index_device(self, device: Device):
+        existing = self._devices.get(device.identifier)
+        if existing is not None:
+            self._device_index.remove(existing)
+        self._devices[device.identifier] = device
+        self._device_index.add(device)
+
+    def _unindex_device(self, device: Device):
+        if self._devices.get(device.identifier) is device:
+            del self._devices[device.identifier]
+            self._device_index.remove(device)
+
+    def merge_device(self, device: Device) -> List[PropertyChange]:
+        """
+        Add a device, or update an already known device of the same type in place so
+        references to it stay valid across rediscovery.
+
+        :param device: The freshly discovered device
+        :return: The property changes applied to an already known device
+        """
+        existing = self.find_device_by_identifier(device.identifier)
+        if existing is None:
+            self.add_device(device)
+            return []
+
+        if (
+            type(existing) is not type(device)
+            or existing.place_identifier != device.place_identifier
+        ):
+            self.remove_device(existing)
+            self.add_device(device)
+            return []
+
+        existing.name = device.name
+        if (
+            existing.manufacturer != device.manufacturer
+            or existing.model_name != device.model_name
+        ):
+            self._device_index.remove(existing)
+            existing.manufacturer = device.manufacturer
+            existing.model_name = device.model_name
+            self._device_index.add(existing)
+
+        changes = []
+        for property, attribute in DEVICE_PROPERTY_ATTRIBUTES.items():
+            if not hasattr(existing, attribute):
+                continue
+
+            old_value = getattr(existing, attribute)
+            new_value = getattr(device, attribute)
+            if old_value == new_value:
+                continue
+
+            setattr(existing, attribute, new_value)
+            changes.append(
+                PropertyChange(
+                    existing.identifier,
+                    property,
+                    attribute,
+                    old_value,
+                    new_value,
+                    None,
+                    existing,
+                )
+            )
+
+        return changes
+
+    def remove_device(self, device: Device):
+        """
+        Remove a device from its room or the unmapped entities.
+
+        :param device: The device to remove
+        :return:
+        """
+        room = self.discovered_rooms.get(device.place_identifier)
+        if room and room.devices.get(device.identifier) is device:
+            room.devices.pop(device.identifier)
+        elif device in self.unmapped_entities.get(device.place_identifier, []):
+            self.unmapped_entities[device.place_identifier].remove(device)
+        else:
+            return
+
+        self._unindex_device(device)
+
+    def remove_devices_except(self, identifiers: Iterable[str]) -> List[Device]:
+        """
+        Remove every device whose identifier is not in the given collection.
+
+        :param identifiers: The identifiers of the devices to keep
+        :return: The removed devices
+        """
+        keep = set(identifiers)
+        removed = [
+            device for device in self.get_devices() if device.identifier not in keep
+        ]
+        for device in removed:
+            self.remove_device(device)
+
+        return removed
+
+    def get_devices(self) -> List[Device]:
+        """Returns all discovered devices, mapped or not.
+
+        :return: The list of Device instances
+        """
+        devices = [
+            device
+            for room in self.discovered_rooms.values()
+            for device in room.devices.values()
+        ]
+        for entities in self.unmapped_entities.values():
+            devices.extend(entity for entity in entities if isinstance(entity, Device))
+
+        return devices
+
+    def merge_heating(self, heating: Heating) -> List[PropertyChange]:
+        """
+        Add heating, or update the already known heating of the room in place.
+
+        :param heating: The freshly fetched heating
+        :return: The property changes applied to already known heating
+        """
+        room = self.find_room_by_identifier(heating.identifier)
+        existing = room.heating if room else None
+        if existing is None:
+            self.add_heating(heating)
+            return []
+
+        existing.name = heating.name
+        changes = []
+        for property, attribute in HEATING_PROPERTY_ATTRIBUTES.items():
+            old_value = getattr(existing, attribute)
+            new_value = getattr(heating, attribute)
+            if old_value == new_value:
+                continue
+
+            setattr(existing, attribute, new_value)
+            changes.append(
+                PropertyChange(
+                    existing.identifier,
+                    property,
+                    attribute,
+                    old_value,
+                    new_value,
+                    None,
+                    existing,
+                )
+            )
+
+        return changes
 
     def add_heating(self, heating: Heating):
         """
@@ -62,7 +275,7 @@ class Discovered:
         :param heating: The heating to add
         :return:
         """
-        room = self.find_room_by_identifier(heating.identifier)
+        room = self.discovered_rooms.get(heating.identifier)
 
         if room:
             room.add_heating(heating)
@@ -75,7 +288,7 @@ class Discovered:
         :param identifier: The identifier
         :return: The matched room or None
         """
-        return self._find_room_by_attribute_value("identifier", identifier)
+        return self.discovered_rooms.get(identifier)
 
     def find_room_by_name(self, name: str) -> Optional[Room]:
         """Finds a room by the given name.
@@ -83,34 +296,49 @@ class Discovered:
         :param name: The name
         :return: The matched room or None
         """
-        return self._find_room_by_attribute_value("name", name)
+        rooms = self._rooms_by_name.get(name)
+        return rooms[0] if rooms else None
 
     def find_device_by_identifier(self, identifier: str) -> Optional[Device]:
         """Find a device by identifier.
         :param identifier: The identifier of the device
         :return: The matched device or None
         """
-        for room in self.discovered_rooms.values():
-            if room.devices.get(identifier):
-                return room.devices.get(identifier)
+        return self._devices.get(identifier)
 
-        for devices in self.unmapped_entities.values():
-            for device in devices:
-                if device.identifier == identifier:
-                    return device
+    def apply_update(self, update: PropertyUpdate) -> Optional[PropertyChange]:
+        """Apply a property update to the matching device or heating in place.
 
-        return None
+        :param update: The update taken from a model event
+        :return: The applied change or None if nothing known was changed
+        """
+        entity: Optional[Union[Device, Heating]]
+        if update.collection == "devices":
+            entity = self.find_device_by_identifier(update.identifier)
+            attribute = DEVICE_PROPERTY_ATTRIBUTES.get(update.property)
+        else:
+            room = self.find_room_by_identifier(update.identifier)
+            entity = room.heating if room else None
+            attribute = HEATING_PROPERTY_ATTRIBUTES.get(update.property)
 
-    def _find_room_by_attribute_value(
-        self, attribute: str, value: str
-    ) -> Optional[Room]:
-        match = None
-        for room in self.discovered_rooms.values():
-            if getattr(room, attribute) == value:
-                match = room
-                break
+        if entity is None or attribute is None or not hasattr(entity, attribute):
+            return None
 
-        return match
+        old_value = getattr(entity, attribute)
+        if old_value == update.value:
+            return None
+
+        setattr(entity, attribute, intern(update.value))
+
+        return PropertyChange(
+            update.identifier,
+            update.property,
+            attribute,
+            old_value,
+            update.value,
+            update.timestamp,
+            entity,
+        )
 
     def get_rooms(self) -> List[Room]:
         """Returns all discovered rooms.
@@ -119,6 +347,18 @@ class Discovered:
         """
         return list(self.discovered_rooms.values())
 
+    def query(self, *types: Union[str, Type[Device]]) -> DeviceQuery:
+        """Query the discovered devices, mapped or not, e.g.::
+
+            discovered.query(RadiatorValve).where("battery_level", lt=20)
+            discovered.query(Blind).in_rooms(bedroom, kitchen)
+
+        :param types: Only devices of these classes or `get_type()` names
+        :return: A lazily evaluated query, see DeviceQuery
+        """
+        query = DeviceQuery(self._devices, self._device_index)
+        return query.of_type(*types) if types else query
+
 
 @dataclass
 class ClientResponse:
@@ -134,26 +374,307 @@ class ClientResponse:
         return ClientResponse(False, request)
 
 
+class _ManagedConnection:
+    """Wraps a pending connection to trace its handshake, holding the limiter (if
+    any) during the handshake only."""
+
+    def __init__(
+        self,
+        connection,
+        uri: str,
+        tracer: Tracer,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ):
+        self.connection = connection
+        self.uri = uri
+        self.tracer = tracer
+        self.limiter = limiter
+
+    async def _handshake(self, opening):
+        if self.limiter is None:
+            return await self._traced(opening)
+        async with self.limiter:
+            return await self._traced(opening)
+
+    async def _traced(self, opening):
+        url = urlsplit(self.uri)
+        attributes = {
+            "server.address": url.hostname,
+            "url.path": url.path,
+            "tls": url.scheme == "wss",
+        }
+        with self.tracer.span("iolite.websocket.connect", attributes):
+            return await opening
+
+    def __await__(self):
+        return self._handshake(self.connection).__await__()
+
+    async def __aenter__(self):
+        return await self._handshake(self.connection.__aenter__())
+
+    async def __aexit__(self, *exc_info):
+        return await self.connection.__aexit__(*exc_info)
+
+
+@dataclass
+class ActionResult:
+    """The outcome of a single property update sent via `Client.async_set_properties`."""
+
+    device_id: str
+    property_name: str
+    value: float
+    request_id: str
+    response: Optional[dict] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def success(self) -> bool:
+        return (
+            self.response is not None
+            and self.response.get("class") == ClassMap.ActionSuccess.value
+        )
+
+
 class Client:
-    """The main client."""
+    """The main client.
+
+    Use as an async context manager to keep one application WebSocket open, e.g.::
+
+        async with Client(sid, username, password) as client:
+            await client.async_discover()
+            await client.async_set_property(device_id, "blindLevel", 50)
+
+    Synchronous callers get the same with `with Client(...) as client:` (or
+    `open`/`close`), which runs the session on a dedicated event loop thread that
+    `discover`, `set_temp` and `set_blind_level` can share from any thread.
+
+    Outside of a session every call opens (and closes) its own connection. With
+    `reconnect` enabled a dropped session is re-established with jittered
+    exponential backoff, its subscriptions are re-issued and heating is fetched
+    again, reconciling the responses with the already discovered entities.
+
+    With `coalesce_window` set, rapid `async_set_property` calls for the same device
+    property within the window are collapsed into a single request for the last
+    value, e.g. while a blind slider is being dragged.
+
+    An `outbound` scheduler rate limits action requests, sending interactive ones
+    ahead of bulk ones; share it with a HeatingScheduler of the same home to limit
+    heating API calls too.
+
+    A `recorder` captures every frame sent and received, see `recording.Replayer`
+    to feed a capture back through the response handlers.
+
+    Pass `metrics`, e.g. a `metrics.PrometheusMetrics`, to measure frames, decode
+    and handler time, action round trips, keepalives, reconnects and discovery.
+
+    A `tracer` receives spans around connections, requests (keyed by requestID) and
+    property updates, see `tracing.Tracer`.
+
+    Frames are encoded with `codec`, by default the fastest installed JSON backend
+    (orjson, then ujson, then the standard library).
+
+    Concurrent discoveries are deduplicated into one. With `discovery_ttl` set, a
+    discovery is reused for that many seconds unless a model event announces
+    devices or rooms that it does not know about.
+
+    A `telemetry` store keeps the recent history of numeric device and heating
+    values, sampled after each discovery and on every change in between.
+
+    `aggregates` keep per room and home statistics of numeric device values, such as
+    the mean temperature, up to date as the values change.
+
+    `async_warm_start` restores the discovered entities from a snapshot written by an
+    earlier process, revalidating them against a live discovery in the background.
+    """
 
     BASE_URL = "wss://remote.iolite.de"
 
-    def __init__(self, sid: str, username: str, password: str, verify_ssl: bool = True):
+    def __init__(
+        self,
+        sid: str,
+        username: str,
+        password: str,
+        verify_ssl: bool = True,
+        reconnect: bool = False,
+        backoff: Optional[Backoff] = None,
+        codec: Optional[JsonCodec] = None,
+        coalesce_window: Optional[float] = None,
+        outbound: Optional[OutboundScheduler] = None,
+        recorder: Optional[FrameRecorder] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None,
+        discovery_ttl: Optional[float] = None,
+        telemetry: Optional[TelemetryStore] = None,
+        aggregates: Optional[Aggregates] = None,
+    ):
+        self.metrics = metrics or Metrics()
+        self.tracer = tracer or Tracer()
         self.discovered = Discovered()
-        self.request_handler = RequestHandler()
+        self.request_handler = RequestHandler(metrics=self.metrics, tracer=self.tracer)
         self.sid = sid
         self.username = username
         self.password = password
         self.verify_ssl = verify_ssl
+        self.reconnect = reconnect
+        self.backoff = backoff or Backoff()
+        self.connection_stats = ConnectionStats()
+        self.codec = codec or get_codec()
+        self.response_dispatcher = ResponseDispatcher()
+        self._register_response_handlers()
+        self.outbound = outbound
+        self.recorder = recorder
+        self.telemetry = telemetry
+        self.aggregates = aggregates
+        self._keepalive_received_at: Optional[float] = None
+        self._coalescer: Optional[WriteCoalescer] = None
+        if coalesce_window is not None:
+            self._coalescer = WriteCoalescer(self._send_property, coalesce_window)
+        self._application_websocket = None
+        self._application_reader: Optional[asyncio.Task] = None
+        self._revalidation: Optional[asyncio.Task] = None
+        self.discovery_ttl = discovery_ttl
+        self._discovery: Optional[asyncio.Task] = None
+        self._discovered_at: Optional[float] = None
+        # Bumped by invalidate_discovery so a discovery in flight is not cached
+        self._discovery_generation = 0
+        self._session_active = False
+        self.event_bus = EventBus()
+        self._loop_thread: Optional[LoopThread] = None
+        # Shared between clients to cap concurrent handshakes, see ClientManager
+        self.handshake_limiter: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "Client":
+        await self.async_connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.async_close()
+
+    def __enter__(self) -> "Client":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        """Start the background event loop thread and open the session on it."""
+        if self._loop_thread is None:
+            self._loop_thread = LoopThread(f"iolite-client-{self.sid}")
+        self._loop_thread.start()
+        self._loop_thread.run(self.async_connect())
+
+    def close(self):
+        """Close the session and stop the background event loop thread."""
+        loop_thread = self._loop_thread
+        if loop_thread is None:
+            return
 
-    @staticmethod
-    async def __send_request(request: Union[str, dict], websocket):
+        try:
+            loop_thread.run(self.async_close())
+        finally:
+            loop_thread.stop()
+            self._loop_thread = None
+
+    def _run_sync(self, coroutine):
+        if self._loop_thread and self._loop_thread.is_running:
+            return self._loop_thread.run(coroutine)
+        return asyncio.run(coroutine)
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the persistent application session currently has an open socket."""
+        return self._session_active and self._application_websocket is not None
+
+    async def async_connect(self):
+        """Open the persistent application WebSocket session.
+
+        While connected, discovery, queries and actions are sent over the same socket
+        rather than a connection per call.
+        """
+        if self._session_active:
+            return
+
+        logger.info("Opening JSON WS session")
+        self._application_websocket = await self._connect(self._get_application_uri())
+        self._session_active = True
+        self._application_reader = asyncio.create_task(self._application_session())
+
+    async def async_close(self):
+        """Close the persistent application WebSocket session, if open."""
+        if self._coalescer:
+            await self._coalescer.flush()
+
+        revalidation = self._revalidation
+        self._revalidation = None
+        if revalidation and not revalidation.done():
+            revalidation.cancel()
+            try:
+                await revalidation
+            except asyncio.CancelledError:
+                pass
+
+        reader = self._application_reader
+        websocket = self._application_websocket
+        self._application_reader = None
+        self._application_websocket = None
+        self._session_active = False
+
+        error = None
+        if reader:
+            if not reader.done():
+                reader.cancel()
+            try:
+                await reader
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                error = e
+
+        if websocket:
+            await websocket.close()
+            logger.info("Closed JSON WS session")
+
+        self.event_bus.close()
+
+        if error:
+            raise SessionClosedError(
+                f"Application session failed - {error!r}"
+            ) from error
+
+    def events(
+        self,
+        types: Optional[Sequence[Type[Entity]]] = None,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> Subscription:
+        """Subscribe to changes applied from model events, e.g.::
+
+            async for change in client.events(types=[RadiatorValve]):
+                ...
+
+        Changes are buffered per subscription; a subscriber that falls more than
+        `maxsize` changes behind is handled according to `overflow` so it can
+        never block the socket reader. Subscriptions end when the session closes.
+
+        :param types: Only deliver changes for these entity classes
+        :param maxsize: The maximum number of buffered changes
+        :param overflow: What to do when the buffer is full
+        :return: The subscription, an async iterator of PropertyChange
+        """
+        return self.event_bus.subscribe(types, maxsize, overflow)
+
+    async def __send_request(self, request: Union[str, dict], websocket):
         if isinstance(request, dict):
-            encoded_request = json.dumps(request)
+            encoded_request = self.codec.dumps(request)
         else:
             encoded_request = request
+        if self.recorder:
+            self.recorder.record(OUTBOUND, APPLICATION, encoded_request)
         await websocket.send(encoded_request)
+        self.metrics.frame_sent(APPLICATION)
+        if isinstance(request, dict):
+            self._observe_sent(request)
         logger.debug("Request sent", extra={"request": encoded_request})
 
     def _get_default_headers(self) -> dict:
@@ -163,6 +684,13 @@ class Client:
 
         return headers
 
+    def _connect(self, uri: str):
+        """Open a traced connection, holding the handshake limiter (if any) while
+        connecting."""
+        return _ManagedConnection(
+            self._ws_connect(uri), uri, self.tracer, self.handshake_limiter
+        )
+
     def _ws_connect(self, uri: str):
         """
         Create a websockets connection using the correct headers parameter for the
@@ -192,9 +720,34 @@ class Client:
         return websockets.connect(uri, additional_headers=headers, **kwargs)
 
     async def _fetch_heating(self):
+        if not self.reconnect:
+            await self._fetch_heating_once()
+            return
+
+        backoff = copy.copy(self.backoff)
+        backoff.reset()
+        while True:
+            try:
+                await self._fetch_heating_once()
+                return
+            except websockets.InvalidHandshake:
+                # Rejected, e.g. with 401 for wrong credentials, retrying will not help
+                raise
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                delay = backoff.next_delay()
+                logger.warning(f"Heating WS failed, retrying in {delay:.1f}s - {e}")
+                await asyncio.sleep(delay)
+
+    async def _reconcile_heating(self):
+        try:
+            await self._fetch_heating()
+        except Exception:
+            logger.exception("Failed to fetch heating after reconnect")
+
+    async def _fetch_heating_once(self):
         logger.info("Connecting to heating WS")
         uri = f"{self.BASE_URL}/heating/ws?SID={self.sid}"
-        async with self._ws_connect(uri) as websocket:
+        async with self._connect(uri) as websocket:
             async for response in websocket:
                 logger.debug(
                     f"Response received (heating) {response}",
@@ -210,7 +763,7 @@ class Client:
     async def _devices_handler(self):
         logger.info("Connecting to devices WS")
         uri = f"{self.BASE_URL}/devices/ws?SID={self.sid}"
-        async with self._ws_connect(uri) as websocket:
+        async with self._connect(uri) as websocket:
             async for response in websocket:
                 logger.debug(
                     f"Response received (device) {response}",
@@ -221,10 +774,34 @@ class Client:
                 await asyncio.sleep(5)
                 await self.__send_request("keep_alive", websocket)
 
-    async def _fetch_application(self, requests: list):
-        logger.info("Connecting to JSON WS")
-        uri = f"{self.BASE_URL}/bus/websocket/application/json?SID={self.sid}"
-        async with self._ws_connect(uri) as websocket:
+    def _get_application_uri(self) -> str:
+        return f"{self.BASE_URL}/bus/websocket/application/json?SID={self.sid}"
+
+    async def _application_session(self):
+        requests: list = []
+        heating: Optional[asyncio.Task] = None
+        try:
+            while True:
+                await self._read_application_session(
+                    self._application_websocket, requests
+                )
+                if not self.reconnect:
+                    break
+
+                await self._reconnect_application_session()
+                # Responses to these are reconciled against the discovered entities
+                requests = self.request_handler.get_resubscribe_requests()
+                if heating is None or heating.done():
+                    heating = asyncio.create_task(self._reconcile_heating())
+        finally:
+            if heating and not heating.done():
+                heating.cancel()
+            logger.info("JSON WS session ended")
+            self._session_active = False
+
+    async def _read_application_session(self, websocket, requests: list):
+        error: Optional[BaseException] = None
+        try:
             for request in requests:
                 await self.__send_request(request, websocket)
 
@@ -232,63 +809,286 @@ class Client:
                 logger.debug(
                     f"Response received (JSON) {response}", extra={"response": response}
                 )
-                response = await self._application_response_handler(response)
-                if response.abort:
-                    logger.info("Aborting")
-                    break
+                try:
+                    response = await self._application_response_handler(response)
+                except Exception:
+                    if not self.reconnect:
+                        raise
+                    # A supervised session must survive a single bad frame
+                    logger.exception("Failed to handle JSON WS frame")
+                    continue
 
                 if response.request:
                     await self.__send_request(response.request, websocket)
+        except websockets.ConnectionClosed as e:
+            logger.warning(f"JSON WS session closed by remote - {e}")
+        except Exception as e:
+            logger.exception("JSON WS session failed")
+            error = e
+            raise
+        finally:
+            self._application_websocket = None
+            self.connection_stats.mark_disconnected()
+            closed = SessionClosedError(
+                "Application session closed before all requests were handled"
+            )
+            closed.__cause__ = error
+            self.request_handler.fail_waiting(closed)
+
+    async def _reconnect_application_session(self):
+        self.backoff.reset()
+        while True:
+            delay = self.backoff.next_delay()
+            logger.info(f"Reconnecting JSON WS in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+            try:
+                websocket = await self._connect(self._get_application_uri())
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                self.connection_stats.failed_attempts += 1
+                logger.warning(f"Failed to reconnect JSON WS - {e}")
+                continue
+
+            break
+
+        self.connection_stats.mark_reconnected()
+        self.metrics.reconnected()
+        logger.info("Reconnected JSON WS")
+        self._application_websocket = websocket
+
+    async def _send_requests(
+        self, requests: list, websocket, priority: Optional[Priority] = None
+    ):
+        for request in requests:
+            if priority is not None and self.outbound:
+                await self.outbound.acquire(priority)
+                if self.request_handler.get_request(request["requestID"]) is None:
+                    # Expired while rate limited, it was reported as failed already
+                    continue
+            await self.__send_request(request, websocket)
+
+    async def _send_in_session(
+        self, requests: list, priority: Optional[Priority] = None
+    ) -> list:
+        websocket = self._application_websocket
+        if websocket is None:
+            self._forget(requests)
+            raise SessionClosedError("Application session is reconnecting")
+
+        responses = self._expect_responses(requests)
+        try:
+            await self._send_requests(requests, websocket, priority)
+        except websockets.ConnectionClosed as e:
+            self._forget(requests)
+            raise SessionClosedError(f"Application session closed - {e}") from e
+
+        return await asyncio.gather(*responses, return_exceptions=True)
+
+    def _expect_responses(self, requests: list) -> List[asyncio.Future]:
+        return [
+            self.request_handler.get_response(request["requestID"])
+            for request in requests
+        ]
+
+    def _forget(self, requests: list):
+        for request in requests:
+            self.request_handler.pop_request(request["requestID"])
+
+    def _session_error(self) -> Optional[BaseException]:
+        reader = self._application_reader
+        if reader is None or not reader.done() or reader.cancelled():
+            return None
+        return reader.exception()
+
+    async def _fetch_application(
+        self, requests: list, priority: Optional[Priority] = None
+    ) -> List[dict]:
+        """
+        Send requests and wait for their responses.
+
+        :param requests: The requests to send
+        :param priority: Rate limit the requests with this priority
+        :return: The responses, in request order
+        :raises IOLiteError: The first error a request failed with
+        """
+        responses = await self._exchange(requests, priority)
+        for response in responses:
+            if isinstance(response, BaseException):
+                raise response
+
+        return responses
+
+    async def _exchange(
+        self, requests: list, priority: Optional[Priority] = None
+    ) -> list:
+        """
+        Send requests and wait for each to be answered or to fail.
+
+        :param requests: The requests to send
+        :param priority: Rate limit the requests with this priority
+        :return: The response, or the error it failed with, for each request
+        """
+        if self._session_active:
+            return await self._send_in_session(requests, priority)
+
+        if self._application_reader is not None:
+            # Opened via async_connect but ended without async_close
+            self._forget(requests)
+            raise SessionClosedError(
+                "Application session has ended"
+            ) from self._session_error()
+
+        if not requests:
+            return []
+
+        logger.info("Connecting to JSON WS")
+        responses = asyncio.gather(
+            *self._expect_responses(requests), return_exceptions=True
+        )
+        try:
+            await self._exchange_once(requests, responses, priority)
+        except BaseException:
+            # Nothing may be left waiting once this call, or its event loop, is gone
+            self._forget(requests)
+            raise
+
+        return await responses
+
+    async def _exchange_once(
+        self, requests: list, responses: asyncio.Future, priority: Optional[Priority]
+    ):
+        async with self._connect(self._get_application_uri()) as websocket:
+            reader = asyncio.create_task(self._read_application(websocket))
+            try:
+                await self._send_requests(requests, websocket, priority)
+
+                await asyncio.wait(
+                    {reader, responses}, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                reader.cancel()
+
+            if not responses.done():
+                error = SessionClosedError(
+                    "JSON WS closed before all requests were handled"
+                )
+                if not reader.cancelled():
+                    error.__cause__ = reader.exception()
+                self.request_handler.fail_waiting(
+                    error, [request["requestID"] for request in requests]
+                )
 
             logger.info("Finished JSON WS")
 
-    async def _heating_response_handler(self, response: str) -> ClientResponse:
-        heatings_dict = json.loads(response)
+    async def _read_application(self, websocket):
+        async for response in websocket:
+            logger.debug(
+                f"Response received (JSON) {response}", extra={"response": response}
+            )
+            response = await self._application_response_handler(response)
+            if response.request:
+                await self.__send_request(response.request, websocket)
+
+    async def _heating_response_handler(self, response: Frame) -> ClientResponse:
+        if self.recorder:
+            self.recorder.record(INBOUND, HEATING, response)
+        self.metrics.frame_received(HEATING)
+        heatings_dict = self._decode(response)
         for heating_dict in heatings_dict:
             heating = entity_factory.create_heating(heating_dict)
-            self.discovered.add_heating(heating)
+            for change in self.discovered.merge_heating(heating):
+                self._publish_change(change)
 
         return ClientResponse.create_abort()
 
-    async def _application_response_handler(self, response: str) -> ClientResponse:
-        response_dict = json.loads(response)
-        response_class = response_dict.get("class")
-
-        if response_class == ClassMap.SubscribeSuccess.value:
-            logger.info("Handling SubscribeSuccess")
-
-            if response_dict.get("requestID").startswith("places"):
-                self._handle_place_response(response_dict)
-
-            if response_dict.get("requestID").startswith("devices"):
-                self._handle_device_response(response_dict)
-
-        elif response_class == ClassMap.QuerySuccess.value:
-            logger.info("Handling QuerySuccess")
-        elif response_class == ClassMap.KeepAliveRequest.value:
-            logger.info("Handling KeepAliveRequest")
-            request = self.request_handler.get_keepalive_request()
-            return ClientResponse.create_continue(request)
-        elif response_class == ClassMap.ModelEventResponse.value:
-            logger.info("Handling ModelEventResponse")
-        elif response_class == ClassMap.ActionSuccess.value:
-            logger.info("Handling ActionSuccess")
-        else:
-            logger.warning(
-                f"Unsupported response {response_dict}",
-                extra={"response_class": response_class},
-            )
+    async def _application_response_handler(self, response: Frame) -> ClientResponse:
+        if self.recorder:
+            self.recorder.record(INBOUND, APPLICATION, response)
+        self.metrics.frame_received(APPLICATION)
+        response_dict = self._decode(response)
+
+        started = time.perf_counter()
+        request = await self.response_dispatcher.dispatch(response_dict)
+        self.metrics.observe_handler(
+            str(response_dict.get("class")), time.perf_counter() - started
+        )
 
         request_id = response_dict.get("requestID")
-        if not request_id:
-            return ClientResponse.create_continue()
+        if request_id:
+            self.request_handler.resolve(request_id, response_dict)
+
+        return ClientResponse.create_continue(request)
+
+    def _decode(self, response: Frame):
+        started = time.perf_counter()
+        decoded = self.codec.loads(response)
+        self.metrics.observe_decode(time.perf_counter() - started)
+        return decoded
+
+    def _observe_sent(self, request: dict):
+        request_class = request.get("class")
+        if request_class == ClassMap.KeepAliveResponse.value:
+            if self._keepalive_received_at is not None:
+                self.metrics.observe_keepalive_latency(
+                    time.perf_counter() - self._keepalive_received_at
+                )
+                self._keepalive_received_at = None
+        elif "requestID" in request:
+            self.request_handler.mark_sent(request["requestID"])
+
+    def register_response_handler(
+        self,
+        response_class: str,
+        handler: ResponseHandler,
+        request_kind: Optional[str] = None,
+    ):
+        """
+        Handle responses of a class with a coroutine, e.g. for new message classes.
 
-        self.request_handler.pop_request(request_id)
-        if not self.request_handler.has_requests():
-            logger.info("Handled all requests")
-            return ClientResponse.create_abort()
+        The handler is called with the decoded response and may return a request to
+        send back. Pending requests are still resolved with the response afterwards.
+
+        :param response_class: The "class" of the responses to handle
+        :param handler: Coroutine function called with the decoded response
+        :param request_kind: Only handle responses to requests of this kind, e.g.
+            the object query of a subscription
+        """
+        self.response_dispatcher.register(response_class, handler, request_kind)
+
+    def _register_response_handlers(self):
+        register = self.response_dispatcher.register
+        register(ClassMap.SubscribeSuccess.value, self._on_places, "places")
+        register(ClassMap.SubscribeSuccess.value, self._on_devices, "devices")
+        register(ClassMap.SubscribeSuccess.value, self._on_success)
+        register(ClassMap.QuerySuccess.value, self._on_success)
+        register(ClassMap.ActionSuccess.value, self._on_success)
+        register(ClassMap.KeepAliveRequest.value, self._on_keepalive)
+        register(ClassMap.ModelEventResponse.value, self._on_model_event)
+
+    async def _on_places(self, response_dict: dict) -> None:
+        self._handle_place_response(response_dict)
+
+    async def _on_devices(self, response_dict: dict) -> None:
+        self._handle_device_response(response_dict)
+
+    async def _on_success(self, response_dict: dict) -> None:
+        # Resolved with the pending request, nothing else to do
+        return None
 
-        return ClientResponse.create_continue()
+    async def _on_keepalive(self, response_dict: dict) -> dict:
+        self._keepalive_received_at = time.perf_counter()
+        return self.request_handler.get_keepalive_request()
+
+    async def _on_model_event(self, response_dict: dict) -> None:
+        self._handle_model_event(response_dict)
+
+    def _publish_change(self, change: PropertyChange):
+        # A discovery records every entity once it has finished
+        if self.telemetry is not None and self._discovery is None:
+            self.telemetry.record_change(change)
+        if self.aggregates is not None:
+            self.aggregates.apply_change(change)
+        self.event_bus.publish(change)
 
     def _handle_place_response(self, response_dict: dict):
         for value in response_dict["initialValues"]:
@@ -296,7 +1096,33 @@ class Client:
             self.discovered.add_room(room)
             logger.info(f"Setting up {room.name} ({room.identifier})")
 
+    def _handle_model_event(self, response_dict: dict) -> List[PropertyChange]:
+        if changes_topology(response_dict):
+            self.invalidate_discovery()
+
+        changes = []
+        for update in parse_model_event(response_dict):
+            change = self.discovered.apply_update(update)
+            if not change:
+                if self._discovered_at is not None and not self._is_known(update):
+                    self.invalidate_discovery()
+                continue
+
+            logger.debug(
+                f"Updated {change.attribute} of {change.identifier} "
+                f"from {change.old_value} to {change.new_value}"
+            )
+            changes.append(change)
+            self._publish_change(change)
+
+        return changes
+
     def _handle_device_response(self, response_dict: dict):
+        identifiers = [value.get("id") for value in response_dict["initialValues"]]
+        # The subscription lists every device, so anything else has gone away
+        for device in self.discovered.remove_devices_except(identifiers):
+            logger.info(f"Removing {type(device).__name__} ({device.name})")
+
         for value in response_dict["initialValues"]:
             try:
                 device = entity_factory.create_device(value)
@@ -304,14 +1130,62 @@ class Client:
                 logger.warning(f"Unsupported device identified - {e.type_name}")
                 continue
 
-            self.discovered.add_device(device)
+            for change in self.discovered.merge_device(device):
+                self._publish_change(change)
+
             room = self.discovered.find_room_by_identifier(device.place_identifier)
             room_name = room.name if room else "unknown"
             logger.info(
                 f"Adding {type(device).__name__} ({device.name}) to {room_name}"
             )
 
-    async def async_discover(self):
+        if self.aggregates is not None:
+            self.aggregates.load(self.discovered)
+
+    async def async_discover(self, force: bool = False):
+        """
+        Discover the rooms, devices and heating of the home.
+
+        Concurrent calls share a single discovery. With `discovery_ttl` set, a
+        discovery finished within the TTL is reused rather than repeated.
+
+        :param force: Ignore a cached discovery, still joining one in flight
+        """
+        discovery = self._discovery
+        if discovery is not None and discovery.get_loop() is not (
+            asyncio.get_running_loop()
+        ):
+            # A task of another loop, e.g. of a concurrent sync discover(), cannot
+            # be awaited here
+            discovery = None
+        if discovery is None:
+            if not force and self._is_discovery_fresh():
+                return
+
+            discovery = self._discovery = asyncio.create_task(
+                self._discover(self._discovery_generation)
+            )
+        # Cancelling one caller must not cancel the discovery of the others
+        await asyncio.shield(discovery)
+
+    def invalidate_discovery(self):
+        """Make the next `async_discover` fetch again despite `discovery_ttl`."""
+        self._discovered_at = None
+        self._discovery_generation += 1
+
+    def _is_discovery_fresh(self) -> bool:
+        if self.discovery_ttl is None or self._discovered_at is None:
+            return False
+        return time.monotonic() - self._discovered_at < self.discovery_ttl
+
+    def _is_known(self, update: PropertyUpdate) -> bool:
+        if update.collection == "devices":
+            return (
+                self.discovered.find_device_by_identifier(update.identifier) is not None
+            )
+        return self.discovered.find_room_by_identifier(update.identifier) is not None
+
+    async def _discover(self, generation: int):
         requests = [
             # Get Rooms
             self.request_handler.get_subscribe_request("places"),
@@ -321,19 +1195,176 @@ class Client:
             self.request_handler.get_query_request("situationProfileModel"),
         ]
 
-        await asyncio.create_task(self._fetch_application(requests))
-        await asyncio.create_task(self._fetch_heating())
+        started = time.perf_counter()
+        # Both endpoints are independent; Discovered buffers whichever arrives first
+        fetches = [
+            asyncio.create_task(self._fetch_application(requests)),
+            asyncio.create_task(self._fetch_heating()),
+        ]
+        try:
+            done, _ = await asyncio.wait(fetches, return_when=asyncio.FIRST_EXCEPTION)
+            for fetch in done:
+                fetch.result()
+        finally:
+            # Whichever fetch is still running after a failure would be orphaned
+            for fetch in fetches:
+                fetch.cancel()
+            await asyncio.gather(*fetches, return_exceptions=True)
+            if self._discovery is asyncio.current_task():
+                self._discovery = None
+        self.metrics.observe_discovery(time.perf_counter() - started)
+
+        if generation == self._discovery_generation:
+            self._discovered_at = time.monotonic()
+        if self.telemetry is not None:
+            self.telemetry.record_discovered(self.discovered)
 
     def discover(self):
         """Discovers the entities registered within the heating system."""
-        asyncio.run(self.async_discover())
+        self._run_sync(self.async_discover())
+
+    async def async_warm_start(
+        self, path: str, policy: Optional[SnapshotPolicy] = None
+    ) -> bool:
+        """
+        Restore the discovered entities from a snapshot instead of waiting on a
+        discovery. A snapshot older than `policy.revalidate_after` is revalidated by
+        a discovery in the background, which merges into the restored entities in
+        place and saves a new snapshot. Without a usable snapshot of this home a
+        discovery is awaited and saved instead.
+
+        :param path: The snapshot file, see `save_snapshot`
+        :param policy: When the snapshot may be used, by default SnapshotPolicy()
+        :return: Whether the snapshot was used
+        """
+        policy = policy or SnapshotPolicy()
+        try:
+            snapshot = load_snapshot(path)
+        except SnapshotError as e:
+            logger.warning(f"Ignoring snapshot - {e}")
+            snapshot = None
+
+        if (
+            snapshot is None
+            or snapshot.sid != self.sid
+            or not policy.is_usable(snapshot)
+        ):
+            await self.async_discover()
+            self.save_snapshot(path)
+            return False
+
+        self.discovered = snapshot.discovered
+        self._discovered_at = time.monotonic() - snapshot.age
+        if self.aggregates is not None:
+            self.aggregates.load(self.discovered)
+        logger.info(f"Restored snapshot taken {snapshot.age:.0f}s ago")
+        if policy.needs_revalidation(snapshot):
+            self._revalidation = asyncio.create_task(self._revalidate(path))
+
+        return True
+
+    async def _revalidate(self, path: str):
+        try:
+            await self.async_discover(force=True)
+        except Exception as e:
+            logger.warning(f"Revalidating snapshot failed - {e!r}")
+            return
+
+        self.save_snapshot(path)
+
+    def save_snapshot(self, path: str):
+        """
+        Save the discovered entities for `async_warm_start`.
 
-    async def async_set_property(self, device, property: str, value: float):
+        :param path: The file to write, replaced atomically
+        """
+        save_snapshot(self.discovered, path, self.sid)
+
+    async def async_set_property(
+        self,
+        device,
+        property: str,
+        value: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> float:
+        """
+        Set a device property.
+
+        :param device: The ID of the device
+        :param property: The property to set
+        :param value: The value to set
+        :param priority: The priority of the request when rate limited, coalesced
+            writes are always sent as interactive
+        :return: The value sent, with coalescing the last one written in the window
+        """
+        attributes = {"iolite.device_id": device, "iolite.property": property}
+        with self.tracer.span("iolite.set_property", attributes):
+            if self._coalescer:
+                return await self._coalescer.write(device, property, value)
+
+            await self._send_property(device, property, value, priority)
+            return value
+
+    async def _send_property(
+        self,
+        device: str,
+        property: str,
+        value: float,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
         request = self.request_handler.get_action_request(device, property, value)
-        await asyncio.create_task(self._fetch_application([request]))
+        await asyncio.create_task(self._fetch_application([request], priority))
+
+    async def async_set_properties(
+        self,
+        updates: Sequence[Tuple[str, str, float]],
+        timeout: Optional[float] = 30.0,
+        priority: Priority = Priority.BULK,
+    ) -> List[ActionResult]:
+        """Set several device properties at once.
+
+        All action requests are pipelined over a single connection and the call
+        resolves once every request has been answered or has failed. Updates that
+        were not answered in time are left with a `response` of None and an `error`.
+
+        :param updates: The (device_id, property, value) tuples to apply
+        :param timeout: The time to wait for each response in seconds, including
+            any time spent waiting for the rate limit
+        :param priority: The priority of the requests when rate limited
+        :return: One ActionResult per update, in the order given
+        """
+        if not updates:
+            return []
+
+        requests = []
+        results = []
+        for device_id, property, value in updates:
+            request = self.request_handler.get_action_request(
+                device_id, property, value, timeout
+            )
+            requests.append(request)
+            results.append(
+                ActionResult(device_id, property, value, request["requestID"])
+            )
+
+        try:
+            responses = await self._exchange(requests, priority)
+        except SessionClosedError as e:
+            logger.warning(f"Batched action interrupted - {e}")
+            responses = [e] * len(requests)
+
+        for result, response in zip(results, responses):
+            if isinstance(response, BaseException):
+                result.error = response
+            else:
+                result.response = response
+
+        return results
 
     def set_temp(self, device, value: float):
-        asyncio.run(self.async_set_property(device, "heatingTemperatureSetting", value))
+        self._run_sync(
+            self.async_set_property(device, "heatingTemperatureSetting", value)
+        )
 
     def set_blind_level(self, device, value: float):
-        asyncio.run(self.async_set_property(device, "blindLevel", value))
+        self._run_sync(self.async_set_property(device, "blindLevel", value))
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WriteKey = Tuple[str, str]
+SendProperty = Callable[[str, str, float], Awaitable[None]]
+
+
+class _PendingWrite:
+    def __init__(self, value: float, future: asyncio.Future):
+        self.value = value
+        self.future = future
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class WriteCoalescer:
+    """Coalesces rapid writes to the same device property.
+
+    The first write to a (device, property) opens a window of `window` seconds;
+    writes arriving within it replace the pending value, and only the last one is
+    sent when the window closes. Every caller in the window is resolved with the
+    value that was finally sent. Writes to the same property are sent in order.
+    """
+
+    def __init__(self, send: SendProperty, window: float = 0.1):
+        """
+        :param send: Coroutine function sending a single (device_id, property, value)
+        :param window: The time to collect writes before sending in seconds
+        """
+        if window < 0:
+            raise ValueError("window must not be negative")
+
+        self.send = send
+        self.window = window
+        self.sent = 0
+        self.coalesced = 0
+        self._pending: Dict[WriteKey, _PendingWrite] = {}
+        self._in_flight: Dict[WriteKey, asyncio.Task] = {}
+
+    async def write(self, device_id: str, property: str, value: float) -> float:
+        """
+        Queue a write, superseding any pending one for the same property.
+
+        :param device_id: The device to update
+        :param property: The property to set
+        :param value: The value to set
+        :return: The value that was finally sent for the property
+        """
+        key = (device_id, property)
+        pending = self._pending.get(key)
+        if pending:
+            pending.value = value
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            pending = _PendingWrite(value, loop.create_future())
+            # Keeps an error from being reported as never retrieved when every
+            # caller has been cancelled
+            pending.future.add_done_callback(_retrieve_exception)
+            pending.timer = loop.call_later(self.window, self._flush_key, key)
+            self._pending[key] = pending
+
+        # A cancelled caller must not cancel the write for the others
+        return await asyncio.shield(pending.future)
+
+    def has_pending(self) -> bool:
+        return len(self._pending) != 0 or len(self._in_flight) != 0
+
+    async def flush(self):
+        """Send every pending write now and wait until all writes were sent."""
+        for key in list(self._pending):
+            self._flush_key(key)
+
+        in_flight = list(self._in_flight.values())
+        if in_flight:
+            await asyncio.wait(in_flight)
+
+    def _flush_key(self, key: WriteKey):
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+
+        if pending.timer:
+            pending.timer.cancel()
+
+        previous = self._in_flight.get(key)
+        task = asyncio.ensure_future(self._send(key, pending, previous))
+        self._in_flight[key] = task
+
+        def on_done(done: asyncio.Task):
+            if self._in_flight.get(key) is done:
+                self._in_flight.pop(key)
+
+        task.add_done_callback(on_done)
+
+    async def _send(
+        self, key: WriteKey, pending: _PendingWrite, previous: Optional[asyncio.Task]
+    ):
+        if previous:
+            await asyncio.wait([previous])
+
+        device_id, property = key
+        try:
+            await self.send(device_id, property, pending.value)
+        except Exception as e:
+            logger.warning(f"Failed to set {property} of {device_id} - {e!r}")
+            if not pending.future.done():
+                pending.future.set_exception(e)
+            return
+
+        self.sent += 1
+        if not pending.future.done():
+            pending.future.set_result(pending.value)
+
+
+def _retrieve_exception(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,89 @@
+import json
+from typing import Any, Optional, Union
+
+Frame = Union[str, bytes]
+
+
+class JsonCodec:
+    """Encodes and decodes the JSON frames exchanged over the WebSockets.
+
+    The default implementation uses the standard library. Decoding accepts
+    both text and bytes frames.
+    """
+
+    name = "json"
+
+    def loads(self, frame: Frame) -> Any:
+        return json.loads(frame)
+
+    def dumps(self, payload: Any) -> str:
+        return json.dumps(payload)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by orjson, decoding bytes frames without a text copy."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, frame: Frame) -> Any:
+        return self._orjson.loads(frame)
+
+    def dumps(self, payload: Any) -> str:
+        # Text frames are expected by the server, orjson encodes to UTF-8 bytes
+        return self._orjson.dumps(payload).decode()
+
+
+class UjsonCodec(JsonCodec):
+    """Codec backed by ujson."""
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._ujson = ujson
+
+    def loads(self, frame: Frame) -> Any:
+        return self._ujson.loads(frame)
+
+    def dumps(self, payload: Any) -> str:
+        return self._ujson.dumps(payload, ensure_ascii=False)
+
+
+_BACKENDS = {
+    OrjsonCodec.name: OrjsonCodec,
+    UjsonCodec.name: UjsonCodec,
+    JsonCodec.name: JsonCodec,
+}
+
+_default_codec: Optional[JsonCodec] = None
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Get a JSON codec.
+
+    :param name: One of "orjson", "ujson" or "json", defaults to the fastest installed
+    :return: The codec
+    """
+    if name is not None:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown JSON codec {name}")
+        return _BACKENDS[name]()
+
+    global _default_codec
+    if _default_codec is None:
+        for backend in _BACKENDS.values():
+            try:
+                _default_codec = backend()
+                break
+            except ImportError:
+                continue
+
+    assert _default_codec is not None
+    return _default_codec
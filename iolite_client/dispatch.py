@@ -0,0 +1,87 @@
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ResponseHandler = Callable[[dict], Awaitable[Optional[dict]]]
+
+
+def get_request_kind(request_id: Optional[str]) -> Optional[str]:
+    """
+    Get the kind of request a request ID was issued for, e.g. "places".
+
+    :param request_id: An ID built by RequestHandler, "<kind>_<random>"
+    :return: The kind or None
+    """
+    if not request_id:
+        return None
+
+    kind, separator, _ = request_id.rpartition("_")
+    return kind if separator else None
+
+
+class ResponseDispatcher:
+    """Routes decoded responses to handler coroutines.
+
+    Handlers are registered per response class and optionally per request kind,
+    a handler for a kind takes precedence over the one for the whole class. A
+    handler may return a request to send back over the same socket.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[Tuple[str, Optional[str]], ResponseHandler] = {}
+        self.unsupported: Counter = Counter()
+
+    def register(
+        self,
+        response_class: str,
+        handler: ResponseHandler,
+        request_kind: Optional[str] = None,
+    ):
+        """
+        Register a handler, replacing any registered for the same key.
+
+        :param response_class: The "class" of the responses to handle
+        :param handler: Coroutine function called with the decoded response
+        :param request_kind: Only handle responses to requests of this kind
+        """
+        self._handlers[(response_class, request_kind)] = handler
+
+    def unregister(self, response_class: str, request_kind: Optional[str] = None):
+        self._handlers.pop((response_class, request_kind), None)
+
+    def get_handler(
+        self, response_class: Optional[str], request_id: Optional[str] = None
+    ) -> Optional[ResponseHandler]:
+        if response_class is None:
+            return None
+
+        request_kind = get_request_kind(request_id)
+        if request_kind is not None:
+            handler = self._handlers.get((response_class, request_kind))
+            if handler:
+                return handler
+
+        return self._handlers.get((response_class, None))
+
+    async def dispatch(self, response: dict) -> Optional[dict]:
+        """
+        Route a response to its handler.
+
+        Responses without a handler are counted per class in `unsupported`.
+
+        :param response: The decoded response
+        :return: The request the handler wants sent back or None
+        """
+        response_class = response.get("class")
+        handler = self.get_handler(response_class, response.get("requestID"))
+        if handler is None:
+            key = response_class or "<missing>"
+            self.unsupported[key] += 1
+            if self.unsupported[key] == 1:
+                logger.warning(f"Unsupported response class {key}")
+            return None
+
+        logger.debug(f"Handling {response_class}")
+        return await handler(response)
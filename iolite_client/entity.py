@@ -1,20 +1,34 @@
+import sys
 from abc import ABC
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 
+def intern(value: Any) -> Any:
+    """Intern strings that repeat across many entities, e.g. manufacturers, so they
+    are held once. Anything else is returned as is."""
+    return sys.intern(value) if type(value) is str else value
+
+
+# Entities are slotted, without a per-instance __dict__, as large homes hold many
 class Entity(ABC):
+    __slots__ = ("identifier", "name")
+
     def __init__(self, identifier: str, name: str):
         self.identifier = identifier
         self.name = name
 
 
 class PlaceEntity(Entity):
+    __slots__ = ("place_identifier",)
+
     def __init__(self, identifier: str, name: str, place_identifier: str):
         super().__init__(identifier, name)
-        self.place_identifier = place_identifier
+        self.place_identifier = intern(place_identifier)
 
 
 class Device(PlaceEntity):
+    __slots__ = ("_manufacturer", "_model_name")
+
     def __init__(
         self, identifier: str, name: str, place_identifier: str, manufacturer: str
     ):
@@ -22,7 +36,23 @@ class Device(PlaceEntity):
         self.manufacturer = manufacturer
         # Optional hardware/model identifier when available (e.g. from payload["modelName"]).
         # Kept as a simple attribute to avoid changing constructor signatures across subclasses.
-        self.model_name: Optional[str] = None
+        self.model_name = None
+
+    @property
+    def manufacturer(self) -> str:
+        return self._manufacturer
+
+    @manufacturer.setter
+    def manufacturer(self, value: str):
+        self._manufacturer = intern(value)
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return self._model_name
+
+    @model_name.setter
+    def model_name(self, value: Optional[str]):
+        self._model_name = intern(value)
 
     @classmethod
     def get_type(cls) -> str:
@@ -30,10 +60,12 @@ class Device(PlaceEntity):
 
 
 class Switch(Device):
-    pass
+    __slots__ = ()
 
 
 class Blind(Device):
+    __slots__ = ("blind_level",)
+
     def __init__(
         self,
         identifier: str,
@@ -47,6 +79,8 @@ class Blind(Device):
 
 
 class HumiditySensor(Device):
+    __slots__ = ("current_env_temp", "humidity_level")
+
     def __init__(
         self,
         identifier: str,
@@ -62,10 +96,12 @@ class HumiditySensor(Device):
 
 
 class Lamp(Device):
-    pass
+    __slots__ = ()
 
 
 class RadiatorValve(Device):
+    __slots__ = ("valve_position", "heating_mode", "battery_level", "current_env_temp")
+
     def __init__(
         self,
         identifier: str,
@@ -79,12 +115,14 @@ class RadiatorValve(Device):
     ):
         super().__init__(identifier, name, place_identifier, manufacturer)
         self.valve_position = valve_position
-        self.heating_mode = heating_mode
+        self.heating_mode = intern(heating_mode)
         self.battery_level = battery_level
         self.current_env_temp = current_env_temp
 
 
 class InFloorValve(Device):
+    __slots__ = ("heating_temperature_setting", "device_status", "current_env_temp")
+
     def __init__(
         self,
         identifier: str,
@@ -97,11 +135,13 @@ class InFloorValve(Device):
     ):
         super().__init__(identifier, name, place_identifier, manufacturer)
         self.heating_temperature_setting = heating_temperature_setting
-        self.device_status = device_status
+        self.device_status = intern(device_status)
         self.current_env_temp = current_env_temp
 
 
 class Heating(Entity):
+    __slots__ = ("current_temp", "target_temp", "window_open")
+
     def __init__(
         self,
         identifier: str,
@@ -117,6 +157,8 @@ class Heating(Entity):
 
 
 class Room(Entity):
+    __slots__ = ("devices", "heating")
+
     def __init__(self, identifier: str, name: str):
         super().__init__(identifier, name)
         self.devices: Dict[str, Device] = {}
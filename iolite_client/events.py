@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from enum import Enum
+from typing import List, Optional, Sequence, Tuple, Type
+
+from iolite_client.entity import Entity
+from iolite_client.model_event import PropertyChange
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    """What to do when a subscriber's queue is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    CLOSE = "close"
+
+
+class Subscription:
+    """A bounded stream of property changes, consumed with `async for`."""
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        types: Optional[Sequence[Type[Entity]]] = None,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.types: Optional[Tuple[Type[Entity], ...]] = tuple(types) if types else None
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.closed = False
+        self._bus = bus
+        # One extra slot so the closing sentinel always fits
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize + 1)
+
+    def matches(self, change: PropertyChange) -> bool:
+        return self.types is None or isinstance(change.entity, self.types)
+
+    def publish(self, change: PropertyChange):
+        """Queue a change without blocking the publisher."""
+        if self.closed or not self.matches(change):
+            return
+
+        if self._queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            if self.overflow == OverflowPolicy.DROP_NEWEST:
+                return
+            if self.overflow == OverflowPolicy.CLOSE:
+                logger.warning("Closing event subscription that fell behind")
+                self.close()
+                return
+            self._queue.get_nowait()
+
+        self._queue.put_nowait(change)
+
+    def close(self):
+        """Stop the subscription, ending iteration once queued changes are consumed."""
+        if self.closed:
+            return
+
+        self.closed = True
+        self._bus.unsubscribe(self)
+        self._queue.put_nowait(None)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> PropertyChange:
+        if self.closed and self._queue.empty():
+            raise StopAsyncIteration
+
+        change = await self._queue.get()
+        if change is None:
+            raise StopAsyncIteration
+        return change
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class EventBus:
+    """Fans property changes out to subscriptions."""
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+
+    def subscribe(
+        self,
+        types: Optional[Sequence[Type[Entity]]] = None,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> Subscription:
+        subscription = Subscription(self, types, maxsize, overflow)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def publish(self, change: PropertyChange):
+        for subscription in list(self.subscriptions):
+            subscription.publish(change)
+
+    def close(self):
+        for subscription in list(self.subscriptions):
+            subscription.close()
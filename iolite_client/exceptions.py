@@ -8,3 +8,13 @@ class UnsupportedDeviceError(IOLiteError):
         self.identifier = identifier
         self.payload = payload
         super().__init__(f"Unsupported device with type_name {type_name} encountered")
+
+
+class SessionClosedError(IOLiteError):
+    pass
+
+
+class RequestTimeoutError(IOLiteError):
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        super().__init__(f"No response received for request {request_id}")
@@ -0,0 +1,465 @@
+import asyncio
+import itertools
+import json
+import logging
+import random
+import secrets
+from base64 import b64encode
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiohttp import WSMsgType, web
+
+from iolite_client.model_event import OBJECT_QUERY_PATTERN
+from iolite_client.request_handler import ClassMap
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FakeHome:
+    """The entities of a home served by the FakeIOLiteServer, as iolite payloads."""
+
+    sid: str
+    rooms: List[dict] = field(default_factory=list)
+    devices: List[dict] = field(default_factory=list)
+    heatings: List[dict] = field(default_factory=list)
+
+    @classmethod
+    def synthetic(
+        cls, sid: str, rooms: int = 5, devices_per_room: int = 4
+    ) -> "FakeHome":
+        """
+        Create a home of arbitrary size, cycling through the supported device types.
+
+        :param sid: The session ID of the home
+        :param rooms: The number of rooms
+        :param devices_per_room: The number of devices in each room
+        :return: The home
+        """
+        home = cls(sid)
+        device_ids = itertools.count()
+        for room_number in range(rooms):
+            room_id = f"{sid}-room-{room_number}"
+            home.rooms.append(
+                {"class": "Room", "id": room_id, "placeName": f"Room {room_number}"}
+            )
+            home.heatings.append(
+                {
+                    "id": room_id,
+                    "name": f"Room {room_number}",
+                    "currentTemperature": 20.0,
+                    "targetTemperature": 21.0,
+                    "windowOpen": False,
+                }
+            )
+            for slot in range(devices_per_room):
+                device_id = f"{sid}-device-{next(device_ids)}"
+                home.devices.append(_synthetic_device(device_id, room_id, slot))
+
+        return home
+
+    def find_device(self, identifier: str) -> Optional[dict]:
+        for device in self.devices:
+            if device["id"] == identifier:
+                return device
+        return None
+
+
+def _synthetic_device(identifier: str, room_id: str, slot: int) -> dict:
+    device: Dict[str, Any] = {
+        "class": "Device",
+        "id": identifier,
+        "friendlyName": f"Device {identifier}",
+        "placeIdentifier": room_id,
+        "manufacturer": "IOLITE GmbH",
+    }
+    kind = slot % 3
+    if kind == 0:
+        device["typeName"] = "Heater"
+        device["properties"] = [
+            {"name": "currentEnvironmentTemperature", "value": 20.5},
+            {"name": "batteryLevel", "value": 90},
+            {"name": "heatingMode", "value": "WINDOW_OPEN"},
+            {"name": "valvePosition", "value": 10},
+            {"name": "heatingTemperatureSetting", "value": 21.0},
+        ]
+    elif kind == 1:
+        device["typeName"] = "Blind"
+        device["properties"] = [{"name": "blindLevel", "value": 0}]
+    else:
+        device["typeName"] = "HumiditySensor"
+        device["properties"] = [
+            {"name": "currentEnvironmentTemperature", "value": 20.5},
+            {"name": "humidityLevel", "value": 45},
+        ]
+    return device
+
+
+@dataclass
+class Faults:
+    """Latency and faults injected by the FakeIOLiteServer.
+
+    :param latency: The delay before each response in seconds
+    :param jitter: Up to this many seconds are added to the latency at random
+    :param drop_rate: The fraction of requests left unanswered (0 to 1)
+    :param disconnect_after: Close application connections after this many frames
+    :param reject_rate: The fraction of WebSocket handshakes rejected (0 to 1)
+    :param seed: Seeds the random faults to make runs repeatable
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    drop_rate: float = 0.0
+    disconnect_after: Optional[int] = None
+    reject_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class FakeIOLiteServer:
+    """A local stand-in for the iolite remote API, for offline tests and benchmarks.
+
+    Serves the application bus, the heating WebSocket, the heating interval API and
+    the OAuth endpoints for any number of homes, e.g.::
+
+        async with FakeIOLiteServer([FakeHome.synthetic("sid")], "user", "pass") as server:
+            client = Client("sid", "user", "pass")
+            client.BASE_URL = server.ws_url
+            await client.async_discover()
+
+    Action requests update the served device and are announced to the connection's
+    device subscription with a ModelEventResponse, like the real API does.
+    """
+
+    def __init__(
+        self,
+        homes: Iterable[FakeHome],
+        username: str,
+        password: str,
+        faults: Optional[Faults] = None,
+        keepalive_interval: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        :param homes: The homes to serve, keyed by their SID
+        :param username: The username of the basic auth every request must carry
+        :param password: The password of the basic auth every request must carry
+        :param faults: The latency and faults to inject
+        :param keepalive_interval: Send KeepAliveRequests this often in seconds
+        :param host: The host to listen on
+        :param port: The port to listen on, 0 picks a free one
+        """
+        self.homes: Dict[str, FakeHome] = {home.sid: home for home in homes}
+        self.faults = faults or Faults()
+        self.keepalive_interval = keepalive_interval
+        self.host = host
+        self.port = port
+        self.received: Dict[str, int] = {}
+        self.connections = 0
+        self.access_tokens: Dict[str, str] = {}
+        self._authorization = "Basic " + b64encode(
+            f"{username}:{password}".encode()
+        ).decode("ascii")
+        self._random = random.Random(self.faults.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._sockets: List[web.WebSocketResponse] = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def __aenter__(self) -> "FakeIOLiteServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/bus/websocket/application/json", self._application)
+        app.router.add_get("/heating/ws", self._heating)
+        app.router.add_put("/heating/api/heating/{room_id}", self._put_heating)
+        app.router.add_post(
+            "/heating/api/heating/{room_id}/intervals", self._add_interval
+        )
+        app.router.add_delete(
+            "/heating/api/heating/{room_id}/intervals/{interval_id}",
+            self._delete_interval,
+        )
+        app.router.add_post("/ui/token", self._token)
+        app.router.add_get("/ui/sid", self._sid)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = self._runner.addresses[0][1]
+        logger.info(f"Fake iolite server listening on {self.base_url}")
+
+    async def stop(self):
+        for websocket in list(self._sockets):
+            await websocket.close()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def disconnect_all(self):
+        """Close every open WebSocket, e.g. to exercise reconnects."""
+        for websocket in list(self._sockets):
+            await websocket.close()
+
+    def _authorize(self, request: web.Request) -> FakeHome:
+        if request.headers.get("Authorization") != self._authorization:
+            raise web.HTTPUnauthorized()
+
+        home = self.homes.get(request.query.get("SID", ""))
+        if home is None:
+            raise web.HTTPForbidden()
+
+        return home
+
+    async def _open_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        if self._random.random() < self.faults.reject_rate:
+            raise web.HTTPServiceUnavailable()
+
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.connections += 1
+        self._sockets.append(websocket)
+        return websocket
+
+    async def _application(self, request: web.Request) -> web.WebSocketResponse:
+        home = self._authorize(request)
+        websocket = await self._open_websocket(request)
+        session = _ApplicationSession(self, home, websocket)
+        try:
+            await session.run()
+        finally:
+            self._sockets.remove(websocket)
+        return websocket
+
+    async def _heating(self, request: web.Request) -> web.WebSocketResponse:
+        home = self._authorize(request)
+        websocket = await self._open_websocket(request)
+        try:
+            await self._delay()
+            await websocket.send_str(json.dumps(home.heatings))
+            async for _ in websocket:
+                pass
+        finally:
+            self._sockets.remove(websocket)
+        return websocket
+
+    async def _put_heating(self, request: web.Request) -> web.Response:
+        home = self._authorize(request)
+        heating = self._find_heating(home, request.match_info["room_id"])
+        payload = await request.json()
+        heating["comfortTemperature"] = payload["comfortTemperature"]
+        await self._delay()
+        return web.json_response(heating)
+
+    async def _add_interval(self, request: web.Request) -> web.Response:
+        home = self._authorize(request)
+        heating = self._find_heating(home, request.match_info["room_id"])
+        interval = await request.json()
+        interval["id"] = secrets.token_hex(8)
+        heating.setdefault("intervals", []).append(interval)
+        await self._delay()
+        return web.json_response(interval)
+
+    async def _delete_interval(self, request: web.Request) -> web.Response:
+        home = self._authorize(request)
+        heating = self._find_heating(home, request.match_info["room_id"])
+        interval_id = request.match_info["interval_id"]
+        intervals = heating.get("intervals", [])
+        heating["intervals"] = [i for i in intervals if i["id"] != interval_id]
+        await self._delay()
+        return web.json_response({})
+
+    async def _token(self, request: web.Request) -> web.Response:
+        if request.headers.get("Authorization") != self._authorization:
+            raise web.HTTPUnauthorized()
+
+        grant_type = request.query.get("grant_type")
+        if grant_type == "refresh_token":
+            sid = self.access_tokens.get(request.query.get("refresh_token", ""))
+        else:
+            sid = next(iter(self.homes), None)
+        if sid is None:
+            raise web.HTTPBadRequest()
+
+        access_token = secrets.token_hex(16)
+        refresh_token = secrets.token_hex(16)
+        self.access_tokens[access_token] = sid
+        self.access_tokens[refresh_token] = sid
+        return web.json_response(
+            {
+                "access_token": access_token,
+                "refresh_token": refresh_token,
+                "token_type": "bearer",
+                "expires_in": 3600,
+            }
+        )
+
+    async def _sid(self, request: web.Request) -> web.Response:
+        if request.headers.get("Authorization") != self._authorization:
+            raise web.HTTPUnauthorized()
+
+        sid = self.access_tokens.get(request.query.get("access_token", ""))
+        if sid is None:
+            raise web.HTTPUnauthorized()
+
+        return web.json_response({"SID": sid})
+
+    @staticmethod
+    def _find_heating(home: FakeHome, room_id: str) -> dict:
+        for heating in home.heatings:
+            if heating["id"] == room_id:
+                return heating
+        raise web.HTTPNotFound()
+
+    async def _delay(self):
+        delay = self.faults.latency + self._random.uniform(0, self.faults.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _should_drop(self) -> bool:
+        return self._random.random() < self.faults.drop_rate
+
+
+class _ApplicationSession:
+    """One connection to the application bus of the FakeIOLiteServer."""
+
+    def __init__(
+        self, server: FakeIOLiteServer, home: FakeHome, websocket: web.WebSocketResponse
+    ):
+        self.server = server
+        self.home = home
+        self.websocket = websocket
+        self.device_subscription: Optional[str] = None
+        self._responses: List[asyncio.Task] = []
+
+    async def run(self):
+        keepalive = None
+        if self.server.keepalive_interval:
+            keepalive = asyncio.create_task(self._keepalive())
+
+        frames = 0
+        try:
+            async for message in self.websocket:
+                if message.type != WSMsgType.TEXT:
+                    continue
+
+                frames += 1
+                self._handle(message.data)
+
+                disconnect_after = self.server.faults.disconnect_after
+                if disconnect_after is not None and frames >= disconnect_after:
+                    break
+        finally:
+            if keepalive:
+                keepalive.cancel()
+            for response in self._responses:
+                response.cancel()
+            await self.websocket.close()
+
+    def _handle(self, data: str):
+        try:
+            request = json.loads(data)
+        except ValueError:
+            # The client's plain "keep_alive" frames
+            request = {"class": data}
+
+        request_class = request.get("class", "")
+        received = self.server.received
+        received[request_class] = received.get(request_class, 0) + 1
+
+        responses = self._respond(request)
+        if responses and not self.server._should_drop():
+            task = asyncio.create_task(self._send(responses))
+            self._responses.append(task)
+            task.add_done_callback(self._responses.remove)
+
+    def _respond(self, request: dict) -> List[dict]:
+        request_class = request.get("class")
+        request_id = request.get("requestID")
+
+        if request_class == ClassMap.SubscribeRequest.value:
+            object_query = request.get("objectQuery")
+            if object_query == "places":
+                initial_values = self.home.rooms
+            elif object_query == "devices":
+                initial_values = self.home.devices
+                self.device_subscription = request_id
+            else:
+                initial_values = []
+            return [
+                {
+                    "class": ClassMap.SubscribeSuccess.value,
+                    "requestID": request_id,
+                    "initialValues": initial_values,
+                }
+            ]
+
+        if request_class == ClassMap.QueryRequest.value:
+            return [{"class": ClassMap.QuerySuccess.value, "requestID": request_id}]
+
+        if request_class == ClassMap.ActionRequest.value:
+            return self._apply_action(request)
+
+        return []
+
+    def _apply_action(self, request: dict) -> List[dict]:
+        request_id = request.get("requestID")
+        match = OBJECT_QUERY_PATTERN.match(request.get("objectQuery", ""))
+        device = self.home.find_device(match.group("identifier")) if match else None
+        if not match or not device:
+            return [{"class": "ActionFailed", "requestID": request_id}]
+
+        property_name = match.group("property")
+        value = request["parameters"][0]["value"]
+        for device_property in device.setdefault("properties", []):
+            if device_property["name"] == property_name:
+                device_property["value"] = value
+                break
+        else:
+            device["properties"].append({"name": property_name, "value": value})
+
+        responses = [{"class": ClassMap.ActionSuccess.value, "requestID": request_id}]
+        if self.device_subscription:
+            responses.append(
+                {
+                    "class": ClassMap.ModelEventResponse.value,
+                    "requestID": self.device_subscription,
+                    "events": [
+                        {
+                            "class": "PropertyChanged",
+                            "objectQuery": request["objectQuery"],
+                            "propertyName": "value",
+                            "value": value,
+                        }
+                    ],
+                }
+            )
+        return responses
+
+    async def _send(self, responses: List[dict]):
+        await self.server._delay()
+        for response in responses:
+            if self.websocket.closed:
+                return
+            await self.websocket.send_str(json.dumps(response))
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.server.keepalive_interval or 0)
+            await self.websocket.send_str(
+                json.dumps({"class": ClassMap.KeepAliveRequest.value})
+            )
@@ -1,10 +1,13 @@
 from base64 import b64encode
 from enum import IntEnum
-from typing import Tuple
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
 
 from iolite_client.exceptions import IOLiteError
+from iolite_client.outbound import OutboundScheduler, Priority
+from iolite_client.tracing import Tracer
 
 
 class Temperature:
@@ -47,6 +50,9 @@ class HeatingScheduler(object):
         password: str,
         room_id: str,
         verify_ssl: bool = True,
+        outbound: Optional[OutboundScheduler] = None,
+        priority: Priority = Priority.BULK,
+        tracer: Optional[Tracer] = None,
     ):
         """The HeatingScheduler comprises methods to interact with the heating interval API.
 
@@ -55,16 +61,25 @@ class HeatingScheduler(object):
         :param password: The password mathing the username, used for authentication
         :param room_id: The room to set or change the heating intervals for.
         :param verify_ssl: Whether to verify the SSL certificate
+        :param outbound: Rate limits the API calls, e.g. shared with the home's Client
+        :param priority: The priority of the API calls when rate limited
+        :param tracer: Receives a span per API call
         """
         self.sid = sid
         self.username = username
         self.password = password
         self.room_id = room_id
         self.verify_ssl = verify_ssl
+        self.outbound = outbound
+        self.priority = priority
+        self.tracer = tracer or Tracer()
         user_pass = f"{self.username}:{self.password}"
         self.auth_value = b64encode(user_pass.encode()).decode("ascii")
 
     def _prepare_request_arguments(self) -> Tuple[str, dict]:
+        if self.outbound:
+            self.outbound.acquire_blocking(self.priority)
+
         url = f"{self.BASE_URL}{self.HEATING_ENDPOINT}{self.room_id}"
         headers = {"Authorization": f"Basic {self.auth_value}"}
         params = {"SID": self.sid}
@@ -89,9 +104,9 @@ class HeatingScheduler(object):
                 f"{Temperature.BASE_TEMP} and {Temperature.MAX_TEMP} degrees celsius."
             )
         url, params = self._prepare_request_arguments()
-        response = requests.put(url, json={"comfortTemperature": temperature}, **params)
-        response.raise_for_status()
-        return response
+        return self._request(
+            "PUT", url, json={"comfortTemperature": temperature}, **params
+        )
 
     def add_interval(
         self, day: Day, hour: int, minute: int, duration: int
@@ -105,7 +120,8 @@ class HeatingScheduler(object):
         :return: The API response, including the new interval's iolite ID
         """
         url, params = self._prepare_request_arguments()
-        response = requests.post(
+        return self._request(
+            "POST",
             url + "/intervals",
             json={
                 "startTimeInMinutes": day.value + hour * 60 + minute,
@@ -113,8 +129,6 @@ class HeatingScheduler(object):
             },
             **params,
         )
-        response.raise_for_status()
-        return response
 
     def delete_interval(self, interval_id: str) -> requests.Response:
         """Deletes the given interval
@@ -123,6 +137,12 @@ class HeatingScheduler(object):
         :return: The API response
         """
         url, params = self._prepare_request_arguments()
-        response = requests.delete(url + f"/intervals/{interval_id}", **params)
-        response.raise_for_status()
-        return response
+        return self._request("DELETE", url + f"/intervals/{interval_id}", **params)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        attributes = {"http.request.method": method, "url.path": urlsplit(url).path}
+        with self.tracer.span("iolite.heating_api", attributes) as span:
+            response = requests.request(method, url, **kwargs)
+            span.set_attribute("http.response.status_code", response.status_code)
+            response.raise_for_status()
+            return response
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopThread:
+    """Runs an asyncio event loop in a dedicated daemon thread.
+
+    Coroutines can be submitted from any thread and all run on the same loop, so
+    connections opened on it can be shared between callers.
+    """
+
+    def __init__(self, name: str = "iolite-client"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the loop thread, if not already running."""
+        with self._lock:
+            if self.is_running:
+                return
+
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+
+            self.loop = loop
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+            logger.debug(f"Started event loop thread {self.name}")
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """
+        Schedule a coroutine on the loop from any thread.
+
+        :param coroutine: The coroutine to run
+        :return: A concurrent future for its result
+        """
+        if not self.is_running or self.loop is None:
+            coroutine.close()
+            raise RuntimeError("Event loop thread is not running")
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and block until it has finished.
+
+        :param coroutine: The coroutine to run
+        :param timeout: The maximum time to wait in seconds
+        :return: The result of the coroutine
+        """
+        if self.loop is not None and threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("Cannot block on the event loop thread itself")
+
+        return self.submit(coroutine).result(timeout)
+
+    def stop(self):
+        """Stop the loop and wait for its thread to finish."""
+        with self._lock:
+            thread, loop = self._thread, self.loop
+            if thread is None or loop is None:
+                return
+
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            self._thread = None
+            self.loop = None
+            logger.debug(f"Stopped event loop thread {self.name}")
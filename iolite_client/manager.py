@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from iolite_client.client import ActionResult, Client
+from iolite_client.entity import Device, Room
+
+logger = logging.getLogger(__name__)
+
+HomeCredentials = Tuple[str, str, str]
+
+
+class ClientManager:
+    """Manages the clients of many homes on a single event loop.
+
+    Homes are keyed by their SID. All connections share one limiter so no more
+    than `max_concurrent_handshakes` WebSocket handshakes are in flight at once.
+    """
+
+    def __init__(
+        self,
+        homes: Iterable[HomeCredentials],
+        max_concurrent_handshakes: int = 10,
+        client_factory: Callable[[str, str, str], Client] = Client,
+    ):
+        """
+        :param homes: The (sid, username, password) tuples of the homes to manage
+        :param max_concurrent_handshakes: The cap on concurrent connection handshakes
+        :param client_factory: Creates the client of a home, e.g. to pass options
+        """
+        if max_concurrent_handshakes < 1:
+            raise ValueError("max_concurrent_handshakes must be at least 1")
+
+        self.max_concurrent_handshakes = max_concurrent_handshakes
+        self.client_factory = client_factory
+        self.clients: Dict[str, Client] = {}
+        self._handshake_limiter: Optional[asyncio.Semaphore] = None
+        for home in homes:
+            self.add_home(*home)
+
+    async def __aenter__(self) -> "ClientManager":
+        await self.async_connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.async_close()
+
+    def add_home(self, sid: str, username: str, password: str) -> Client:
+        """
+        Add a home to manage.
+
+        :param sid: The session ID of the home
+        :param username: The username of the home
+        :param password: The password of the home
+        :return: The client of the home
+        """
+        if sid in self.clients:
+            raise ValueError(f"Home {sid} is already managed")
+
+        client = self.client_factory(sid, username, password)
+        client.handshake_limiter = self._handshake_limiter
+        self.clients[sid] = client
+        return client
+
+    def get_client(self, sid: str) -> Client:
+        return self.clients[sid]
+
+    async def async_connect(self) -> Dict[str, Optional[BaseException]]:
+        """Open the persistent session of every home.
+
+        :return: Per SID, the error the session failed to open with or None
+        """
+        return await self._for_each(lambda client: client.async_connect())
+
+    async def async_close(self) -> Dict[str, Optional[BaseException]]:
+        """Close the session of every home.
+
+        :return: Per SID, the error the session failed to close with or None
+        """
+        return await self._for_each(lambda client: client.async_close())
+
+    async def async_discover(self) -> Dict[str, Optional[BaseException]]:
+        """Run discovery for every home concurrently.
+
+        :return: Per SID, the error discovery failed with or None
+        """
+        return await self._for_each(lambda client: client.async_discover())
+
+    async def async_set_properties(
+        self, updates: Mapping[str, Sequence[Tuple[str, str, float]]]
+    ) -> Dict[str, List[ActionResult]]:
+        """
+        Fan property updates out to many homes concurrently.
+
+        :param updates: Per SID, the (device_id, property, value) tuples to apply
+        :return: Per SID, one ActionResult per update
+        """
+        self._ensure_limiter()
+        sids = list(updates)
+        results = await asyncio.gather(
+            *(self.clients[sid].async_set_properties(updates[sid]) for sid in sids)
+        )
+        return dict(zip(sids, results))
+
+    def get_rooms(self) -> Iterator[Tuple[str, Room]]:
+        """Yields the (sid, room) pairs of every discovered room."""
+        for sid, client in self.clients.items():
+            for room in client.discovered.get_rooms():
+                yield sid, room
+
+    def find_device_by_identifier(
+        self, identifier: str
+    ) -> Optional[Tuple[str, Device]]:
+        """Find a device by identifier across all homes.
+
+        :param identifier: The identifier of the device
+        :return: The (sid, device) pair or None
+        """
+        for sid, client in self.clients.items():
+            device = client.discovered.find_device_by_identifier(identifier)
+            if device:
+                return sid, device
+
+        return None
+
+    async def _for_each(self, action) -> Dict[str, Optional[BaseException]]:
+        self._ensure_limiter()
+        sids = list(self.clients)
+        results = await asyncio.gather(
+            *(action(self.clients[sid]) for sid in sids), return_exceptions=True
+        )
+
+        errors: Dict[str, Optional[BaseException]] = {}
+        for sid, result in zip(sids, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Home {sid} failed - {result!r}")
+                errors[sid] = result
+            else:
+                errors[sid] = None
+
+        return errors
+
+    def _ensure_limiter(self):
+        # Created lazily so it belongs to the loop the manager runs on
+        if self._handshake_limiter is None:
+            self._handshake_limiter = asyncio.Semaphore(self.max_concurrent_handshakes)
+            for client in self.clients.values():
+                client.handshake_limiter = self._handshake_limiter
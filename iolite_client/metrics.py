@@ -0,0 +1,209 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+
+class Metrics:
+    """Receives measurements of client operations.
+
+    The default implementation discards everything, subclass it to forward the
+    measurements elsewhere. Durations are in seconds. Hooks are called on the
+    event loop and must not block.
+    """
+
+    def frame_received(self, endpoint: str):
+        """A frame arrived on the "application" or "heating" WebSocket."""
+
+    def frame_sent(self, endpoint: str):
+        """A frame was sent on the "application" WebSocket."""
+
+    def observe_decode(self, seconds: float):
+        """A frame was decoded."""
+
+    def observe_handler(self, response_class: str, seconds: float):
+        """A response of the given class was handled."""
+
+    def observe_action_latency(self, seconds: float):
+        """An ActionRequest was answered, timed from sending it."""
+
+    def set_in_flight(self, requests: int):
+        """The number of requests waiting for a response changed."""
+
+    def observe_keepalive_latency(self, seconds: float):
+        """A KeepAliveRequest was answered, timed from receiving it."""
+
+    def reconnected(self):
+        """A dropped session was re-established."""
+
+    def observe_discovery(self, seconds: float):
+        """Discovery finished."""
+
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class PrometheusMetrics(Metrics):
+    """Collects the measurements in memory and renders them in the Prometheus text
+    exposition format, e.g. to serve from a `/metrics` endpoint.
+    """
+
+    PREFIX = "iolite_client"
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        :param buckets: The upper bounds of the histogram buckets in seconds
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        # Rendering may happen on another thread than the event loop
+        self._lock = threading.Lock()
+
+        self._describe("frames_received_total", "Frames received per endpoint.")
+        self._describe("frames_sent_total", "Frames sent per endpoint.")
+        self._describe("decode_seconds", "Time spent decoding frames.")
+        self._describe("handler_seconds", "Time spent handling responses per class.")
+        self._describe(
+            "action_round_trip_seconds", "Time from ActionRequest to ActionSuccess."
+        )
+        self._describe("requests_in_flight", "Requests waiting for a response.")
+        self._describe("keepalive_seconds", "Time taken to answer KeepAliveRequests.")
+        self._describe("reconnects_total", "Re-established sessions.")
+        self._describe("discovery_seconds", "Duration of discoveries.")
+
+    def frame_received(self, endpoint: str):
+        self._increment("frames_received_total", (("endpoint", endpoint),))
+
+    def frame_sent(self, endpoint: str):
+        self._increment("frames_sent_total", (("endpoint", endpoint),))
+
+    def observe_decode(self, seconds: float):
+        self._observe("decode_seconds", (), seconds)
+
+    def observe_handler(self, response_class: str, seconds: float):
+        self._observe("handler_seconds", (("class", response_class),), seconds)
+
+    def observe_action_latency(self, seconds: float):
+        self._observe("action_round_trip_seconds", (), seconds)
+
+    def set_in_flight(self, requests: int):
+        with self._lock:
+            self._gauges.setdefault("requests_in_flight", {})[()] = requests
+
+    def observe_keepalive_latency(self, seconds: float):
+        self._observe("keepalive_seconds", (), seconds)
+
+    def reconnected(self):
+        self._increment("reconnects_total", ())
+
+    def observe_discovery(self, seconds: float):
+        self._observe("discovery_seconds", (), seconds)
+
+    def render(self) -> str:
+        """Render every collected metric in the Prometheus text format."""
+        lines: List[str] = []
+        with self._lock:
+            for kind, metrics in (
+                ("counter", self._counters),
+                ("gauge", self._gauges),
+            ):
+                for name, series in sorted(metrics.items()):
+                    self._render_header(lines, name, kind)
+                    for labels, value in sorted(series.items()):
+                        lines.append(f"{self._name(name)}{_labels(labels)} {value}")
+
+            for name, histograms in sorted(self._histograms.items()):
+                self._render_header(lines, name, "histogram")
+                for labels, histogram in sorted(histograms.items()):
+                    self._render_histogram(lines, name, labels, histogram)
+
+        return "\n".join(lines) + "\n"
+
+    def _describe(self, name: str, description: str):
+        self._help[name] = description
+
+    def _increment(self, name: str, labels: Labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + 1
+
+    def _observe(self, name: str, labels: Labels, value: float):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def _name(self, name: str) -> str:
+        return f"{self.PREFIX}_{name}"
+
+    def _render_header(self, lines: List[str], name: str, kind: str):
+        lines.append(f"# HELP {self._name(name)} {self._help.get(name, name)}")
+        lines.append(f"# TYPE {self._name(name)} {kind}")
+
+    def _render_histogram(
+        self, lines: List[str], name: str, labels: Labels, histogram: _Histogram
+    ):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            bucket_labels = labels + (("le", _format(bound)),)
+            lines.append(
+                f"{self._name(name)}_bucket{_labels(bucket_labels)} {cumulative}"
+            )
+        lines.append(
+            f"{self._name(name)}_bucket{_labels(labels + (('le', '+Inf'),))} "
+            f"{histogram.count}"
+        )
+        lines.append(f"{self._name(name)}_sum{_labels(labels)} {histogram.sum}")
+        lines.append(f"{self._name(name)}_count{_labels(labels)} {histogram.count}")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    return repr(float(value))
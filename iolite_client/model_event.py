@@ -0,0 +1,99 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from iolite_client.entity import Entity
+
+OBJECT_QUERY_PATTERN = re.compile(
+    r"^(?P<collection>devices|places)\[id='(?P<identifier>[^']+)'\]"
+    r"/properties\[name='(?P<property>[^']+)'\]"
+)
+# Events on a whole device or place, e.g. one being added, removed or renamed
+TOPOLOGY_QUERY_PATTERN = re.compile(r"^(devices|places)(\[id='[^']+'\])?$")
+
+# Maps iolite property names onto the attributes of the entities in `entity`
+DEVICE_PROPERTY_ATTRIBUTES = {
+    "currentEnvironmentTemperature": "current_env_temp",
+    "batteryLevel": "battery_level",
+    "heatingMode": "heating_mode",
+    "valvePosition": "valve_position",
+    "heatingTemperatureSetting": "heating_temperature_setting",
+    "deviceStatus": "device_status",
+    "blindLevel": "blind_level",
+    "humidityLevel": "humidity_level",
+}
+
+HEATING_PROPERTY_ATTRIBUTES = {
+    "currentTemperature": "current_temp",
+    "targetTemperature": "target_temp",
+    "windowOpen": "window_open",
+}
+
+
+@dataclass
+class PropertyUpdate:
+    """A new property value announced by a model event."""
+
+    collection: str
+    identifier: str
+    property: str
+    value: Any
+    timestamp: Optional[int] = None
+
+
+@dataclass
+class PropertyChange:
+    """A property update that was applied to a discovered entity."""
+
+    identifier: str
+    property: str
+    attribute: str
+    old_value: Any
+    new_value: Any
+    timestamp: Optional[int] = None
+    entity: Optional[Entity] = field(default=None, compare=False, repr=False)
+
+
+def parse_model_event(payload: dict) -> List[PropertyUpdate]:
+    """
+    Extract the property value updates from a ModelEventResponse.
+
+    Events that do not target a device or place property value are ignored.
+
+    :param payload: The decoded ModelEventResponse
+    :return: The updates in the order they were received
+    """
+    updates = []
+    for event in payload.get("events", []):
+        if event.get("propertyName", "value") != "value":
+            continue
+
+        match = OBJECT_QUERY_PATTERN.match(event.get("objectQuery", ""))
+        if not match or "value" not in event:
+            continue
+
+        updates.append(
+            PropertyUpdate(
+                match.group("collection"),
+                match.group("identifier"),
+                match.group("property"),
+                event["value"],
+                event.get("timestamp"),
+            )
+        )
+
+    return updates
+
+
+def changes_topology(payload: dict) -> bool:
+    """
+    Whether a ModelEventResponse adds, removes or changes devices or places
+    themselves rather than only the values of their properties.
+
+    :param payload: The decoded ModelEventResponse
+    :return: True if a discovery would be outdated by the event
+    """
+    return any(
+        TOPOLOGY_QUERY_PATTERN.match(event.get("objectQuery", ""))
+        for event in payload.get("events", [])
+    )
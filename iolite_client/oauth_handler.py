@@ -8,6 +8,8 @@ from urllib.parse import urlencode
 import aiohttp
 import requests
 
+from iolite_client.tracing import Tracer
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://remote.iolite.de"
@@ -59,11 +61,15 @@ class OAuthHandler:
         password: str,
         client_id: str = CLIENT_ID,
         verify_ssl: bool = True,
+        base_url: str = BASE_URL,
+        tracer: Optional[Tracer] = None,
     ):
         self.username = username
         self.password = password
         self.client_id = client_id
         self.verify_ssl = verify_ssl
+        self.base_url = base_url
+        self.tracer = tracer or Tracer()
 
     def get_access_token(self, code: str, name: str) -> dict:
         """
@@ -73,12 +79,13 @@ class OAuthHandler:
         :return:
         """
         query = OAuthHandlerHelper.get_access_token_query(code, name, self.client_id)
-        response = requests.post(
-            f"{BASE_URL}/ui/token?{query}",
-            auth=(self.username, self.password),
-            verify=self.verify_ssl,
-        )
-        response.raise_for_status()
+        with self.tracer.span("iolite.oauth.token"):
+            response = requests.post(
+                f"{self.base_url}/ui/token?{query}",
+                auth=(self.username, self.password),
+                verify=self.verify_ssl,
+            )
+            response.raise_for_status()
         return OAuthHandlerHelper.add_expires_at(json.loads(response.text))
 
     def get_new_access_token(self, refresh_token: str) -> dict:
@@ -90,12 +97,13 @@ class OAuthHandler:
         query = OAuthHandlerHelper.get_new_access_token_query(
             refresh_token, self.client_id
         )
-        response = requests.post(
-            f"{BASE_URL}/ui/token?{query}",
-            auth=(self.username, self.password),
-            verify=self.verify_ssl,
-        )
-        response.raise_for_status()
+        with self.tracer.span("iolite.oauth.refresh"):
+            response = requests.post(
+                f"{self.base_url}/ui/token?{query}",
+                auth=(self.username, self.password),
+                verify=self.verify_ssl,
+            )
+            response.raise_for_status()
         return OAuthHandlerHelper.add_expires_at(json.loads(response.text))
 
     def get_sid(self, access_token: str) -> str:
@@ -105,12 +113,13 @@ class OAuthHandler:
         :return: SID
         """
         query = OAuthHandlerHelper.get_sid_query(access_token)
-        response = requests.get(
-            f"{BASE_URL}/ui/sid?{query}",
-            auth=(self.username, self.password),
-            verify=self.verify_ssl,
-        )
-        response.raise_for_status()
+        with self.tracer.span("iolite.oauth.sid"):
+            response = requests.get(
+                f"{self.base_url}/ui/sid?{query}",
+                auth=(self.username, self.password),
+                verify=self.verify_ssl,
+            )
+            response.raise_for_status()
         return json.loads(response.text).get("SID")
 
 
@@ -122,12 +131,16 @@ class AsyncOAuthHandler:
         web_session: aiohttp.ClientSession,
         client_id: str = CLIENT_ID,
         verify_ssl: bool = True,
+        base_url: str = BASE_URL,
+        tracer: Optional[Tracer] = None,
     ):
         self.username = username
         self.password = password
         self.web_session = web_session
         self.client_id = client_id
         self.verify_ssl = verify_ssl
+        self.base_url = base_url
+        self.tracer = tracer or Tracer()
 
     async def get_access_token(self, code: str, name: str) -> dict:
         """
@@ -137,13 +150,14 @@ class AsyncOAuthHandler:
         :return:
         """
         query = OAuthHandlerHelper.get_access_token_query(code, name, self.client_id)
-        response = await self.web_session.post(
-            f"{BASE_URL}/ui/token?{query}",
-            auth=aiohttp.BasicAuth(self.username, self.password),
-            ssl=self.verify_ssl,
-        )
-        response.raise_for_status()
-        return OAuthHandlerHelper.add_expires_at(await response.json())
+        with self.tracer.span("iolite.oauth.token"):
+            response = await self.web_session.post(
+                f"{self.base_url}/ui/token?{query}",
+                auth=aiohttp.BasicAuth(self.username, self.password),
+                ssl=self.verify_ssl,
+            )
+            response.raise_for_status()
+            return OAuthHandlerHelper.add_expires_at(await response.json())
 
     async def get_new_access_token(self, refresh_token: str) -> dict:
         """
@@ -154,13 +168,14 @@ class AsyncOAuthHandler:
         query = OAuthHandlerHelper.get_new_access_token_query(
             refresh_token, self.client_id
         )
-        response = await self.web_session.post(
-            f"{BASE_URL}/ui/token?{query}",
-            auth=aiohttp.BasicAuth(self.username, self.password),
-            ssl=self.verify_ssl,
-        )
-        response.raise_for_status()
-        return OAuthHandlerHelper.add_expires_at(await response.json())
+        with self.tracer.span("iolite.oauth.refresh"):
+            response = await self.web_session.post(
+                f"{self.base_url}/ui/token?{query}",
+                auth=aiohttp.BasicAuth(self.username, self.password),
+                ssl=self.verify_ssl,
+            )
+            response.raise_for_status()
+            return OAuthHandlerHelper.add_expires_at(await response.json())
 
     async def get_sid(self, access_token: str) -> str:
         """
@@ -169,13 +184,14 @@ class AsyncOAuthHandler:
         :return: SID
         """
         query = OAuthHandlerHelper.get_sid_query(access_token)
-        response = await self.web_session.get(
-            f"{BASE_URL}/ui/sid?{query}",
-            auth=aiohttp.BasicAuth(self.username, self.password),
-            ssl=self.verify_ssl,
-        )
-        response.raise_for_status()
-        response_json = await response.json()
+        with self.tracer.span("iolite.oauth.sid"):
+            response = await self.web_session.get(
+                f"{self.base_url}/ui/sid?{query}",
+                auth=aiohttp.BasicAuth(self.username, self.password),
+                ssl=self.verify_ssl,
+            )
+            response.raise_for_status()
+            response_json = await response.json()
         return response_json.get("SID")
 
 
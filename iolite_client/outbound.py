@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    """Priority classes of outgoing requests, lower is served first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of `capacity`."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param rate: The tokens added per second
+        :param capacity: The maximum number of tokens
+        :param clock: Returns the current time in seconds
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self._updated = clock()
+        # Shared with synchronous callers such as the HeatingScheduler
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available."""
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+
+            self.tokens -= 1
+            return True
+
+    def delay(self) -> float:
+        """The time until the next token is available in seconds."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+@dataclass
+class PriorityStats:
+    """Wait-time counters of one priority class."""
+
+    granted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.granted if self.granted else 0.0
+
+    def record(self, wait: float):
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class OutboundScheduler:
+    """Rate limits the outgoing requests of a home, serving interactive ones first.
+
+    Every request takes a token from a shared TokenBucket. Waiting requests are
+    granted tokens in priority order, first come first served within a priority,
+    so interactive commands never queue behind bulk jobs.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: float = 10.0):
+        """
+        :param rate: The requests allowed per second on average
+        :param burst: The requests allowed at once after being idle
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.stats: Dict[Priority, PriorityStats] = {
+            priority: PriorityStats() for priority in Priority
+        }
+        self._depth: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def queue_depth(self, priority: Optional[Priority] = None) -> int:
+        """
+        The number of requests waiting for a token.
+
+        :param priority: Only count this priority, defaults to all of them
+        """
+        if priority is None:
+            return sum(self._depth.values())
+        return self._depth[priority]
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE):
+        """
+        Wait until a request of the given priority may be sent.
+
+        :param priority: The priority class of the request
+        """
+        started = time.monotonic()
+        if not self._waiters and self.bucket.try_acquire():
+            self.stats[priority].record(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._depth[priority] += 1
+        try:
+            self._grant()
+            await future
+        finally:
+            self._depth[priority] -= 1
+
+        self.stats[priority].record(time.monotonic() - started)
+
+    def acquire_blocking(self, priority: Priority = Priority.BULK):
+        """
+        Block the calling thread until a request may be sent, for synchronous APIs.
+
+        Tokens are only taken while no request of a higher priority is waiting.
+
+        :param priority: The priority class of the request
+        """
+        started = time.monotonic()
+        while True:
+            higher_waiting = any(self._depth[p] for p in Priority if p < priority)
+            if not higher_waiting and self.bucket.try_acquire():
+                break
+            time.sleep(max(self.bucket.delay(), 0.01))
+
+        self.stats[priority].record(time.monotonic() - started)
+
+    def _grant(self):
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # Cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+
+            if not self.bucket.try_acquire():
+                break
+
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+
+        if self._waiters and self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.bucket.delay(), self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._grant()
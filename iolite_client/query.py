@@ -0,0 +1,195 @@
+import operator
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from iolite_client.entity import Device, Room
+
+FACETS = ("type", "manufacturer", "model_name", "place_identifier")
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+}
+
+
+def _facet_value(device: Device, facet: str) -> Any:
+    if facet == "type":
+        return device.get_type()
+    return getattr(device, facet)
+
+
+class DeviceIndex:
+    """Secondary indexes of devices by type, manufacturer, model name and room."""
+
+    def __init__(self):
+        self._facets: Dict[str, Dict[Any, Dict[str, Device]]] = {
+            facet: defaultdict(dict) for facet in FACETS
+        }
+
+    def add(self, device: Device):
+        for facet, index in self._facets.items():
+            index[_facet_value(device, facet)][device.identifier] = device
+
+    def remove(self, device: Device):
+        for facet, index in self._facets.items():
+            value = _facet_value(device, facet)
+            devices = index.get(value)
+            if devices is None or devices.get(device.identifier) is not device:
+                continue
+
+            del devices[device.identifier]
+            if not devices:
+                del index[value]
+
+    def get(self, facet: str, value: Any) -> Dict[str, Device]:
+        """
+        :param facet: One of FACETS
+        :param value: The value of the facet
+        :return: The matching devices by identifier, not to be modified
+        """
+        return self._facets[facet].get(value, {})
+
+
+Constraint = Tuple[str, Tuple[Any, ...]]
+# An attribute and a comparison with a bound, or None to only require a value
+Filter = Tuple[str, Optional[Callable[[Any, Any], bool]], Any]
+
+
+class DeviceQuery:
+    """A lazily evaluated query over discovered devices, e.g.::
+
+        low = discovered.query(RadiatorValve).where("battery_level", lt=20)
+        for valve in low:
+            ...
+
+    Every method returns a new query. Type, manufacturer, model name and room
+    constraints are answered from indexes, starting with the most selective; range
+    filters are then applied while iterating. Results reflect the devices at the
+    time of iteration, in no particular order.
+    """
+
+    def __init__(
+        self,
+        devices: Dict[str, Device],
+        index: DeviceIndex,
+        constraints: Tuple[Constraint, ...] = (),
+        filters: Tuple[Filter, ...] = (),
+    ):
+        self._devices = devices
+        self._index = index
+        self._constraints = constraints
+        self._filters = filters
+
+    def _constrain(self, facet: str, values: Tuple[Any, ...]) -> "DeviceQuery":
+        return DeviceQuery(
+            self._devices,
+            self._index,
+            self._constraints + ((facet, values),),
+            self._filters,
+        )
+
+    def of_type(self, *types: Union[str, Type[Device]]) -> "DeviceQuery":
+        """
+        :param types: Device classes or their `get_type()` names
+        :return: A query for devices of any of the given types
+        """
+        return self._constrain(
+            "type",
+            tuple(
+                device_type if isinstance(device_type, str) else device_type.get_type()
+                for device_type in types
+            ),
+        )
+
+    def from_manufacturer(self, *manufacturers: str) -> "DeviceQuery":
+        return self._constrain("manufacturer", manufacturers)
+
+    def with_model(self, *model_names: Optional[str]) -> "DeviceQuery":
+        return self._constrain("model_name", model_names)
+
+    def in_rooms(self, *rooms: Union[str, Room]) -> "DeviceQuery":
+        """
+        :param rooms: Rooms or their identifiers
+        :return: A query for devices placed in any of the given rooms
+        """
+        return self._constrain(
+            "place_identifier",
+            tuple(
+                room.identifier if isinstance(room, Room) else room for room in rooms
+            ),
+        )
+
+    def where(
+        self,
+        attribute: str,
+        lt: Any = None,
+        le: Any = None,
+        gt: Any = None,
+        ge: Any = None,
+    ) -> "DeviceQuery":
+        """
+        Filter on a numeric attribute, excluding devices without a value for it.
+
+        :param attribute: The attribute, e.g. "battery_level"
+        :param lt: Only values less than this
+        :param le: Only values less than or equal to this
+        :param gt: Only values greater than this
+        :param ge: Only values greater than or equal to this
+        :return: The filtered query
+        """
+        bounds = {"lt": lt, "le": le, "gt": gt, "ge": ge}
+        filters: Tuple[Filter, ...] = tuple(
+            (attribute, _COMPARISONS[comparison], bound)
+            for comparison, bound in bounds.items()
+            if bound is not None
+        )
+        if not filters:
+            filters = ((attribute, None, None),)
+        return DeviceQuery(
+            self._devices, self._index, self._constraints, self._filters + filters
+        )
+
+    def _candidates(self) -> List[Dict[str, Device]]:
+        candidates = []
+        for facet, values in self._constraints:
+            if len(values) == 1:
+                candidates.append(self._index.get(facet, values[0]))
+                continue
+
+            union: Dict[str, Device] = {}
+            for value in values:
+                union.update(self._index.get(facet, value))
+            candidates.append(union)
+
+        return candidates
+
+    def _matches(self, device: Device) -> bool:
+        for attribute, comparison, bound in self._filters:
+            value = getattr(device, attribute, None)
+            if value is None:
+                return False
+            if comparison is not None and not comparison(value, bound):
+                return False
+
+        return True
+
+    def __iter__(self) -> Iterator[Device]:
+        candidates = self._candidates()
+        if not candidates:
+            smallest, others = self._devices, []
+        else:
+            candidates.sort(key=len)
+            smallest, others = candidates[0], candidates[1:]
+
+        # Copied so the devices may change while the results are consumed
+        for identifier, device in list(smallest.items()):
+            if all(identifier in other for other in others) and self._matches(device):
+                yield device
+
+    def first(self) -> Optional[Device]:
+        return next(iter(self), None)
+
+    def count(self) -> int:
+        return sum(1 for _ in self)
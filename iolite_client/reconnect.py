@@ -0,0 +1,57 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+class Backoff:
+    """Jittered exponential backoff between reconnect attempts."""
+
+    def __init__(
+        self,
+        initial: float = 1.0,
+        maximum: float = 60.0,
+        factor: float = 2.0,
+        jitter: float = 0.5,
+    ):
+        """
+        :param initial: The delay before the first attempt in seconds
+        :param maximum: The upper bound of any delay in seconds
+        :param factor: The growth of the delay per failed attempt
+        :param jitter: The fraction of each delay that is randomised (0 to 1)
+        """
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.maximum, self.initial * self.factor**self.attempts)
+        self.attempts += 1
+        return delay * (1 - random.uniform(0, self.jitter))
+
+    def reset(self):
+        self.attempts = 0
+
+
+@dataclass
+class ConnectionStats:
+    """Counters for a supervised connection."""
+
+    reconnects: int = 0
+    failed_attempts: int = 0
+    downtime: float = 0.0
+    disconnected_at: Optional[float] = None
+
+    def mark_disconnected(self):
+        self.disconnected_at = time.monotonic()
+
+    def mark_reconnected(self):
+        self.reconnects += 1
+        if self.disconnected_at is not None:
+            self.downtime += time.monotonic() - self.disconnected_at
+        self.disconnected_at = None
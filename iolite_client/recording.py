@@ -0,0 +1,169 @@
+import asyncio
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, List, Optional, Union, cast
+
+if TYPE_CHECKING:
+    from iolite_client.client import Client
+
+INBOUND = "in"
+OUTBOUND = "out"
+APPLICATION = "application"
+HEATING = "heating"
+
+
+@dataclass
+class RecordedFrame:
+    """A WebSocket frame captured by a FrameRecorder."""
+
+    timestamp: float
+    direction: str
+    channel: str
+    data: str
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return cast(IO[str], gzip.open(path, mode + "t", encoding="utf-8"))
+    return open(path, mode, encoding="utf-8")
+
+
+class FrameRecorder:
+    """Writes every frame a Client sends or receives to a file.
+
+    Each line holds one frame as a JSON array of the seconds since the recording
+    started, the direction, the channel and the raw frame. Paths ending in ".gz"
+    are gzip compressed.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: The file to record to, overwritten if it exists
+        """
+        self.path = path
+        self.frames = 0
+        self._file: Optional[IO[str]] = _open(path, "w")
+        self._started = time.monotonic()
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, direction: str, channel: str, data: Union[str, bytes]):
+        """
+        Record a frame.
+
+        :param direction: INBOUND or OUTBOUND
+        :param channel: APPLICATION or HEATING
+        :param data: The raw frame
+        """
+        if self._file is None:
+            return
+
+        if isinstance(data, bytes):
+            data = data.decode()
+        timestamp = round(time.monotonic() - self._started, 6)
+        self._file.write(
+            json.dumps([timestamp, direction, channel, data], separators=(",", ":"))
+        )
+        self._file.write("\n")
+        self.frames += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(path: str) -> Iterator[RecordedFrame]:
+    """
+    Read the frames of a recording.
+
+    :param path: The file written by a FrameRecorder
+    :return: The frames in the order they were recorded
+    """
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield RecordedFrame(*json.loads(line))
+
+
+@dataclass
+class ReplayStats:
+    """The outcome of a replay."""
+
+    frames: int = 0
+    elapsed: float = 0.0
+    handler_time: float = 0.0
+    failed: int = 0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+
+class Replayer:
+    """Feeds recorded inbound frames back through a Client's response handlers.
+
+    Frames are replayed at their original pace divided by `speed`, or as fast as
+    possible with a speed of None. Requests the handlers want to send back are
+    collected in `requests` rather than sent.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        frames: Iterable[RecordedFrame],
+        speed: Optional[float] = 1.0,
+    ):
+        """
+        :param client: The client whose handlers to drive, usually a fresh one
+        :param frames: The recorded frames, e.g. from read_recording
+        :param speed: The acceleration over the recorded pace, None for no delays
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+
+        self.client = client
+        self.frames = frames
+        self.speed = speed
+        self.requests: List[dict] = []
+
+    async def run(self) -> ReplayStats:
+        stats = ReplayStats()
+        started = time.monotonic()
+        first: Optional[float] = None
+        for frame in self.frames:
+            if frame.direction != INBOUND:
+                continue
+
+            if first is None:
+                first = frame.timestamp
+            if self.speed is not None:
+                offset = (frame.timestamp - first) / self.speed
+                delay = offset - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            handler_started = time.perf_counter()
+            try:
+                if frame.channel == HEATING:
+                    response = await self.client._heating_response_handler(frame.data)
+                else:
+                    response = await self.client._application_response_handler(
+                        frame.data
+                    )
+            except Exception:
+                stats.failed += 1
+            else:
+                if response.request:
+                    self.requests.append(response.request)
+            stats.handler_time += time.perf_counter() - handler_started
+            stats.frames += 1
+
+        stats.elapsed = time.monotonic() - started
+        return stats
@@ -1,7 +1,20 @@
+import asyncio
+import heapq
 import secrets
 import string
 import time
 from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from iolite_client.exceptions import RequestTimeoutError
+from iolite_client.metrics import Metrics
+from iolite_client.tracing import Span, Tracer
+
+
+def _is_waiting(future: asyncio.Future) -> bool:
+    # A future of an event loop that has been closed, e.g. by asyncio.run, can no
+    # longer be completed
+    return not future.done() and not future.get_loop().is_closed()
 
 
 class ClassMap(Enum):
@@ -17,10 +30,34 @@ class ClassMap(Enum):
 
 
 class RequestHandler:
-    def __init__(self):
-        self.request_stack = {}
+    """Builds requests and correlates them with their responses.
 
-    def get_subscribe_request(self, object_query: str) -> dict:
+    Every request gets a deadline; requests still unanswered past it are evicted
+    from the request stack, failing any waiter with RequestTimeoutError.
+    """
+
+    DEFAULT_TIMEOUT = 30.0
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        self.request_stack: Dict[str, dict] = {}
+        self.subscriptions: Dict[str, dict] = {}
+        self.timeout = timeout
+        self.metrics = metrics or Metrics()
+        self.tracer = tracer or Tracer()
+        self._sent_at: Dict[str, float] = {}
+        self._spans: Dict[str, Span] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._deadline_heap: List[Tuple[float, str]] = []
+        self._futures: Dict[str, asyncio.Future] = {}
+
+    def get_subscribe_request(
+        self, object_query: str, timeout: Optional[float] = None
+    ) -> dict:
         request = self._build_request(
             object_query,
             {
@@ -30,11 +67,26 @@ class RequestHandler:
                 "callback": "",
                 "minimumUpdateInterval": 100,
             },
+            timeout,
         )
+        self.subscriptions[object_query] = request
 
         return request
 
-    def get_action_request(self, device_id: str, property: str, value: float) -> dict:
+    def get_resubscribe_requests(self) -> List[dict]:
+        """Build fresh requests for every object query subscribed to so far."""
+        return [
+            self.get_subscribe_request(object_query)
+            for object_query in list(self.subscriptions)
+        ]
+
+    def get_action_request(
+        self,
+        device_id: str,
+        property: str,
+        value: float,
+        timeout: Optional[float] = None,
+    ) -> dict:
         request = self._build_request(
             ClassMap.ActionRequest.value,
             {
@@ -49,11 +101,12 @@ class RequestHandler:
                     }
                 ],
             },
+            timeout,
         )
 
         return request
 
-    def get_query_request(self, query: str) -> dict:
+    def get_query_request(self, query: str, timeout: Optional[float] = None) -> dict:
         request = self._build_request(
             ClassMap.QueryRequest.value,
             {
@@ -61,6 +114,7 @@ class RequestHandler:
                 "class": ClassMap.QueryRequest.value,
                 "query": query,
             },
+            timeout,
         )
 
         return request
@@ -74,23 +128,169 @@ class RequestHandler:
 
         return response
 
-    def get_request(self, request_id: str) -> dict:
+    def get_request(self, request_id: str) -> Optional[dict]:
         return self.request_stack.get(request_id)
 
-    def pop_request(self, request_id: str) -> dict:
-        return self.request_stack.pop(request_id)
+    def pop_request(self, request_id: str) -> Optional[dict]:
+        """Forget a request, cancelling anything still waiting for its response."""
+        self._deadlines.pop(request_id, None)
+        self._sent_at.pop(request_id, None)
+        self._end_span(request_id, "unanswered")
+        future = self._futures.pop(request_id, None)
+        if future and _is_waiting(future):
+            future.cancel()
+
+        request = self.request_stack.pop(request_id, None)
+        if request is not None:
+            self.metrics.set_in_flight(len(self.request_stack))
+        return request
+
+    def mark_sent(self, request_id: str):
+        """Note when a request was sent to time and trace its round trip."""
+        request = self.request_stack.get(request_id)
+        if request is None:
+            return
+
+        self._sent_at[request_id] = time.monotonic()
+        self._spans[request_id] = self.tracer.start_span(
+            "iolite.request",
+            {"iolite.request_id": request_id, "iolite.request_class": request["class"]},
+        )
 
     def has_requests(self) -> bool:
         return len(self.request_stack) != 0
 
+    def get_response(self, request_id: str) -> "asyncio.Future[dict]":
+        """
+        Get a future resolved with the response to a pending request.
+
+        The future fails with RequestTimeoutError once the request's deadline has
+        passed. Cancelling it forgets the request.
+
+        :param request_id: The ID of a pending request
+        :return: The future for the response
+        """
+        future = self._futures.get(request_id)
+        if future:
+            return future
+
+        if request_id not in self.request_stack:
+            raise KeyError(f"Unknown request {request_id}")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[request_id] = future
+        delay = max(0.0, self._deadlines[request_id] - time.monotonic())
+        timer = loop.call_later(delay, self._expire, request_id)
+
+        def on_done(done: asyncio.Future):
+            timer.cancel()
+            if done.cancelled() and self._futures.get(request_id) is done:
+                self.pop_request(request_id)
+
+        future.add_done_callback(on_done)
+
+        return future
+
+    def resolve(self, request_id: str, response: dict) -> Optional[dict]:
+        """
+        Complete a request with its response.
+
+        :param request_id: The ID the response refers to
+        :param response: The decoded response
+        :return: The completed request or None if it was not pending
+        """
+        future = self._futures.pop(request_id, None)
+        if future and not future.done():
+            future.set_result(response)
+
+        self._deadlines.pop(request_id, None)
+        sent_at = self._sent_at.pop(request_id, None)
+        self._end_span(request_id, response.get("class"))
+        request = self.request_stack.pop(request_id, None)
+        if request is None:
+            return None
+
+        if sent_at is not None and request["class"] == ClassMap.ActionRequest.value:
+            self.metrics.observe_action_latency(time.monotonic() - sent_at)
+        self.metrics.set_in_flight(len(self.request_stack))
+        return request
+
+    def fail_waiting(
+        self, error: BaseException, request_ids: Optional[Iterable[str]] = None
+    ):
+        """
+        Fail requests that are being waited on with the given error.
+
+        :param error: The error to fail the waiters with
+        :param request_ids: Limit to these requests, defaults to all of them
+        """
+        if request_ids is None:
+            request_ids = list(self._futures)
+
+        for request_id in request_ids:
+            span = self._spans.get(request_id)
+            if span:
+                span.record_exception(error)
+            future = self._futures.pop(request_id, None)
+            self.pop_request(request_id)
+            if future and _is_waiting(future):
+                future.set_exception(error)
+
+    def evict_expired(self, now: Optional[float] = None) -> List[str]:
+        """
+        Forget every request whose deadline has passed.
+
+        :param now: The current monotonic time, defaults to time.monotonic()
+        :return: The IDs of the evicted requests
+        """
+        now = time.monotonic() if now is None else now
+        evicted = []
+        while self._deadline_heap and self._deadline_heap[0][0] <= now:
+            deadline, request_id = heapq.heappop(self._deadline_heap)
+            # Entries of answered or re-used request IDs are skipped lazily
+            if self._deadlines.get(request_id) != deadline:
+                continue
+
+            self._expire(request_id)
+            evicted.append(request_id)
+
+        return evicted
+
+    def _expire(self, request_id: str):
+        error = RequestTimeoutError(request_id)
+        span = self._spans.get(request_id)
+        if span:
+            span.record_exception(error)
+        future = self._futures.pop(request_id, None)
+        self.pop_request(request_id)
+        if future and _is_waiting(future):
+            future.set_exception(error)
+
+    def _end_span(self, request_id: str, response_class: Optional[str]):
+        span = self._spans.pop(request_id, None)
+        if span is None:
+            return
+
+        span.set_attribute("iolite.response_class", response_class)
+        span.end()
+
     def _build_request(
         self,
         prefix: str,
         request: dict,
+        timeout: Optional[float] = None,
     ) -> dict:
+        self.evict_expired()
+
         request_id = self._get_request_id(prefix)
         request.update({"requestID": request_id})
         self.request_stack[request_id] = request
+        self.metrics.set_in_flight(len(self.request_stack))
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        self._deadlines[request_id] = deadline
+        heapq.heappush(self._deadline_heap, (deadline, request_id))
 
         return request
 
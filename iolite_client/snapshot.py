@@ -0,0 +1,196 @@
+import gzip
+import inspect
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Type
+
+from iolite_client.entity import (
+    Blind,
+    Device,
+    Entity,
+    Heating,
+    HumiditySensor,
+    InFloorValve,
+    Lamp,
+    RadiatorValve,
+    Room,
+    Switch,
+)
+
+if TYPE_CHECKING:
+    from iolite_client.client import Discovered
+
+SNAPSHOT_VERSION = 1
+
+DEVICE_CLASSES: Dict[str, Type[Device]] = {
+    device_class.__name__: device_class
+    for device_class in (
+        Blind,
+        HumiditySensor,
+        InFloorValve,
+        Lamp,
+        RadiatorValve,
+        Switch,
+    )
+}
+
+
+class SnapshotError(ValueError):
+    """A snapshot could not be read."""
+
+
+@dataclass
+class SnapshotPolicy:
+    """When a snapshot may be used instead of a live discovery.
+
+    Snapshots younger than `revalidate_after` are used as they are, older ones
+    are used while a live discovery revalidates them in the background, and ones
+    older than `max_age` are discarded.
+    """
+
+    revalidate_after: float = 300.0
+    max_age: float = 24 * 60 * 60
+
+    def is_usable(self, snapshot: "Snapshot") -> bool:
+        return snapshot.age <= self.max_age
+
+    def needs_revalidation(self, snapshot: "Snapshot") -> bool:
+        return snapshot.age > self.revalidate_after
+
+
+@dataclass
+class Snapshot:
+    """A restored Discovered and when it was taken."""
+
+    discovered: "Discovered"
+    created_at: float
+    sid: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.created_at)
+
+
+def _entity_to_dict(entity: Entity) -> dict:
+    # Every constructor argument is kept as an attribute of the same name
+    parameters = list(inspect.signature(type(entity).__init__).parameters)[1:]
+    payload = {name: getattr(entity, name) for name in parameters}
+    payload["type"] = type(entity).__name__
+    if isinstance(entity, Device):
+        payload["model_name"] = entity.model_name
+    return payload
+
+
+def _device_from_dict(payload: dict) -> Device:
+    payload = dict(payload)
+    type_name = payload.pop("type")
+    model_name = payload.pop("model_name", None)
+    device_class = DEVICE_CLASSES.get(type_name)
+    if device_class is None:
+        raise SnapshotError(f"Unknown device type {type_name}")
+
+    device = device_class(**payload)
+    device.model_name = model_name
+    return device
+
+
+def _heating_from_dict(payload: dict) -> Heating:
+    payload = dict(payload)
+    payload.pop("type", None)
+    return Heating(**payload)
+
+
+def _room_from_dict(payload: dict) -> Room:
+    return Room(payload["identifier"], payload["name"])
+
+
+def _get_heatings(discovered: "Discovered") -> List[Heating]:
+    heatings = [
+        room.heating for room in discovered.get_rooms() if room.heating is not None
+    ]
+    for entities in discovered.unmapped_entities.values():
+        heatings.extend(entity for entity in entities if isinstance(entity, Heating))
+    return heatings
+
+
+def dump_snapshot(discovered: "Discovered", sid: Optional[str] = None) -> dict:
+    """
+    Convert the discovered entities, including unmapped ones, to a snapshot.
+
+    :param discovered: The entities to snapshot
+    :param sid: The session ID of the home, checked when restoring
+    :return: The JSON serializable snapshot
+    """
+    return {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "sid": sid,
+        "rooms": [_entity_to_dict(room) for room in discovered.get_rooms()],
+        "devices": [_entity_to_dict(device) for device in discovered.get_devices()],
+        "heatings": [_entity_to_dict(heating) for heating in _get_heatings(discovered)],
+    }
+
+
+def restore_snapshot(payload: dict) -> Snapshot:
+    """
+    Rebuild the discovered entities of a snapshot.
+
+    :param payload: A snapshot created by dump_snapshot
+    :return: The restored snapshot
+    :raises SnapshotError: The payload is not a snapshot
+    """
+    from iolite_client.client import Discovered
+
+    if not isinstance(payload, dict):
+        raise SnapshotError(f"Malformed snapshot - {type(payload).__name__}")
+    if payload.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {payload.get('version')}")
+
+    discovered = Discovered()
+    try:
+        for room in payload["rooms"]:
+            discovered.add_room(_room_from_dict(room))
+        for device in payload["devices"]:
+            discovered.add_device(_device_from_dict(device))
+        for heating in payload["heatings"]:
+            discovered.add_heating(_heating_from_dict(heating))
+        created_at = float(payload["created_at"])
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise SnapshotError(f"Malformed snapshot - {e!r}") from e
+
+    return Snapshot(discovered, created_at, payload.get("sid"))
+
+
+def save_snapshot(discovered: "Discovered", path: str, sid: Optional[str] = None):
+    """
+    Write a gzip compressed snapshot, replacing any previous one atomically.
+
+    :param discovered: The entities to snapshot
+    :param path: The file to write
+    :param sid: The session ID of the home, checked when restoring
+    """
+    temporary_path = f"{path}.tmp"
+    with gzip.open(temporary_path, "wt", encoding="utf-8") as f:
+        json.dump(dump_snapshot(discovered, sid), f, separators=(",", ":"))
+    os.replace(temporary_path, path)
+
+
+def load_snapshot(path: str) -> Optional[Snapshot]:
+    """
+    Read a snapshot written by save_snapshot.
+
+    :param path: The file to read
+    :return: The restored snapshot or None if there is none
+    :raises SnapshotError: The file is not a readable snapshot
+    """
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Unreadable snapshot {path} - {e!r}") from e
+
+    return restore_snapshot(payload)
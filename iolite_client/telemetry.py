@@ -0,0 +1,232 @@
+import math
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from iolite_client.entity import (
+    Entity,
+    Heating,
+    HumiditySensor,
+    InFloorValve,
+    RadiatorValve,
+)
+from iolite_client.model_event import PropertyChange
+
+if TYPE_CHECKING:
+    from iolite_client.client import Discovered
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The numeric attributes recorded per entity class
+TRACKED_ATTRIBUTES: Dict[Type[Entity], Tuple[str, ...]] = {
+    RadiatorValve: ("current_env_temp", "valve_position", "battery_level"),
+    InFloorValve: ("current_env_temp", "heating_temperature_setting"),
+    HumiditySensor: ("current_env_temp", "humidity_level"),
+    Heating: ("current_temp", "target_temp"),
+}
+
+Key = Tuple[str, str]
+
+
+@dataclass
+class WindowStats:
+    """Summary of a set of samples, e.g. those in a window."""
+
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+
+
+class RingBuffer:
+    """The latest samples of one series in preallocated arrays of doubles.
+
+    Once full, each new sample overwrites the oldest one. Samples are expected in
+    chronological order.
+    """
+
+    __slots__ = ("capacity", "timestamps", "values", "_next", "_size")
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, value: float):
+        self.timestamps[self._next] = timestamp
+        self.values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _ordered(self, column: array) -> array:
+        start = self._next
+        if self._size < self.capacity:
+            return column[:start]
+        return column[start:] + column[:start]
+
+    def window(self, since: Optional[float] = None) -> Tuple[array, array]:
+        """
+        :param since: Only samples at or after this timestamp, all if None
+        :return: The timestamps and values of the samples, oldest first
+        """
+        timestamps = self._ordered(self.timestamps)
+        values = self._ordered(self.values)
+        if since is None:
+            return timestamps, values
+
+        start = bisect_left(timestamps, since)
+        return timestamps[start:], values[start:]
+
+
+def summarize(values: Sequence[float]) -> Optional[WindowStats]:
+    """
+    Compute the minimum, maximum and mean of the values, with NumPy when installed.
+
+    :param values: An array("d") of values
+    :return: The summary or None without values
+    """
+    if not values:
+        return None
+
+    if numpy is not None:
+        column = numpy.frombuffer(values, dtype=numpy.float64)
+        return WindowStats(
+            len(column), float(column.min()), float(column.max()), float(column.mean())
+        )
+
+    return WindowStats(
+        len(values), min(values), max(values), math.fsum(values) / len(values)
+    )
+
+
+def is_number(value) -> bool:
+    """Whether the value is an int or float, booleans excluded."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class TelemetryStore:
+    """Recent history of numeric entity attributes, keyed by (identifier, attribute).
+
+    Each series keeps its latest `capacity` samples in a RingBuffer, timestamped on
+    arrival. A Client given a store records every tracked attribute after
+    discovery and every change applied afterwards, e.g.::
+
+        telemetry = TelemetryStore(capacity=720)
+        client = Client(sid, username, password, telemetry=telemetry)
+        ...
+        telemetry.stats(valve.identifier, "valve_position", last=15 * 60)
+    """
+
+    def __init__(self, capacity: int = 720, clock: Callable[[], float] = time.time):
+        """
+        :param capacity: The number of samples kept per series
+        :param clock: The source of the sample timestamps in seconds
+        """
+        self.capacity = capacity
+        self.clock = clock
+        self._series: Dict[Key, RingBuffer] = {}
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._series
+
+    def keys(self) -> Iterator[Key]:
+        return iter(self._series)
+
+    def record(
+        self,
+        identifier: str,
+        attribute: str,
+        value,
+        timestamp: Optional[float] = None,
+    ):
+        """
+        Add a sample, ignoring values that are not numbers.
+
+        :param identifier: The identifier of the device, or the room for heating
+        :param attribute: The entity attribute, e.g. "current_env_temp"
+        :param value: The value
+        :param timestamp: The time of the sample, by default now
+        """
+        if not is_number(value):
+            return
+
+        series = self._series.get((identifier, attribute))
+        if series is None:
+            series = self._series[(identifier, attribute)] = RingBuffer(self.capacity)
+        series.append(self.clock() if timestamp is None else timestamp, value)
+
+    def record_entity(self, entity: Entity, timestamp: Optional[float] = None):
+        """Add a sample of every tracked attribute of the entity."""
+        timestamp = self.clock() if timestamp is None else timestamp
+        for attribute in TRACKED_ATTRIBUTES.get(type(entity), ()):
+            self.record(
+                entity.identifier, attribute, getattr(entity, attribute), timestamp
+            )
+
+    def record_discovered(self, discovered: "Discovered"):
+        """Add a sample of every tracked attribute of the discovered entities."""
+        timestamp = self.clock()
+        for device in discovered.get_devices():
+            self.record_entity(device, timestamp)
+        for room in discovered.get_rooms():
+            if room.heating is not None:
+                self.record_entity(room.heating, timestamp)
+
+    def record_change(self, change: PropertyChange):
+        """Add the new value of a change to a tracked attribute."""
+        entity = change.entity
+        if entity is not None and change.attribute not in TRACKED_ATTRIBUTES.get(
+            type(entity), ()
+        ):
+            return
+        self.record(change.identifier, change.attribute, change.new_value)
+
+    def series(
+        self, identifier: str, attribute: str, last: Optional[float] = None
+    ) -> Tuple[array, array]:
+        """
+        :param identifier: The identifier of the device, or the room for heating
+        :param attribute: The entity attribute
+        :param last: Only the samples of the last this many seconds, all if None
+        :return: The timestamps and values of the samples, oldest first
+        """
+        series = self._series.get((identifier, attribute))
+        if series is None:
+            return array("d"), array("d")
+
+        since = None if last is None else self.clock() - last
+        return series.window(since)
+
+    def stats(
+        self, identifier: str, attribute: str, last: Optional[float] = None
+    ) -> Optional[WindowStats]:
+        """
+        :param identifier: The identifier of the device, or the room for heating
+        :param attribute: The entity attribute
+        :param last: Only the samples of the last this many seconds, all if None
+        :return: The minimum, maximum and mean of the samples, None without any
+        """
+        _, values = self.series(identifier, attribute, last)
+        return summarize(values)
@@ -0,0 +1,122 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+Attributes = Dict[str, Any]
+
+
+class Span:
+    """A timed operation, such as a connection handshake or a single request."""
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Optional[Attributes]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes: Attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        # Free for tracers to keep their own span object
+        self.handle: Any = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException):
+        self.error = error
+
+    def end(self):
+        if self.end_time is not None:
+            return
+
+        self.end_time = time.time()
+        self.tracer.on_end(self)
+
+
+class Tracer:
+    """Receives the start and end of spans around client operations.
+
+    The default implementation ignores them, override `on_start` and `on_end` to
+    forward spans elsewhere. The spans are:
+
+    - `iolite.websocket.connect`: a WebSocket connection and TLS handshake
+    - `iolite.request`: a request, from sending it until it is answered or fails,
+      with its `iolite.request_id`
+    - `iolite.set_property`: `Client.async_set_property` as a whole
+    - `iolite.oauth.token`, `iolite.oauth.refresh`, `iolite.oauth.sid`: OAuth calls
+    - `iolite.heating_api`: a HeatingScheduler HTTP call
+    """
+
+    def start_span(self, name: str, attributes: Optional[Attributes] = None) -> Span:
+        span = Span(self, name, attributes)
+        self.on_start(span)
+        return span
+
+    @contextmanager
+    def span(
+        self, name: str, attributes: Optional[Attributes] = None
+    ) -> Iterator[Span]:
+        """Trace the enclosed block, recording any exception raised in it."""
+        span = self.start_span(name, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end()
+
+    def on_start(self, span: Span):
+        pass
+
+    def on_end(self, span: Span):
+        pass
+
+
+class OpenTelemetryTracer(Tracer):
+    """Forwards spans to an OpenTelemetry tracer, e.g.::
+
+        from opentelemetry import trace
+
+        client = Client(sid, username, password, tracer=OpenTelemetryTracer(
+            trace.get_tracer("iolite_client")
+        ))
+
+    OpenTelemetry is not a dependency; anything with the same `start_span` works.
+    """
+
+    def __init__(self, tracer):
+        """
+        :param tracer: An `opentelemetry.trace.Tracer`
+        """
+        self.tracer = tracer
+
+    def on_start(self, span: Span):
+        span.handle = self.tracer.start_span(
+            span.name,
+            attributes=span.attributes,
+            start_time=int(span.start_time * 1e9),
+        )
+
+    def on_end(self, span: Span):
+        handle = span.handle
+        if handle is None:
+            return
+
+        for key, value in span.attributes.items():
+            handle.set_attribute(key, value)
+        if span.error is not None:
+            handle.record_exception(span.error)
+            try:
+                from opentelemetry.trace import Status, StatusCode
+
+                handle.set_status(Status(StatusCode.ERROR, str(span.error)))
+            except ImportError:
+                pass
+        end_time = span.end_time if span.end_time is not None else time.time()
+        handle.end(end_time=int(end_time * 1e9))
@@ -0,0 +1,257 @@
+"""Benchmarks the parsing, discovery and lookup hot paths.
+
+Usage: python scripts/benchmark.py [--quick] [--output FILE] [--compare FILE]
+
+Results are printed and, with --output, saved as JSON. Pass the JSON of an earlier
+run to --compare to print the relative change of every benchmark.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+from iolite_client import entity_factory
+from iolite_client.aggregation import Aggregates
+from iolite_client.client import Client, Discovered
+from iolite_client.fake_server import FakeHome, FakeIOLiteServer
+from iolite_client.request_handler import ClassMap
+
+DEVICES_PER_ROOM = 100
+
+
+def measure(function: Callable[[], object], number: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(number):
+        function()
+    seconds = time.perf_counter() - started
+    return _result(number, seconds)
+
+
+def _result(number: int, seconds: float) -> dict:
+    return {
+        "ops": number,
+        "seconds": seconds,
+        "per_op_us": seconds / number * 1e6,
+        "ops_per_second": number / seconds if seconds else float("inf"),
+    }
+
+
+def synthetic_home(devices: int) -> FakeHome:
+    rooms = max(1, devices // DEVICES_PER_ROOM)
+    return FakeHome.synthetic("sid", rooms, min(devices, DEVICES_PER_ROOM))
+
+
+def discovered_home(home: FakeHome) -> Discovered:
+    discovered = Discovered()
+    for payload in home.rooms:
+        discovered.add_room(entity_factory.create_room(payload))
+    for payload in home.devices:
+        discovered.add_device(entity_factory.create_device(payload))
+    return discovered
+
+
+def bench_create_device(home: FakeHome) -> dict:
+    payloads = home.devices
+    started = time.perf_counter()
+    for payload in payloads:
+        entity_factory.create_device(payload)
+    return _result(len(payloads), time.perf_counter() - started)
+
+
+def bench_add_device(home: FakeHome) -> dict:
+    discovered = Discovered()
+    for payload in home.rooms:
+        discovered.add_room(entity_factory.create_room(payload))
+    devices = [entity_factory.create_device(payload) for payload in home.devices]
+
+    started = time.perf_counter()
+    for device in devices:
+        discovered.add_device(device)
+    return _result(len(devices), time.perf_counter() - started)
+
+
+def bench_lookups(home: FakeHome, lookups: int) -> Dict[str, dict]:
+    discovered = discovered_home(home)
+    device_ids = [payload["id"] for payload in home.devices]
+    room_names = [payload["placeName"] for payload in home.rooms]
+    # Spread over the whole home, the last entries are the slowest to scan for
+    device_step = max(1, len(device_ids) // lookups)
+    room_step = max(1, len(room_names) // lookups)
+
+    def find_devices():
+        for identifier in device_ids[::device_step][:lookups]:
+            discovered.find_device_by_identifier(identifier)
+
+    def find_rooms():
+        for name in room_names[::room_step][:lookups]:
+            discovered.find_room_by_name(name)
+
+    device_result = measure(find_devices, 1)
+    room_result = measure(find_rooms, 1)
+    # Report per lookup rather than per batch
+    return {
+        "find_device_by_identifier": _result(
+            min(lookups, len(device_ids[::device_step])), device_result["seconds"]
+        ),
+        "find_room_by_name": _result(
+            min(lookups, len(room_names[::room_step])), room_result["seconds"]
+        ),
+    }
+
+
+def bench_response_handler(home: FakeHome, messages: int) -> dict:
+    client = Client("sid", "user", "pass")
+    client.discovered = discovered_home(home)
+    device_ids = [payload["id"] for payload in home.devices]
+    frames = [
+        client.codec.dumps(
+            {
+                "class": ClassMap.ModelEventResponse.value,
+                "requestID": "devices_subscription",
+                "events": [
+                    {
+                        "objectQuery": f"devices[id='{device_ids[i % len(device_ids)]}']"
+                        "/properties[name='currentEnvironmentTemperature']",
+                        "propertyName": "value",
+                        "value": 20 + i % 50 / 10,
+                    }
+                ],
+            }
+        )
+        for i in range(messages)
+    ]
+
+    async def handle_all():
+        started = time.perf_counter()
+        for frame in frames:
+            await client._application_response_handler(frame)
+        return time.perf_counter() - started
+
+    return _result(messages, asyncio.run(handle_all()))
+
+
+def bench_room_means(home: FakeHome, rounds: int) -> Dict[str, dict]:
+    """Mean temperature of every room after a single value changed, by scanning the
+    devices and from columnar aggregates."""
+    discovered = discovered_home(home)
+    aggregates = Aggregates()
+    aggregates.load(discovered)
+    rooms = discovered.get_rooms()
+    device = discovered.find_device_by_identifier(home.devices[0]["id"])
+
+    def scan():
+        for room in rooms:
+            temperatures = [
+                device.current_env_temp
+                for device in room.devices.values()
+                if hasattr(device, "current_env_temp")
+            ]
+            sum(temperatures) / len(temperatures)
+
+    def aggregated():
+        device.current_env_temp += 0.1
+        aggregates.add_device(device)
+        for room in rooms:
+            aggregates.room_stats(room.identifier, "current_env_temp")
+
+    return {
+        "room_means_scan": measure(scan, rounds),
+        "room_means_aggregated": measure(aggregated, rounds),
+    }
+
+
+def bench_discover(home: FakeHome, rounds: int) -> dict:
+    async def discover_all() -> float:
+        async with FakeIOLiteServer([home], "user", "pass") as server:
+            started = time.perf_counter()
+            for _ in range(rounds):
+                client = Client("sid", "user", "pass")
+                client.BASE_URL = server.ws_url
+                await client.async_discover()
+            return time.perf_counter() - started
+
+    return _result(rounds, asyncio.run(discover_all()))
+
+
+def run(quick: bool) -> Dict[str, dict]:
+    sizes: List[int] = [10, 1000] if quick else [10, 1000, 100000]
+    lookups = 100 if quick else 1000
+    messages = 2000 if quick else 20000
+
+    results = {}
+    for size in sizes:
+        home = synthetic_home(size)
+        results[f"create_device[{size}]"] = bench_create_device(home)
+        results[f"add_device[{size}]"] = bench_add_device(home)
+        for name, result in bench_lookups(home, lookups).items():
+            results[f"{name}[{size}]"] = result
+        results[f"response_handler[{size}]"] = bench_response_handler(home, messages)
+        for name, result in bench_room_means(home, 20 if quick else 100).items():
+            results[f"{name}[{size}]"] = result
+        # Larger homes exceed the default WebSocket frame size of 1 MiB
+        if size <= 1000:
+            results[f"discover[{size}]"] = bench_discover(home, 3 if quick else 10)
+
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: Dict[str, dict], baseline: Dict[str, dict]):
+    print(f"{'benchmark':<40} {'per op':>12} {'ops/s':>14} {'change':>8}")
+    for name, result in results.items():
+        change = ""
+        if name in baseline:
+            before = baseline[name]["per_op_us"]
+            change = f"{(result['per_op_us'] - before) / before:+.0%}"
+        print(
+            f"{name:<40} {result['per_op_us']:>10.2f}µs "
+            f"{result['ops_per_second']:>14,.0f} {change:>8}"
+        )
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="skip the largest home")
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    results = run(args.quick)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "revision": git_revision(),
+                    "python": platform.python_version(),
+                    "created_at": time.time(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,65 @@
+"""Compares the per-message cost of the installed JSON codecs.
+
+Usage: python scripts/benchmark_codec.py [DEVICES] [ITERATIONS]
+"""
+import sys
+import timeit
+
+from iolite_client.codec import get_codec
+
+args = sys.argv
+devices = int(args[1]) if len(args) > 1 else 200
+iterations = int(args[2]) if len(args) > 2 else 1000
+
+# A SubscribeSuccess for a large home, the biggest frame the client decodes
+subscribe_success = {
+    "class": "SubscribeSuccess",
+    "requestID": "devices_abcdefghij",
+    "initialValues": [
+        {
+            "id": f"device-{i}",
+            "name": f"Device {i}",
+            "typeName": "Heater",
+            "placeIdentifier": f"room-{i % 20}",
+            "manufacturer": "IOLITE GmbH",
+            "properties": [
+                {"name": "batteryLevel", "value": 90},
+                {"name": "heatingTemperatureSetting", "value": 21.5},
+                {"name": "valvePosition", "value": 12},
+                {"name": "currentEnvironmentTemperature", "value": 20.3},
+            ],
+        }
+        for i in range(devices)
+    ],
+}
+action_request = {
+    "modelID": "http://iolite.de#Environment",
+    "class": "ActionRequest",
+    "objectQuery": "devices[id='device-1']/properties[name='blindLevel']",
+    "actionName": "requestValueUpdate",
+    "parameters": [{"class": "ValueParameter", "value": 50}],
+    "requestID": "ActionRequest_abcdefghij",
+}
+
+text_frame = get_codec("json").dumps(subscribe_success)
+bytes_frame = text_frame.encode()
+
+print(f"SubscribeSuccess with {devices} devices, {len(bytes_frame)} bytes")
+print(f"{'codec':<8} {'decode str':>12} {'decode bytes':>14} {'encode':>10}")
+for name in ("json", "ujson", "orjson"):
+    try:
+        codec = get_codec(name)
+    except ImportError:
+        print(f"{name:<8} not installed")
+        continue
+
+    def per_message(statement) -> str:
+        seconds = timeit.timeit(statement, number=iterations) / iterations
+        return f"{seconds * 1e6:.1f}µs"
+
+    print(
+        f"{name:<8} "
+        f"{per_message(lambda: codec.loads(text_frame)):>12} "
+        f"{per_message(lambda: codec.loads(bytes_frame)):>14} "
+        f"{per_message(lambda: codec.dumps(action_request)):>10}"
+    )
@@ -0,0 +1,125 @@
+"""Measures the memory held per discovered device.
+
+Usage: python scripts/benchmark_memory.py [DEVICES]
+
+Devices are created from decoded JSON, as during discovery, so repeated strings
+such as manufacturers are separate objects unless interned. The "before" column
+uses dict-backed stand-ins without interning, as entities were before they were
+slotted, built from the same payloads.
+"""
+import gc
+import inspect
+import sys
+import tracemalloc
+from typing import Dict, Type
+from unittest import mock
+
+from iolite_client import entity, entity_factory
+from iolite_client.client import Discovered
+from iolite_client.codec import get_codec
+from iolite_client.fake_server import FakeHome
+
+DEVICES_PER_ROOM = 100
+
+
+class Unslotted:
+    """An entity with its attributes in a per-instance __dict__, methods and
+    properties are looked up on the entity class it stands in for."""
+
+    entity_class: Type[entity.Entity]
+
+    def __getattr__(self, name: str):
+        attribute = inspect.getattr_static(self.entity_class, name)
+        if isinstance(attribute, classmethod):
+            return attribute.__get__(None, self.entity_class)
+        return attribute.__get__(self, type(self))
+
+
+_UNSLOTTED_CLASSES: Dict[type, type] = {}
+
+
+def unslotted(slotted: entity.Entity) -> Unslotted:
+    """A dict-backed copy of the entity, e.g. Device._manufacturer as manufacturer."""
+    entity_class = type(slotted)
+    standin_class = _UNSLOTTED_CLASSES.get(entity_class)
+    if standin_class is None:
+        standin_class = _UNSLOTTED_CLASSES[entity_class] = type(
+            f"Unslotted{entity_class.__name__}",
+            (Unslotted,),
+            {"entity_class": entity_class},
+        )
+
+    standin = standin_class()
+    for cls in entity_class.__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            setattr(standin, slot.lstrip("_"), getattr(slotted, slot))
+    return standin
+
+
+def without_interning():
+    return mock.patch.object(entity, "intern", lambda value: value)
+
+
+def measure(function) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = function()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def main(argv):
+    devices = int(argv[0]) if argv else 10000
+    home = FakeHome.synthetic(
+        "sid", max(1, devices // DEVICES_PER_ROOM), min(devices, DEVICES_PER_ROOM)
+    )
+    codec = get_codec()
+    rooms_frame = codec.dumps(home.rooms)
+    devices_frame = codec.dumps(home.devices)
+
+    def create_devices(create_device=entity_factory.create_device):
+        return [create_device(payload) for payload in codec.loads(devices_frame)]
+
+    def create_discovered(
+        create_room=entity_factory.create_room,
+        create_device=entity_factory.create_device,
+    ):
+        discovered = Discovered()
+        for payload in codec.loads(rooms_frame):
+            discovered.add_room(create_room(payload))
+        for payload in codec.loads(devices_frame):
+            discovered.add_device(create_device(payload))
+        return discovered
+
+    def create_unslotted_devices():
+        with without_interning():
+            return create_devices(
+                lambda payload: unslotted(entity_factory.create_device(payload))
+            )
+
+    def create_unslotted_discovered():
+        with without_interning():
+            return create_discovered(
+                lambda payload: unslotted(entity_factory.create_room(payload)),
+                lambda payload: unslotted(entity_factory.create_device(payload)),
+            )
+
+    count = len(home.devices)
+    print(f"{'bytes per device':<24} {'before':>10} {'after':>10}")
+    for name, before, after in (
+        ("devices", create_unslotted_devices, create_devices),
+        ("discovered", create_unslotted_discovered, create_discovered),
+    ):
+        print(
+            f"{name:<24} {measure(before) / count:>10,.0f}"
+            f" {measure(after) / count:>10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
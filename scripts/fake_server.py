@@ -0,0 +1,39 @@
+"""Runs the fake iolite server with a synthetic home until interrupted.
+
+Usage: python scripts/fake_server.py [PORT] [ROOMS] [DEVICES_PER_ROOM] [LATENCY]
+
+Connect with SID "sid", username "user" and password "pass".
+"""
+import asyncio
+import logging
+import sys
+
+from iolite_client.fake_server import FakeHome, FakeIOLiteServer, Faults
+
+args = sys.argv
+port = int(args[1]) if len(args) > 1 else 8080
+rooms = int(args[2]) if len(args) > 2 else 10
+devices_per_room = int(args[3]) if len(args) > 3 else 5
+latency = float(args[4]) if len(args) > 4 else 0.0
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def main():
+    home = FakeHome.synthetic("sid", rooms, devices_per_room)
+    server = FakeIOLiteServer(
+        [home],
+        "user",
+        "pass",
+        Faults(latency=latency),
+        keepalive_interval=30,
+        port=port,
+    )
+    async with server:
+        await asyncio.Event().wait()
+
+
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    pass
@@ -0,0 +1,149 @@
+import unittest
+
+from iolite_client.aggregation import Aggregates, Column
+from iolite_client.client import Client, Discovered
+from iolite_client.entity import Blind, HumiditySensor, RadiatorValve, Room
+from iolite_client.model_event import PropertyUpdate
+
+
+def _valve(identifier: str, room: str, temperature: float, valve_position: float):
+    return RadiatorValve(
+        identifier, identifier, room, "Danfoss", temperature, 80, "auto", valve_position
+    )
+
+
+class ColumnTest(unittest.TestCase):
+    def test_set_and_remove(self):
+        column = Column()
+        column.set("a", 1)
+        column.set("b", 2)
+        column.set("c", 6)
+
+        column.remove("a")
+        column.set("c", 4)
+
+        self.assertEqual(2, len(column))
+        self.assertEqual(3, column.stats().mean)
+        self.assertEqual(["c", "b"], column.identifiers)
+
+        column.remove("b")
+        column.remove("c")
+        self.assertIsNone(column.stats())
+
+    def test_stats_are_cached_until_changed(self):
+        column = Column()
+        column.set("a", 1)
+
+        stats = column.stats()
+        column.set("a", 1)
+        self.assertIs(stats, column.stats())
+
+        column.set("a", 3)
+        self.assertEqual(3, column.stats().maximum)
+
+
+class AggregatesTest(unittest.TestCase):
+    def setUp(self):
+        self.discovered = Discovered()
+        self.discovered.add_room(Room("bedroom", "Bedroom"))
+        self.discovered.add_room(Room("kitchen", "Kitchen"))
+        self.discovered.add_device(_valve("valve-1", "bedroom", 20.0, 10))
+        self.discovered.add_device(_valve("valve-2", "bedroom", 22.0, 50))
+        self.discovered.add_device(_valve("valve-3", "kitchen", 18.0, 90))
+        self.discovered.add_device(
+            HumiditySensor("sensor-1", "Sensor", "bedroom", "Bosch", 21.0, 40)
+        )
+        self.discovered.add_device(Blind("blind-1", "Blind", "kitchen", "Somfy", 0))
+        self.aggregates = Aggregates()
+        self.aggregates.load(self.discovered)
+
+    def test_room_and_home_stats(self):
+        bedroom = self.aggregates.room_stats("bedroom", "current_env_temp")
+
+        self.assertEqual(3, bedroom.count)
+        self.assertEqual(20.0, bedroom.minimum)
+        self.assertEqual(22.0, bedroom.maximum)
+        self.assertEqual(21.0, bedroom.mean)
+        self.assertEqual(40, self.aggregates.home_stats("humidity_level").mean)
+        self.assertEqual(18.0, self.aggregates.home_stats("current_env_temp").minimum)
+        self.assertIsNone(self.aggregates.room_stats("kitchen", "humidity_level"))
+
+    def test_valve_demand(self):
+        self.assertEqual(30, self.aggregates.valve_demand("bedroom"))
+        self.assertEqual(50, self.aggregates.valve_demand())
+        self.assertIsNone(self.aggregates.valve_demand("office"))
+
+    def test_changes_are_applied_incrementally(self):
+        change = self.discovered.apply_update(
+            PropertyUpdate("devices", "valve-1", "valvePosition", 70)
+        )
+        self.aggregates.apply_change(change)
+
+        self.assertEqual(60, self.aggregates.valve_demand("bedroom"))
+        self.assertEqual(70, self.aggregates.valve_demand())
+
+    def test_value_becoming_unknown_is_removed(self):
+        valve = self.discovered.find_device_by_identifier("valve-1")
+        valve.current_env_temp = None
+
+        self.aggregates.add_device(valve)
+
+        self.assertEqual(
+            2, self.aggregates.room_stats("bedroom", "current_env_temp").count
+        )
+
+    def test_moved_and_removed_devices(self):
+        self.aggregates.add_device(_valve("valve-1", "kitchen", 20.0, 10))
+
+        self.assertEqual(50, self.aggregates.valve_demand("kitchen"))
+        self.assertEqual(50, self.aggregates.valve_demand("bedroom"))
+
+        self.aggregates.remove_device("valve-1")
+
+        self.assertEqual(90, self.aggregates.valve_demand("kitchen"))
+        self.assertEqual(2, self.aggregates.home_stats("valve_position").count)
+
+
+class ClientAggregatesTest(unittest.TestCase):
+    def test_follows_discovery_and_model_events(self):
+        aggregates = Aggregates()
+        client = Client("sid", "user", "pass", aggregates=aggregates)
+        client._handle_place_response(
+            {"initialValues": [{"class": "Room", "id": "room", "placeName": "Room"}]}
+        )
+        client._handle_device_response(
+            {
+                "initialValues": [
+                    {
+                        "class": "Device",
+                        "id": "valve",
+                        "friendlyName": "Valve",
+                        "typeName": "Heater",
+                        "placeIdentifier": "room",
+                        "manufacturer": "Danfoss",
+                        "properties": [
+                            {"name": "currentEnvironmentTemperature", "value": 20},
+                            {"name": "batteryLevel", "value": 80},
+                            {"name": "heatingMode", "value": "auto"},
+                            {"name": "valvePosition", "value": 10},
+                        ],
+                    }
+                ]
+            }
+        )
+        self.assertEqual(10, aggregates.valve_demand("room"))
+
+        client._handle_model_event(
+            {
+                "events": [
+                    {
+                        "objectQuery": "devices[id='valve']"
+                        "/properties[name='valvePosition']",
+                        "propertyName": "value",
+                        "value": 40,
+                    }
+                ]
+            }
+        )
+
+        self.assertEqual(40, aggregates.valve_demand("room"))
@@ -1,7 +1,21 @@
+import asyncio
+import json
+import socket
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-from iolite_client.client import Discovered
-from iolite_client.entity import Heating, Room, Switch
+import pytest
+
+from iolite_client.client import Client, Discovered
+from iolite_client.entity import Blind, Heating, Room, Switch
+from iolite_client.exceptions import RequestTimeoutError, SessionClosedError
+from iolite_client.metrics import PrometheusMetrics
+from iolite_client.model_event import PropertyUpdate
+from iolite_client.outbound import OutboundScheduler, Priority
+from iolite_client.reconnect import Backoff
+from iolite_client.request_handler import ClassMap
 
 
 class DiscoveredTest(unittest.TestCase):
@@ -96,6 +110,881 @@ class DiscoveredTest(unittest.TestCase):
             self.discovered.find_device_by_identifier(self.bedroom_switch.identifier),
         )
 
+    def test_apply_update_to_device(self):
+        blind = Blind("3", "Bedroom Blind", self.bedroom.identifier, "Generic", 10)
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_device(blind)
+
+        change = self.discovered.apply_update(
+            PropertyUpdate("devices", "3", "blindLevel", 80, 1000)
+        )
+
+        self.assertEqual(80, blind.blind_level)
+        self.assertEqual("blind_level", change.attribute)
+        self.assertEqual(10, change.old_value)
+        self.assertEqual(80, change.new_value)
+        self.assertEqual(1000, change.timestamp)
+
+    def test_apply_update_to_heating(self):
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_heating(self.bedroom_heating)
+
+        change = self.discovered.apply_update(
+            PropertyUpdate("places", self.bedroom.identifier, "currentTemperature", 12)
+        )
+
+        self.assertEqual(12, self.bedroom_heating.current_temp)
+        self.assertEqual(10, change.old_value)
+
+    def test_apply_update_ignores_unknown_attribute(self):
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_device(self.bedroom_switch)
+
+        change = self.discovered.apply_update(
+            PropertyUpdate("devices", "2", "blindLevel", 80)
+        )
+
+        self.assertIsNone(change)
+        self.assertFalse(hasattr(self.bedroom_switch, "blind_level"))
+
+    def test_apply_update_ignores_unchanged_value(self):
+        blind = Blind("3", "Bedroom Blind", self.bedroom.identifier, "Generic", 10)
+        self.discovered.add_device(blind)
+
+        self.assertIsNone(
+            self.discovered.apply_update(
+                PropertyUpdate("devices", "3", "blindLevel", 10)
+            )
+        )
+
+    def test_add_room_again_keeps_devices(self):
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_device(self.bedroom_switch)
+
+        self.discovered.add_room(Room(self.bedroom.identifier, "Master Bedroom"))
+
+        self.assertIs(self.bedroom, self.discovered.find_room_by_name("Master Bedroom"))
+        self.assertIn(self.bedroom_switch.identifier, self.bedroom.devices)
+
+    def test_merge_device_updates_known_device_in_place(self):
+        blind = Blind("3", "Blind", self.bedroom.identifier, "Generic", 10)
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_device(blind)
+
+        changes = self.discovered.merge_device(
+            Blind("3", "Blind", self.bedroom.identifier, "Generic", 70)
+        )
+
+        self.assertIs(blind, self.discovered.find_device_by_identifier("3"))
+        self.assertEqual(70, blind.blind_level)
+        self.assertEqual(
+            [("blind_level", 10, 70)],
+            [
+                (change.attribute, change.old_value, change.new_value)
+                for change in changes
+            ],
+        )
+
+    def test_merge_device_replaces_moved_device(self):
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_room(self.kitchen)
+        self.discovered.add_device(self.bedroom_switch)
+        moved = Switch("2", "Switch", self.kitchen.identifier, "Generic")
+
+        changes = self.discovered.merge_device(moved)
+
+        self.assertEqual([], changes)
+        self.assertNotIn("2", self.bedroom.devices)
+        self.assertIs(moved, self.kitchen.devices["2"])
+
+    def test_remove_devices_except(self):
+        blind = Blind("3", "Blind", self.bedroom.identifier, "Generic", 10)
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_device(blind)
+        self.discovered.add_device(self.bedroom_switch)
+
+        removed = self.discovered.remove_devices_except(["3"])
+
+        self.assertEqual([self.bedroom_switch], removed)
+        self.assertEqual([blind], self.discovered.get_devices())
+
+    def test_merge_heating_updates_known_heating_in_place(self):
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_heating(self.bedroom_heating)
+
+        changes = self.discovered.merge_heating(
+            Heating(self.bedroom.identifier, "Bedroom", 18, 20, False)
+        )
+
+        self.assertIs(self.bedroom_heating, self.bedroom.heating)
+        self.assertEqual(18, self.bedroom_heating.current_temp)
+        self.assertEqual(["current_temp"], [change.attribute for change in changes])
+
+    def test_remove_unmapped_device(self):
+        self.discovered.add_device(self.bedroom_switch)
+        self.discovered.remove_device(self.bedroom_switch)
+        self.assertIsNone(
+            self.discovered.find_device_by_identifier(self.bedroom_switch.identifier)
+        )
+
+    def test_apply_update_ignores_unknown_device(self):
+        self.assertIsNone(
+            self.discovered.apply_update(
+                PropertyUpdate("devices", "missing", "blindLevel", 80)
+            )
+        )
+
+    def test_find_room_by_name_follows_rename(self):
+        self.discovered.add_room(self.bedroom)
+
+        self.discovered.add_room(Room(self.bedroom.identifier, "Master Bedroom"))
+
+        self.assertIsNone(self.discovered.find_room_by_name("Bedroom"))
+        self.assertIs(self.bedroom, self.discovered.find_room_by_name("Master Bedroom"))
+
+    def test_find_room_by_name_returns_first_of_duplicates(self):
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_room(Room("placeIdentifier-3", self.bedroom.name))
+
+        self.assertIs(self.bedroom, self.discovered.find_room_by_name("Bedroom"))
+
+    def test_device_index_follows_mapping_and_removal(self):
+        self.discovered.add_device(self.bedroom_switch)
+        self.discovered.add_room(self.bedroom)
+
+        self.assertIs(
+            self.bedroom_switch,
+            self.discovered.find_device_by_identifier(self.bedroom_switch.identifier),
+        )
+
+        self.discovered.remove_device(self.bedroom_switch)
+
+        self.assertIsNone(
+            self.discovered.find_device_by_identifier(self.bedroom_switch.identifier)
+        )
+
+    def test_heating_is_not_found_as_device(self):
+        self.discovered.add_heating(self.bedroom_heating)
+
+        self.assertIsNone(
+            self.discovered.find_device_by_identifier(self.bedroom_heating.identifier)
+        )
+
+
+class FakeWebSocket:
+    """In-memory stand-in for an application WebSocket connection."""
+
+    def __init__(self, responder=None):
+        self.sent = []
+        self.closed = False
+        self.responder = responder or (lambda request: [])
+        self.incoming: asyncio.Queue = asyncio.Queue()
+
+    async def send(self, message: str):
+        request = json.loads(message)
+        self.sent.append(request)
+        for response in self.responder(request):
+            self.push(response)
+
+    def push(self, response: dict):
+        self.incoming.put_nowait(json.dumps(response))
+
+    def disconnect(self):
+        self.incoming.put_nowait(None)
+
+    async def close(self):
+        self.closed = True
+        self.disconnect()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+def action_success(request: dict) -> list:
+    if request["class"] != ClassMap.ActionRequest.value:
+        return []
+    return [{"class": ClassMap.ActionSuccess.value, "requestID": request["requestID"]}]
+
+
+class FakeConnection:
+    """Awaitable and async context manager, like `websockets.connect`."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def _connect(self) -> FakeWebSocket:
+        if isinstance(self.connection, Exception):
+            raise self.connection
+        return self.connection
+
+    def __await__(self):
+        return self._connect().__await__()
+
+    async def __aenter__(self) -> FakeWebSocket:
+        return await self._connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.connection.close()
+
+
+def fake_connect(*websockets):
+    connections = list(websockets)
+
+    def connect(uri: str) -> FakeConnection:
+        return FakeConnection(connections.pop(0))
+
+    return connect
+
+
+@pytest.mark.enable_socket
+class ClientSessionTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = Client("sid", "user", "pass")
+
+    async def test_session_reuses_single_connection(self):
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            self.assertTrue(client.is_connected)
+            await client.async_set_property("1", "blindLevel", 10)
+            await client.async_set_property("2", "blindLevel", 20)
+
+        self.assertFalse(self.client.is_connected)
+        self.assertTrue(websocket.closed)
+        self.assertEqual(2, len(websocket.sent))
+        self.assertFalse(self.client.request_handler.has_requests())
+
+    async def test_session_answers_keepalive(self):
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            websocket.push({"class": ClassMap.KeepAliveRequest.value})
+            await client.async_set_property("1", "blindLevel", 10)
+
+        self.assertEqual(ClassMap.KeepAliveResponse.value, websocket.sent[0]["class"])
+
+    async def test_session_routes_registered_handler(self):
+        handled = []
+
+        async def on_notice(response: dict):
+            handled.append(response["text"])
+            return {"class": "NoticeAck"}
+
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+        self.client.register_response_handler("Notice", on_notice)
+
+        async with self.client as client:
+            websocket.push({"class": "Notice", "text": "hello"})
+            websocket.push({"class": "Unknown"})
+            await client.async_set_property("1", "blindLevel", 10)
+
+        self.assertEqual(["hello"], handled)
+        self.assertEqual("NoticeAck", websocket.sent[0]["class"])
+        self.assertEqual(1, client.response_dispatcher.unsupported["Unknown"])
+
+    async def test_session_coalesces_writes(self):
+        websocket = FakeWebSocket(action_success)
+        self.client = Client("sid", "user", "pass", coalesce_window=0.01)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            sent = await asyncio.gather(
+                *(client.async_set_property("1", "blindLevel", v) for v in (5, 6, 7))
+            )
+
+        self.assertEqual([7, 7, 7], sent)
+        self.assertEqual(1, len(websocket.sent))
+        self.assertEqual(7, websocket.sent[0]["parameters"][0]["value"])
+
+    async def test_session_rate_limits_actions(self):
+        websocket = FakeWebSocket(action_success)
+        outbound = OutboundScheduler(rate=1000, burst=2)
+        self.client = Client("sid", "user", "pass", outbound=outbound)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            websocket.push({"class": ClassMap.KeepAliveRequest.value})
+            await client.async_set_properties(
+                [("1", "blindLevel", v) for v in range(3)]
+            )
+            await client.async_set_property("1", "blindLevel", 10)
+
+        self.assertEqual(3, outbound.stats[Priority.BULK].granted)
+        self.assertEqual(1, outbound.stats[Priority.INTERACTIVE].granted)
+        self.assertEqual(5, len(websocket.sent))
+
+    async def test_session_reports_metrics(self):
+        websocket = FakeWebSocket(action_success)
+        metrics = PrometheusMetrics()
+        self.client = Client("sid", "user", "pass", metrics=metrics)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            websocket.push({"class": ClassMap.KeepAliveRequest.value})
+            await client.async_set_property("1", "blindLevel", 10)
+
+        text = metrics.render()
+        self.assertIn('frames_received_total{endpoint="application"} 2', text)
+        self.assertIn('frames_sent_total{endpoint="application"} 2', text)
+        self.assertIn('handler_seconds_count{class="KeepAliveRequest"} 1', text)
+        self.assertIn("action_round_trip_seconds_count 1", text)
+        self.assertIn("keepalive_seconds_count 1", text)
+        self.assertIn("requests_in_flight 0", text)
+
+    async def test_session_applies_model_events(self):
+        blind = Blind("3", "Blind", "room-1", "Generic", 10)
+        self.client.discovered.add_device(blind)
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            websocket.push(
+                {
+                    "class": ClassMap.ModelEventResponse.value,
+                    "requestID": "devices_subscription",
+                    "events": [
+                        {
+                            "objectQuery": "devices[id='3']/properties[name='blindLevel']",
+                            "value": 55,
+                        }
+                    ],
+                }
+            )
+            await client.async_set_property("3", "blindLevel", 55)
+
+        self.assertEqual(55, blind.blind_level)
+
+    async def test_session_publishes_model_event_changes(self):
+        blind = Blind("3", "Blind", "room-1", "Generic", 10)
+        self.client.discovered.add_device(blind)
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            events = client.events(types=[Blind])
+            websocket.push(
+                {
+                    "class": ClassMap.ModelEventResponse.value,
+                    "events": [
+                        {
+                            "objectQuery": "devices[id='3']/properties[name='blindLevel']",
+                            "value": 55,
+                            "timestamp": 1000,
+                        }
+                    ],
+                }
+            )
+            change = await asyncio.wait_for(events.__anext__(), 1)
+
+        self.assertEqual(
+            ("3", "blindLevel", 10, 55, 1000),
+            (
+                change.identifier,
+                change.property,
+                change.old_value,
+                change.new_value,
+                change.timestamp,
+            ),
+        )
+        self.assertIs(blind, change.entity)
+        self.assertTrue(events.closed)
+
+    async def test_session_closed_by_remote_fails_pending_requests(self):
+        websocket = FakeWebSocket(lambda request: [])
+        self.client._ws_connect = fake_connect(websocket)
+
+        await self.client.async_connect()
+        task = asyncio.create_task(
+            self.client.async_set_property("1", "blindLevel", 10)
+        )
+        await asyncio.sleep(0)
+        websocket.disconnect()
+
+        with self.assertRaises(SessionClosedError):
+            await task
+        self.assertFalse(self.client.is_connected)
+        await self.client.async_close()
+
+    async def test_session_failure_is_surfaced(self):
+        def responder(request: dict) -> list:
+            return [
+                {
+                    "class": ClassMap.SubscribeSuccess.value,
+                    "requestID": request["requestID"],
+                    "initialValues": [
+                        {
+                            "class": "Device",
+                            "id": "3",
+                            "typeName": "Blind",
+                            "friendlyName": "Blind",
+                            "placeIdentifier": "room-1",
+                            "manufacturer": "Generic",
+                        }
+                    ],
+                }
+            ]
+
+        websocket = FakeWebSocket(responder)
+        self.client._ws_connect = fake_connect(websocket)
+        await self.client.async_connect()
+
+        with self.assertRaises(SessionClosedError) as context:
+            await self.client._fetch_application(
+                [self.client.request_handler.get_subscribe_request("devices")]
+            )
+        self.assertIsInstance(context.exception.__cause__, KeyError)
+
+        with self.assertRaises(SessionClosedError):
+            await self.client.async_set_property("3", "blindLevel", 10)
+        self.assertEqual(1, len(websocket.sent))
+        self.assertFalse(self.client.request_handler.has_requests())
+
+        with self.assertRaises(SessionClosedError):
+            await self.client.async_close()
+
+
+def subscribe_success(initial_values: dict):
+    def responder(request: dict) -> list:
+        if request["class"] == ClassMap.QueryRequest.value:
+            return [
+                {
+                    "class": ClassMap.QuerySuccess.value,
+                    "requestID": request["requestID"],
+                }
+            ]
+        if request["class"] != ClassMap.SubscribeRequest.value:
+            return action_success(request)
+        return [
+            {
+                "class": ClassMap.SubscribeSuccess.value,
+                "requestID": request["requestID"],
+                "initialValues": initial_values[request["objectQuery"]],
+            }
+        ]
+
+    return responder
+
+
+def blind_payload(blind_level: int) -> dict:
+    return {
+        "class": "Device",
+        "id": "3",
+        "typeName": "Blind",
+        "friendlyName": "Blind",
+        "placeIdentifier": "room-1",
+        "manufacturer": "Generic",
+        "properties": [{"name": "blindLevel", "value": blind_level}],
+    }
+
+
+@pytest.mark.enable_socket
+class ClientSyncTest(unittest.TestCase):
+    def test_sync_calls_share_background_session(self):
+        websocket = FakeWebSocket(action_success)
+        client = Client("sid", "user", "pass")
+        client._ws_connect = fake_connect(websocket)
+
+        with client:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(
+                    executor.map(
+                        lambda value: client.set_blind_level("1", value), range(20)
+                    )
+                )
+
+        self.assertEqual(20, len(websocket.sent))
+        self.assertTrue(websocket.closed)
+        self.assertIsNone(client._loop_thread)
+
+    def test_failed_connect_leaves_nothing_waiting(self):
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+        client = Client("sid", "user", "pass")
+        client.BASE_URL = f"ws://127.0.0.1:{port}"
+        client.request_handler.timeout = 0.1
+
+        with self.assertRaises(OSError):
+            client.set_blind_level("1", 10)
+        self.assertFalse(client.request_handler.has_requests())
+
+        time.sleep(0.2)
+        # Expiring a request of the closed loop of the first call must not raise
+        with self.assertRaises(OSError):
+            client.set_blind_level("1", 20)
+
+
+@pytest.mark.enable_socket
+class ClientWithoutSessionTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = Client("sid", "user", "pass")
+
+    async def test_set_property_over_single_use_connection(self):
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+
+        await self.client.async_set_property("1", "blindLevel", 10)
+
+        self.assertTrue(websocket.closed)
+        self.assertFalse(self.client.request_handler.has_requests())
+
+    async def test_lost_response_times_out(self):
+        self.client.request_handler.timeout = 0.05
+        websocket = FakeWebSocket(lambda request: [])
+        self.client._ws_connect = fake_connect(websocket)
+
+        with self.assertRaises(RequestTimeoutError):
+            await self.client.async_set_property("1", "blindLevel", 10)
+
+        self.assertTrue(websocket.closed)
+        self.assertFalse(self.client.request_handler.has_requests())
+
+    async def test_connection_closed_fails_requests(self):
+        websocket = FakeWebSocket(lambda request: [])
+        self.client._ws_connect = fake_connect(websocket)
+        websocket.disconnect()
+
+        with self.assertRaises(SessionClosedError):
+            await self.client.async_set_property("1", "blindLevel", 10)
+
+        self.assertFalse(self.client.request_handler.has_requests())
+
+
+@pytest.mark.enable_socket
+class ClientReconnectTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = Client(
+            "sid", "user", "pass", reconnect=True, backoff=Backoff(initial=0)
+        )
+
+    async def test_reconnect_resubscribes_and_reconciles(self):
+        room = {"class": "Room", "id": "room-1", "placeName": "Bedroom"}
+        first = FakeWebSocket(
+            subscribe_success({"places": [room], "devices": [blind_payload(10)]})
+        )
+        second = FakeWebSocket(
+            subscribe_success({"places": [room], "devices": [blind_payload(60)]})
+        )
+        self.client._ws_connect = fake_connect(first, OSError("unreachable"), second)
+        heating_fetches = []
+
+        async def fetch_heating():
+            heating_fetches.append(True)
+
+        self.client._fetch_heating = fetch_heating
+
+        async with self.client as client:
+            await client.async_discover()
+            blind = client.discovered.find_device_by_identifier("3")
+            events = client.events()
+
+            first.disconnect()
+            change = await asyncio.wait_for(events.__anext__(), 1)
+
+            self.assertTrue(client.is_connected)
+            await client.async_set_property("3", "blindLevel", 60)
+
+        self.assertIs(blind, self.client.discovered.find_device_by_identifier("3"))
+        self.assertEqual(60, blind.blind_level)
+        self.assertEqual((10, 60), (change.old_value, change.new_value))
+        self.assertEqual(
+            ["places", "devices"],
+            [request["objectQuery"] for request in second.sent[:2]],
+        )
+        self.assertEqual(1, self.client.connection_stats.reconnects)
+        self.assertEqual(1, self.client.connection_stats.failed_attempts)
+        self.assertEqual(2, len(heating_fetches))
+
+    async def test_reconnect_removes_vanished_devices(self):
+        room = {"class": "Room", "id": "room-1", "placeName": "Bedroom"}
+        first = FakeWebSocket(
+            subscribe_success({"places": [room], "devices": [blind_payload(10)]})
+        )
+        second = FakeWebSocket(subscribe_success({"places": [room], "devices": []}))
+        self.client._ws_connect = fake_connect(first, second)
+        self.client._fetch_heating = self._no_heating
+
+        async with self.client as client:
+            await client.async_discover()
+            first.disconnect()
+            while client.connection_stats.reconnects == 0:
+                await asyncio.sleep(0.01)
+            await client.async_set_property("3", "blindLevel", 60)
+
+        self.assertIsNone(self.client.discovered.find_device_by_identifier("3"))
+
+    async def test_supervised_session_survives_bad_frame(self):
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            websocket.incoming.put_nowait("not json")
+            results = await client.async_set_properties([("3", "blindLevel", 60)])
+
+        self.assertTrue(results[0].success)
+        self.assertEqual(0, self.client.connection_stats.reconnects)
+
+    async def test_requests_fail_while_reconnecting(self):
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+        self.client.backoff = Backoff(initial=60)
+
+        async with self.client as client:
+            websocket.disconnect()
+            await asyncio.sleep(0)
+
+            self.assertFalse(client.is_connected)
+            with self.assertRaises(SessionClosedError):
+                await client.async_set_property("3", "blindLevel", 60)
+
+    @staticmethod
+    async def _no_heating():
+        pass
+
+
+@pytest.mark.enable_socket
+class ClientSetPropertiesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = Client("sid", "user", "pass")
+
+    async def test_set_properties_pipelines_over_one_session(self):
+        websocket = FakeWebSocket(action_success)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            results = await client.async_set_properties(
+                [("1", "blindLevel", 10), ("2", "heatingTemperatureSetting", 21)]
+            )
+
+        self.assertEqual(2, len(websocket.sent))
+        self.assertEqual(["1", "2"], [result.device_id for result in results])
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(
+            [request["requestID"] for request in websocket.sent],
+            [result.request_id for result in results],
+        )
+
+    async def test_set_properties_reports_partial_failure(self):
+        def responder(request: dict) -> list:
+            if "devices[id='2']" in request["objectQuery"]:
+                return [{"class": "ActionFailure", "requestID": request["requestID"]}]
+            return action_success(request)
+
+        websocket = FakeWebSocket(responder)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            results = await client.async_set_properties(
+                [("1", "blindLevel", 10), ("2", "blindLevel", 20)]
+            )
+
+        self.assertEqual([True, False], [result.success for result in results])
+        self.assertEqual("ActionFailure", results[1].response["class"])
+
+    async def test_set_properties_reports_unanswered_on_disconnect(self):
+        def responder(request: dict) -> list:
+            if "devices[id='2']" in request["objectQuery"]:
+                websocket.disconnect()
+                return []
+            return action_success(request)
+
+        websocket = FakeWebSocket(responder)
+        self.client._ws_connect = fake_connect(websocket)
+
+        await self.client.async_connect()
+        results = await self.client.async_set_properties(
+            [("1", "blindLevel", 10), ("2", "blindLevel", 20)]
+        )
+        await self.client.async_close()
+
+        self.assertEqual([True, False], [result.success for result in results])
+        self.assertIsNone(results[1].response)
+        self.assertFalse(self.client.request_handler.has_requests())
+
+    async def test_set_properties_times_out_unanswered(self):
+        def responder(request: dict) -> list:
+            if "devices[id='2']" in request["objectQuery"]:
+                return []
+            return action_success(request)
+
+        websocket = FakeWebSocket(responder)
+        self.client._ws_connect = fake_connect(websocket)
+
+        async with self.client as client:
+            results = await client.async_set_properties(
+                [("1", "blindLevel", 10), ("2", "blindLevel", 20)], timeout=0.1
+            )
+
+        self.assertEqual([True, False], [result.success for result in results])
+        self.assertIsNone(results[1].response)
+        self.assertFalse(self.client.request_handler.has_requests())
+
+    async def test_set_properties_without_updates(self):
+        self.client._ws_connect = fake_connect()
+        self.assertEqual([], await self.client.async_set_properties([]))
+
+
+@pytest.mark.enable_socket
+class ClientDiscoverTest(unittest.IsolatedAsyncioTestCase):
+    async def test_discover_fetches_endpoints_concurrently(self):
+        client = Client("sid", "user", "pass")
+        started = []
+        both_started = asyncio.Event()
+
+        async def fetch(name: str):
+            started.append(name)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), 1)
+
+        async def fetch_application(requests: list):
+            await fetch("application")
+
+        async def fetch_heating():
+            await fetch("heating")
+
+        client._fetch_application = fetch_application
+        client._fetch_heating = fetch_heating
+
+        await client.async_discover()
+
+        self.assertCountEqual(["application", "heating"], started)
+
+    async def test_failed_fetch_cancels_the_other(self):
+        client = Client("sid", "user", "pass")
+        heating_cancelled = asyncio.Event()
+
+        async def fetch_application(requests: list):
+            raise OSError("refused")
+
+        async def fetch_heating():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                heating_cancelled.set()
+                raise
+
+        client._fetch_application = fetch_application
+        client._fetch_heating = fetch_heating
+
+        with self.assertRaises(OSError):
+            await asyncio.wait_for(client.async_discover(), 1)
+
+        self.assertTrue(heating_cancelled.is_set())
+
+    def create_counting_client(self, **kwargs) -> Client:
+        self.fetches = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+        async def fetch_application(requests: list):
+            self.fetches += 1
+            await self.release.wait()
+
+        async def fetch_heating():
+            pass
+
+        client = Client("sid", "user", "pass", **kwargs)
+        patcher = mock.patch.multiple(
+            client, _fetch_application=fetch_application, _fetch_heating=fetch_heating
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return client
+
+    async def test_concurrent_discoveries_are_deduplicated(self):
+        client = self.create_counting_client()
+        self.release.clear()
+
+        callers = [asyncio.create_task(client.async_discover()) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.release.set()
+        await asyncio.gather(*callers)
+
+        self.assertEqual(1, self.fetches)
+        await client.async_discover()
+        self.assertEqual(2, self.fetches)
+
+    async def test_cancelled_caller_does_not_cancel_shared_discovery(self):
+        client = self.create_counting_client()
+        self.release.clear()
+
+        first = asyncio.create_task(client.async_discover())
+        second = asyncio.create_task(client.async_discover())
+        await asyncio.sleep(0)
+        first.cancel()
+        self.release.set()
+        await second
+
+        self.assertEqual(1, self.fetches)
+
+    async def test_discovery_is_cached_for_ttl(self):
+        client = self.create_counting_client(discovery_ttl=60)
+
+        await client.async_discover()
+        await client.async_discover()
+        self.assertEqual(1, self.fetches)
+
+        await client.async_discover(force=True)
+        self.assertEqual(2, self.fetches)
+
+        client._discovered_at -= 61
+        await client.async_discover()
+        self.assertEqual(3, self.fetches)
+
+    async def test_topology_event_invalidates_cache(self):
+        client = self.create_counting_client(discovery_ttl=60)
+        await client.async_discover()
+
+        client._handle_model_event(
+            {"events": [{"objectQuery": "devices[id='new']", "modelEventType": "add"}]}
+        )
+        await client.async_discover()
+
+        self.assertEqual(2, self.fetches)
+
+    async def test_event_for_unknown_device_invalidates_cache(self):
+        client = self.create_counting_client(discovery_ttl=60)
+        await client.async_discover()
+
+        client._handle_model_event(
+            {
+                "events": [
+                    {
+                        "objectQuery": "devices[id='unknown']"
+                        "/properties[name='blindLevel']",
+                        "propertyName": "value",
+                        "value": 10,
+                    }
+                ]
+            }
+        )
+        await client.async_discover()
+
+        self.assertEqual(2, self.fetches)
+
+    async def test_invalidation_during_discovery_is_not_lost(self):
+        client = self.create_counting_client(discovery_ttl=60)
+        self.release.clear()
+
+        discovery = asyncio.create_task(client.async_discover())
+        await asyncio.sleep(0)
+        client.invalidate_discovery()
+        self.release.set()
+        await discovery
+        await client.async_discover()
+
+        self.assertEqual(2, self.fetches)
+
 
 if __name__ == "__main__":
     unittest.main()
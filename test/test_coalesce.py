@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+
+import pytest
+
+from iolite_client.coalesce import WriteCoalescer
+
+
+@pytest.mark.enable_socket
+class WriteCoalescerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.sent: list = []
+        self.coalescer = WriteCoalescer(self.send, window=0.01)
+
+    async def send(self, device_id: str, property: str, value: float):
+        self.sent.append((device_id, property, value))
+
+    async def test_last_value_wins(self):
+        results = await asyncio.gather(
+            *(self.coalescer.write("1", "blindLevel", value) for value in range(10))
+        )
+
+        self.assertEqual([("1", "blindLevel", 9)], self.sent)
+        self.assertEqual([9] * 10, results)
+        self.assertEqual(9, self.coalescer.coalesced)
+        self.assertFalse(self.coalescer.has_pending())
+
+    async def test_properties_are_kept_apart(self):
+        await asyncio.gather(
+            self.coalescer.write("1", "blindLevel", 10),
+            self.coalescer.write("2", "blindLevel", 20),
+            self.coalescer.write("1", "heatingTemperatureSetting", 21),
+        )
+
+        self.assertCountEqual(
+            [
+                ("1", "blindLevel", 10),
+                ("2", "blindLevel", 20),
+                ("1", "heatingTemperatureSetting", 21),
+            ],
+            self.sent,
+        )
+
+    async def test_writes_after_window_are_sent_in_order(self):
+        release = asyncio.Event()
+
+        async def slow_send(device_id: str, property: str, value: float):
+            if value == 1:
+                await release.wait()
+            self.sent.append(value)
+
+        self.coalescer.send = slow_send
+        first = asyncio.create_task(self.coalescer.write("1", "blindLevel", 1))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(self.coalescer.write("1", "blindLevel", 2))
+        await asyncio.sleep(0.02)
+        release.set()
+
+        self.assertEqual([1, 2], await asyncio.gather(first, second))
+        self.assertEqual([1, 2], self.sent)
+
+    async def test_error_reaches_every_caller(self):
+        async def failing_send(device_id: str, property: str, value: float):
+            raise OSError("down")
+
+        self.coalescer.send = failing_send
+        results = await asyncio.gather(
+            self.coalescer.write("1", "blindLevel", 1),
+            self.coalescer.write("1", "blindLevel", 2),
+            return_exceptions=True,
+        )
+
+        self.assertTrue(all(isinstance(result, OSError) for result in results))
+
+    async def test_cancelled_caller_does_not_cancel_write(self):
+        self.coalescer.window = 1
+        cancelled = asyncio.create_task(self.coalescer.write("1", "blindLevel", 1))
+        waiting = asyncio.create_task(self.coalescer.write("1", "blindLevel", 2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        await self.coalescer.flush()
+
+        self.assertEqual(2, await waiting)
+        self.assertEqual([("1", "blindLevel", 2)], self.sent)
+
+    def test_negative_window(self):
+        with self.assertRaises(ValueError):
+            WriteCoalescer(self.send, window=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
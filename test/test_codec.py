@@ -0,0 +1,56 @@
+import importlib.util
+import unittest
+
+from iolite_client.codec import JsonCodec, OrjsonCodec, UjsonCodec, get_codec
+
+PAYLOAD = {
+    "class": "SubscribeSuccess",
+    "requestID": "devices_abc",
+    "initialValues": [{"id": "1", "placeName": "Küche", "blindLevel": 12.5}],
+}
+
+
+class CodecTestMixin:
+    codec: JsonCodec
+
+    def test_round_trip(self):
+        self.assertEqual(PAYLOAD, self.codec.loads(self.codec.dumps(PAYLOAD)))
+
+    def test_dumps_text(self):
+        self.assertIsInstance(self.codec.dumps(PAYLOAD), str)
+
+    def test_loads_bytes(self):
+        frame = JsonCodec().dumps(PAYLOAD).encode()
+        self.assertEqual(PAYLOAD, self.codec.loads(frame))
+
+
+class JsonCodecTest(CodecTestMixin, unittest.TestCase):
+    codec = JsonCodec()
+
+
+@unittest.skipUnless(importlib.util.find_spec("orjson"), "orjson is not installed")
+class OrjsonCodecTest(CodecTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.codec = OrjsonCodec()
+
+
+@unittest.skipUnless(importlib.util.find_spec("ujson"), "ujson is not installed")
+class UjsonCodecTest(CodecTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.codec = UjsonCodec()
+
+
+class GetCodecTest(unittest.TestCase):
+    def test_by_name(self):
+        self.assertIsInstance(get_codec("json"), JsonCodec)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+
+    def test_default_is_shared(self):
+        self.assertIs(get_codec(), get_codec())
+
+
+if __name__ == "__main__":
+    unittest.main()
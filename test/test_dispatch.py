@@ -0,0 +1,79 @@
+import unittest
+
+import pytest
+
+from iolite_client.dispatch import ResponseDispatcher, get_request_kind
+
+
+class GetRequestKindTest(unittest.TestCase):
+    def test_kind(self):
+        self.assertEqual("places", get_request_kind("places_abcdefghij"))
+        self.assertEqual("ActionRequest", get_request_kind("ActionRequest_abc"))
+
+    def test_without_kind(self):
+        self.assertIsNone(get_request_kind(None))
+        self.assertIsNone(get_request_kind("abcdefghij"))
+
+
+@pytest.mark.enable_socket
+class ResponseDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.dispatcher = ResponseDispatcher()
+        self.handled: list = []
+
+    def handler(self, name: str, request=None):
+        async def handle(response: dict):
+            self.handled.append((name, response))
+            return request
+
+        return handle
+
+    async def test_dispatch_by_class(self):
+        response = {"class": "QuerySuccess", "requestID": "QueryRequest_abc"}
+        self.dispatcher.register("QuerySuccess", self.handler("query"))
+
+        await self.dispatcher.dispatch(response)
+
+        self.assertEqual([("query", response)], self.handled)
+
+    async def test_request_kind_takes_precedence(self):
+        self.dispatcher.register("SubscribeSuccess", self.handler("any"))
+        self.dispatcher.register("SubscribeSuccess", self.handler("places"), "places")
+
+        await self.dispatcher.dispatch(
+            {"class": "SubscribeSuccess", "requestID": "places_abc"}
+        )
+        await self.dispatcher.dispatch(
+            {"class": "SubscribeSuccess", "requestID": "rooms_abc"}
+        )
+
+        self.assertEqual(["places", "any"], [name for name, _ in self.handled])
+
+    async def test_handler_request_is_returned(self):
+        self.dispatcher.register("Ping", self.handler("ping", {"class": "Pong"}))
+
+        request = await self.dispatcher.dispatch({"class": "Ping"})
+
+        self.assertEqual({"class": "Pong"}, request)
+
+    async def test_unsupported_is_counted(self):
+        with self.assertLogs("iolite_client.dispatch", "WARNING") as logs:
+            await self.dispatcher.dispatch({"class": "Unknown", "payload": "x" * 100})
+            await self.dispatcher.dispatch({"class": "Unknown"})
+            await self.dispatcher.dispatch({})
+
+        self.assertEqual({"Unknown": 2, "<missing>": 1}, self.dispatcher.unsupported)
+        self.assertEqual(2, len(logs.output))
+        self.assertNotIn("payload", logs.output[0])
+
+    async def test_unregister(self):
+        self.dispatcher.register("QuerySuccess", self.handler("query"))
+        self.dispatcher.unregister("QuerySuccess")
+
+        await self.dispatcher.dispatch({"class": "QuerySuccess"})
+
+        self.assertEqual([], self.handled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,15 @@
 import unittest
 
-from iolite_client.entity import Heating, RadiatorValve, Room, Switch
+from iolite_client.entity import (
+    Blind,
+    Heating,
+    HumiditySensor,
+    InFloorValve,
+    Lamp,
+    RadiatorValve,
+    Room,
+    Switch,
+)
 
 
 class RoomTest(unittest.TestCase):
@@ -69,5 +78,36 @@ class RoomTest(unittest.TestCase):
         )
 
 
+class CompactEntityTest(unittest.TestCase):
+    def test_entities_have_no_instance_dict(self):
+        entities = [
+            Room("room", "Room"),
+            Heating("room", "Room", 20.0, 21.0, None),
+            Switch("1", "Switch", "room", "Gira"),
+            Lamp("2", "Lamp", "room", "Gira"),
+            Blind("3", "Blind", "room", "Somfy", 10),
+            HumiditySensor("4", "Sensor", "room", "Bosch", 20.0, 45.0),
+            RadiatorValve("5", "Valve", "room", "Danfoss", 20.0, 80, "auto", 10),
+            InFloorValve("6", "Floor", "room", "Möhlenhoff", 20.0, 21.0, "ok"),
+        ]
+
+        for entity in entities:
+            self.assertFalse(hasattr(entity, "__dict__"), type(entity).__name__)
+
+    def test_repeated_strings_are_interned(self):
+        # Built at runtime, as decoded JSON would be, so they are not shared
+        manufacturer = "".join(["Dan", "foss"])
+        heating_mode = "".join(["au", "to"])
+        model_name = "".join(["Al", "ly"])
+        valve = RadiatorValve(
+            "1", "Valve", "room", manufacturer, 20.0, 80, heating_mode, 10
+        )
+        valve.model_name = model_name
+
+        self.assertIs("Danfoss", valve.manufacturer)
+        self.assertIs("auto", valve.heating_mode)
+        self.assertIs("Ally", valve.model_name)
+
+
 if __name__ == "__main__":
     unittest.main()
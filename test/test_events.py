@@ -0,0 +1,91 @@
+import unittest
+
+import pytest
+
+from iolite_client.entity import Blind, RadiatorValve
+from iolite_client.events import EventBus, OverflowPolicy
+from iolite_client.model_event import PropertyChange
+
+
+def blind_change(value: int) -> PropertyChange:
+    blind = Blind("1", "Blind", "room-1", "Generic", value)
+    return PropertyChange("1", "blindLevel", "blind_level", 0, value, None, blind)
+
+
+@pytest.mark.enable_socket
+class EventBusTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bus = EventBus()
+
+    async def test_subscription_receives_published_changes(self):
+        subscription = self.bus.subscribe()
+        self.bus.publish(blind_change(10))
+        self.bus.publish(blind_change(20))
+        self.bus.close()
+
+        values = [change.new_value async for change in subscription]
+
+        self.assertEqual([10, 20], values)
+
+    async def test_closed_subscription_keeps_stopping(self):
+        subscription = self.bus.subscribe()
+        subscription.close()
+
+        self.assertEqual([], [change async for change in subscription])
+        with self.assertRaises(StopAsyncIteration):
+            await subscription.__anext__()
+
+    async def test_subscription_filters_by_type(self):
+        subscription = self.bus.subscribe(types=[RadiatorValve])
+        self.bus.publish(blind_change(10))
+
+        self.assertEqual(0, subscription._queue.qsize())
+
+    async def test_drop_oldest_keeps_latest_changes(self):
+        subscription = self.bus.subscribe(maxsize=2)
+        for value in (1, 2, 3):
+            self.bus.publish(blind_change(value))
+        subscription.close()
+
+        values = [change.new_value async for change in subscription]
+
+        self.assertEqual([2, 3], values)
+        self.assertEqual(1, subscription.dropped)
+
+    async def test_drop_newest_keeps_earliest_changes(self):
+        subscription = self.bus.subscribe(
+            maxsize=2, overflow=OverflowPolicy.DROP_NEWEST
+        )
+        for value in (1, 2, 3):
+            self.bus.publish(blind_change(value))
+        subscription.close()
+
+        values = [change.new_value async for change in subscription]
+
+        self.assertEqual([1, 2], values)
+        self.assertEqual(1, subscription.dropped)
+
+    async def test_close_policy_ends_slow_subscription(self):
+        subscription = self.bus.subscribe(maxsize=1, overflow=OverflowPolicy.CLOSE)
+        self.bus.publish(blind_change(1))
+        self.bus.publish(blind_change(2))
+
+        values = [change.new_value async for change in subscription]
+
+        self.assertEqual([1], values)
+        self.assertTrue(subscription.closed)
+        self.assertEqual([], self.bus.subscriptions)
+
+    async def test_context_manager_unsubscribes(self):
+        async with self.bus.subscribe() as subscription:
+            self.assertEqual([subscription], self.bus.subscriptions)
+
+        self.assertEqual([], self.bus.subscriptions)
+
+    def test_invalid_maxsize(self):
+        with self.assertRaises(ValueError):
+            self.bus.subscribe(maxsize=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import pytest
+import websockets
+
+from iolite_client.client import Client
+from iolite_client.entity import Blind, RadiatorValve
+from iolite_client.exceptions import RequestTimeoutError, SessionClosedError
+from iolite_client.fake_server import FakeHome, FakeIOLiteServer, Faults
+from iolite_client.heating_scheduler import Day, HeatingScheduler
+from iolite_client.metrics import PrometheusMetrics
+from iolite_client.oauth_handler import AsyncOAuthHandler
+from iolite_client.outbound import OutboundScheduler
+from iolite_client.reconnect import Backoff
+from iolite_client.request_handler import ClassMap
+
+
+class FakeHomeTest(unittest.TestCase):
+    def test_synthetic_home(self):
+        home = FakeHome.synthetic("sid", rooms=3, devices_per_room=4)
+
+        self.assertEqual(3, len(home.rooms))
+        self.assertEqual(3, len(home.heatings))
+        self.assertEqual(12, len(home.devices))
+        self.assertEqual(12, len({device["id"] for device in home.devices}))
+        self.assertIsNotNone(home.find_device("sid-device-11"))
+
+
+@pytest.mark.enable_socket
+class FakeIOLiteServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.home = FakeHome.synthetic("sid", rooms=2, devices_per_room=3)
+        self.server = FakeIOLiteServer([self.home], "user", "pass")
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def create_client(self, **kwargs) -> Client:
+        client = Client("sid", "user", "pass", **kwargs)
+        client.BASE_URL = self.server.ws_url
+        return client
+
+    async def test_discover(self):
+        metrics = PrometheusMetrics()
+        client = self.create_client(metrics=metrics)
+
+        await client.async_discover()
+
+        rooms = client.discovered.get_rooms()
+        self.assertEqual(2, len(rooms))
+        self.assertEqual(6, len(client.discovered.get_devices()))
+        self.assertEqual(21.0, rooms[0].heating.target_temp)
+        self.assertIsInstance(
+            client.discovered.find_device_by_identifier("sid-device-0"), RadiatorValve
+        )
+        self.assertIn("iolite_client_discovery_seconds_count 1", metrics.render())
+
+    async def test_concurrent_sync_discoveries(self):
+        client = self.create_client()
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            await asyncio.gather(
+                *(loop.run_in_executor(executor, client.discover) for _ in range(4))
+            )
+
+        self.assertEqual(6, len(client.discovered.get_devices()))
+        self.assertIsNone(client._discovery)
+
+    async def test_session_action_is_announced(self):
+        async with self.create_client() as client:
+            await client.async_discover()
+            events = client.events(types=[Blind])
+            await client.async_set_property("sid-device-1", "blindLevel", 70)
+            change = await asyncio.wait_for(events.__anext__(), 1)
+
+        self.assertEqual(70, change.new_value)
+        self.assertEqual(
+            70, self.home.find_device("sid-device-1")["properties"][0]["value"]
+        )
+        self.assertEqual(1, self.server.connections - 1)  # plus the heating socket
+
+    async def test_requests_expired_while_rate_limited_are_not_sent(self):
+        outbound = OutboundScheduler(rate=5, burst=1)
+        updates = [("sid-device-1", "blindLevel", value) for value in range(10)]
+
+        async with self.create_client(outbound=outbound) as client:
+            results = await client.async_set_properties(updates, timeout=0.5)
+
+        applied = [result for result in results if result.success]
+        self.assertGreater(len(applied), 0)
+        self.assertLess(len(applied), len(updates))
+        for result in results:
+            if not result.success:
+                self.assertIsInstance(result.error, RequestTimeoutError)
+        self.assertEqual(
+            len(applied), self.server.received[ClassMap.ActionRequest.value]
+        )
+        self.assertEqual(
+            applied[-1].value,
+            self.home.find_device("sid-device-1")["properties"][0]["value"],
+        )
+
+    async def test_keepalive_is_answered(self):
+        self.server.keepalive_interval = 0.01
+        async with self.create_client() as client:
+            await asyncio.sleep(0.05)
+            await client.async_set_property("sid-device-1", "blindLevel", 1)
+
+        self.assertGreater(self.server.received[ClassMap.KeepAliveResponse.value], 0)
+
+    async def test_wrong_credentials_are_rejected(self):
+        client = Client("sid", "user", "wrong")
+        client.BASE_URL = self.server.ws_url
+
+        with self.assertRaises(Exception):
+            await client.async_connect()
+
+    async def test_rejected_heating_connection_is_not_retried(self):
+        client = Client(
+            "sid", "user", "wrong", reconnect=True, backoff=Backoff(initial=0.01)
+        )
+        client.BASE_URL = self.server.ws_url
+
+        with self.assertRaises(websockets.InvalidStatus):
+            await asyncio.wait_for(client._fetch_heating(), 5)
+
+    async def test_dropped_response_times_out(self):
+        self.server.faults = Faults(drop_rate=1)
+        async with self.create_client() as client:
+            results = await client.async_set_properties(
+                [("sid-device-1", "blindLevel", 5)], timeout=0.05
+            )
+
+        self.assertIsInstance(results[0].error, RequestTimeoutError)
+
+    async def test_disconnect_triggers_reconnect(self):
+        backoff = Backoff(initial=0.01, jitter=0)
+        async with self.create_client(reconnect=True, backoff=backoff) as client:
+            await client.async_set_property("sid-device-1", "blindLevel", 5)
+            await self.server.disconnect_all()
+            while client.connection_stats.reconnects == 0:
+                await asyncio.sleep(0.01)
+            await client.async_set_property("sid-device-1", "blindLevel", 6)
+
+        self.assertEqual(
+            6, self.home.find_device("sid-device-1")["properties"][0]["value"]
+        )
+
+    async def test_disconnect_after(self):
+        self.server.faults.disconnect_after = 2
+        async with self.create_client() as client:
+            await client.async_set_property("sid-device-1", "blindLevel", 5)
+            with self.assertRaises(SessionClosedError):
+                await client.async_set_property("sid-device-1", "blindLevel", 6)
+
+    async def test_heating_api(self):
+        scheduler = HeatingScheduler("sid", "user", "pass", "sid-room-0")
+        scheduler.BASE_URL = self.server.base_url
+        loop = asyncio.get_running_loop()
+
+        await loop.run_in_executor(None, scheduler.set_comfort_temperature, 22)
+        response = await loop.run_in_executor(
+            None, scheduler.add_interval, Day.MONDAY, 6, 30, 60
+        )
+        await loop.run_in_executor(
+            None, scheduler.delete_interval, response.json()["id"]
+        )
+
+        self.assertEqual(22, self.home.heatings[0]["comfortTemperature"])
+        self.assertEqual([], self.home.heatings[0]["intervals"])
+
+    async def test_oauth(self):
+        async with aiohttp.ClientSession() as session:
+            handler = AsyncOAuthHandler(
+                "user", "pass", session, base_url=self.server.base_url
+            )
+            token = await handler.get_access_token("code", "name")
+            refreshed = await handler.get_new_access_token(token["refresh_token"])
+            sid = await handler.get_sid(refreshed["access_token"])
+
+        self.assertEqual("sid", sid)
+
+
+if __name__ == "__main__":
+    unittest.main()
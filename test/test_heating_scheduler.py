@@ -1,8 +1,10 @@
 import unittest
 from base64 import b64encode
+from test.test_tracing import CollectingTracer
 from typing import Dict
 
 import responses
+from requests import HTTPError
 from responses.matchers import json_params_matcher
 
 from iolite_client.heating_scheduler import (
@@ -11,6 +13,7 @@ from iolite_client.heating_scheduler import (
     HeatingSchedulerError,
     Temperature,
 )
+from iolite_client.outbound import OutboundScheduler, Priority
 
 
 class TestClient(unittest.TestCase):
@@ -93,6 +96,38 @@ class TestClient(unittest.TestCase):
         self.client.delete_interval("abc-def")
         self.assertEqual(1, len(responses.calls))
 
+    @responses.activate
+    def test_calls_are_rate_limited(self):
+        outbound = OutboundScheduler(rate=1000, burst=1)
+        client = HeatingScheduler(
+            "MySID", "Charlie", "secret", "placeIdentifier-1", outbound=outbound
+        )
+        responses.add(responses.DELETE, self.scheduler_endpoint + "/intervals/abc-def")
+
+        client.delete_interval("abc-def")
+        client.delete_interval("abc-def")
+
+        self.assertEqual(2, outbound.stats[Priority.BULK].granted)
+        self.assertGreater(outbound.stats[Priority.BULK].max_wait, 0)
+
+    @responses.activate
+    def test_calls_are_traced(self):
+        tracer = CollectingTracer()
+        client = HeatingScheduler(
+            "MySID", "Charlie", "secret", "placeIdentifier-1", tracer=tracer
+        )
+        responses.add(
+            responses.DELETE, self.scheduler_endpoint + "/intervals/abc", status=404
+        )
+
+        with self.assertRaises(HTTPError):
+            client.delete_interval("abc")
+
+        self.assertEqual("iolite.heating_api", tracer.ended[0].name)
+        self.assertEqual("DELETE", tracer.ended[0].attributes["http.request.method"])
+        self.assertEqual(404, tracer.ended[0].attributes["http.response.status_code"])
+        self.assertNotIn("MySID", str(tracer.ended[0].attributes))
+
 
 class TestTemperature(unittest.TestCase):
     def test_within_range_valid(self):
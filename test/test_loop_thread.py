@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import unittest
+
+import pytest
+
+from iolite_client.loop_thread import LoopThread
+
+
+@pytest.mark.enable_socket
+class LoopThreadTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.loop_thread = LoopThread()
+        self.loop_thread.start()
+
+    def tearDown(self) -> None:
+        self.loop_thread.stop()
+
+    def test_run_returns_result_from_loop_thread(self):
+        async def thread_name():
+            return threading.current_thread().name
+
+        self.assertEqual("iolite-client", self.loop_thread.run(thread_name()))
+
+    def test_coroutines_share_one_loop(self):
+        async def running_loop():
+            return asyncio.get_running_loop()
+
+        first = self.loop_thread.run(running_loop())
+        second = self.loop_thread.run(running_loop())
+
+        self.assertIs(first, second)
+
+    def test_start_is_idempotent(self):
+        loop = self.loop_thread.loop
+        self.loop_thread.start()
+        self.assertIs(loop, self.loop_thread.loop)
+
+    def test_stop(self):
+        self.loop_thread.stop()
+
+        self.assertFalse(self.loop_thread.is_running)
+        with self.assertRaises(RuntimeError):
+            self.loop_thread.submit(asyncio.sleep(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from test.test_client import FakeWebSocket, action_success, fake_connect
+from unittest import mock
+
+import pytest
+
+from iolite_client.client import Client
+from iolite_client.entity import Room
+from iolite_client.manager import ClientManager
+
+
+@pytest.mark.enable_socket
+class ClientManagerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.websockets: dict = {}
+
+        def client_factory(sid: str, username: str, password: str) -> Client:
+            client = Client(sid, username, password)
+            self.websockets[sid] = FakeWebSocket(action_success)
+            self.patch_connect(client, fake_connect(self.websockets[sid]))
+            return client
+
+        self.manager = ClientManager(
+            [(f"sid-{i}", "user", "pass") for i in range(5)],
+            max_concurrent_handshakes=2,
+            client_factory=client_factory,
+        )
+
+    def patch_connect(self, client: Client, connect):
+        patcher = mock.patch.object(client, "_ws_connect", connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_handshakes_are_capped(self):
+        active = []
+        peak = []
+
+        for client in self.manager.clients.values():
+            connect = client._ws_connect
+
+            async def slow_handshake(connection):
+                active.append(True)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                active.pop()
+                return await connection
+
+            self.patch_connect(
+                client,
+                lambda uri, connect=connect: slow_handshake(connect(uri)),
+            )
+
+        errors = await self.manager.async_connect()
+
+        self.assertEqual({None}, set(errors.values()))
+        self.assertEqual(2, max(peak))
+        await self.manager.async_close()
+
+    async def test_fan_out_set_properties(self):
+        async with self.manager as manager:
+            results = await manager.async_set_properties(
+                {"sid-1": [("1", "blindLevel", 10)], "sid-3": [("2", "blindLevel", 5)]}
+            )
+
+        self.assertEqual(["sid-1", "sid-3"], list(results))
+        self.assertTrue(all(r.success for rs in results.values() for r in rs))
+        self.assertEqual(1, len(self.websockets["sid-1"].sent))
+        self.assertEqual(0, len(self.websockets["sid-2"].sent))
+
+    async def test_failures_are_reported_per_home(self):
+        self.patch_connect(
+            self.manager.get_client("sid-2"), fake_connect(OSError("down"))
+        )
+
+        errors = await self.manager.async_connect()
+
+        self.assertIsInstance(errors["sid-2"], OSError)
+        self.assertIsNone(errors["sid-1"])
+        await self.manager.async_close()
+
+    def test_aggregated_lookup(self):
+        room = Room("room-1", "Bedroom")
+        self.manager.get_client("sid-4").discovered.add_room(room)
+
+        self.assertEqual([("sid-4", room)], list(self.manager.get_rooms()))
+        self.assertIsNone(self.manager.find_device_by_identifier("missing"))
+
+    def test_duplicate_home(self):
+        with self.assertRaises(ValueError):
+            self.manager.add_home("sid-1", "user", "pass")
+
+
+if __name__ == "__main__":
+    unittest.main()
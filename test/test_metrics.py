@@ -0,0 +1,70 @@
+import unittest
+
+from iolite_client.metrics import Metrics, PrometheusMetrics
+
+
+class MetricsTest(unittest.TestCase):
+    def test_default_discards_everything(self):
+        metrics = Metrics()
+        metrics.frame_received("application")
+        metrics.observe_handler("ActionSuccess", 0.1)
+        metrics.set_in_flight(3)
+
+
+class PrometheusMetricsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = PrometheusMetrics(buckets=(0.01, 0.1))
+
+    def test_counters(self):
+        self.metrics.frame_received("application")
+        self.metrics.frame_received("application")
+        self.metrics.frame_received("heating")
+        self.metrics.reconnected()
+
+        text = self.metrics.render()
+
+        self.assertIn("# TYPE iolite_client_frames_received_total counter", text)
+        self.assertIn(
+            'iolite_client_frames_received_total{endpoint="application"} 2', text
+        )
+        self.assertIn('iolite_client_frames_received_total{endpoint="heating"} 1', text)
+        self.assertIn("iolite_client_reconnects_total 1", text)
+
+    def test_gauge(self):
+        self.metrics.set_in_flight(5)
+        self.metrics.set_in_flight(2)
+
+        text = self.metrics.render()
+
+        self.assertIn("# TYPE iolite_client_requests_in_flight gauge", text)
+        self.assertIn("iolite_client_requests_in_flight 2", text)
+
+    def test_histogram(self):
+        self.metrics.observe_handler("ActionSuccess", 0.005)
+        self.metrics.observe_handler("ActionSuccess", 0.05)
+        self.metrics.observe_handler("ActionSuccess", 1)
+
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn("# TYPE iolite_client_handler_seconds histogram", lines)
+        prefix = 'iolite_client_handler_seconds_bucket{class="ActionSuccess",le='
+        self.assertIn(prefix + '"0.01"} 1', lines)
+        self.assertIn(prefix + '"0.1"} 2', lines)
+        self.assertIn(prefix + '"+Inf"} 3', lines)
+        self.assertIn(
+            'iolite_client_handler_seconds_count{class="ActionSuccess"} 3', lines
+        )
+        self.assertIn(
+            'iolite_client_handler_seconds_sum{class="ActionSuccess"} 1.055', lines
+        )
+
+    def test_label_values_are_escaped(self):
+        self.metrics.observe_handler('Bad"Class', 0.001)
+        self.assertIn('class="Bad\\"Class"', self.metrics.render())
+
+    def test_empty(self):
+        self.assertEqual("\n", self.metrics.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
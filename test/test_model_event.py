@@ -0,0 +1,86 @@
+import unittest
+
+from iolite_client.model_event import (
+    PropertyUpdate,
+    changes_topology,
+    parse_model_event,
+)
+
+
+class ParseModelEventTest(unittest.TestCase):
+    def test_parse_device_property_update(self):
+        updates = parse_model_event(
+            {
+                "class": "ModelEventResponse",
+                "events": [
+                    {
+                        "objectQuery": "devices[id='id-1']/properties[name='blindLevel']",
+                        "propertyName": "value",
+                        "value": 40,
+                        "timestamp": 1580472165268,
+                    }
+                ],
+            }
+        )
+        self.assertEqual(
+            [PropertyUpdate("devices", "id-1", "blindLevel", 40, 1580472165268)],
+            updates,
+        )
+
+    def test_parse_place_property_update(self):
+        updates = parse_model_event(
+            {
+                "events": [
+                    {
+                        "objectQuery": "places[id='room-1']/properties[name='currentTemperature']",
+                        "value": 20.5,
+                    }
+                ],
+            }
+        )
+        self.assertEqual(
+            [PropertyUpdate("places", "room-1", "currentTemperature", 20.5)], updates
+        )
+
+    def test_parse_ignores_unrelated_events(self):
+        updates = parse_model_event(
+            {
+                "events": [
+                    {"objectQuery": "situationProfileModel", "value": 1},
+                    {
+                        "objectQuery": "devices[id='id-1']/properties[name='blindLevel']",
+                        "propertyName": "requestedValue",
+                        "value": 40,
+                    },
+                    {"objectQuery": "devices[id='id-1']/properties[name='blindLevel']"},
+                ],
+            }
+        )
+        self.assertEqual([], updates)
+
+    def test_parse_without_events(self):
+        self.assertEqual([], parse_model_event({"class": "ModelEventResponse"}))
+
+
+class ChangesTopologyTest(unittest.TestCase):
+    def test_property_values_do_not_change_topology(self):
+        payload = {
+            "events": [
+                {
+                    "objectQuery": "devices[id='1']/properties[name='blindLevel']",
+                    "value": 10,
+                }
+            ]
+        }
+
+        self.assertFalse(changes_topology(payload))
+
+    def test_device_and_place_events_change_topology(self):
+        self.assertTrue(changes_topology({"events": [{"objectQuery": "devices"}]}))
+        self.assertTrue(
+            changes_topology({"events": [{"objectQuery": "places[id='room-1']"}]})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
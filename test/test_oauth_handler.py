@@ -1,6 +1,7 @@
 import datetime
 import json
 import unittest
+from test.test_tracing import CollectingTracer
 from unittest.mock import Mock
 
 import aiohttp
@@ -44,6 +45,22 @@ class OAuthHandlerTest(unittest.TestCase):
         response = oauth_handler.get_access_token("real-code", "my-device")
         self.assertIsInstance(response, dict)
 
+    @responses.activate
+    def test_calls_are_traced(self):
+        tracer = CollectingTracer()
+        responses.add(
+            responses.GET, "https://remote.iolite.de/ui/sid", json={"SID": "sid"}
+        )
+        responses.add(responses.POST, "https://remote.iolite.de/ui/token", status=403)
+        oauth_handler = OAuthHandler("user", "password", tracer=tracer)
+
+        oauth_handler.get_sid("token")
+        with self.assertRaises(HTTPError):
+            oauth_handler.get_new_access_token("refresh-token")
+
+        self.assertEqual(["iolite.oauth.sid", "iolite.oauth.refresh"], tracer.names())
+        self.assertIsInstance(tracer.ended[1].error, HTTPError)
+
 
 class AsyncOAuthHandlerTest(unittest.TestCase):
     @pytest.mark.asyncio
@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+
+import pytest
+
+from iolite_client.outbound import OutboundScheduler, Priority, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=2, capacity=3, clock=self.clock)
+
+    def test_burst_then_refill(self):
+        self.assertEqual([True] * 3, [self.bucket.try_acquire() for _ in range(3)])
+        self.assertFalse(self.bucket.try_acquire())
+        self.assertEqual(0.5, self.bucket.delay())
+
+        self.clock.now = 0.5
+        self.assertTrue(self.bucket.try_acquire())
+        self.assertFalse(self.bucket.try_acquire())
+
+    def test_refill_is_capped(self):
+        self.clock.now = 100
+        self.assertEqual([True] * 3, [self.bucket.try_acquire() for _ in range(3)])
+        self.assertFalse(self.bucket.try_acquire())
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=1, capacity=0)
+
+
+@pytest.mark.enable_socket
+class OutboundSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.scheduler = OutboundScheduler(rate=200, burst=1)
+
+    async def test_interactive_is_served_before_bulk(self):
+        order = []
+
+        async def send(name: str, priority: Priority):
+            await self.scheduler.acquire(priority)
+            order.append(name)
+
+        await self.scheduler.acquire(Priority.BULK)
+        bulk = [asyncio.create_task(send(f"bulk-{i}", Priority.BULK)) for i in range(3)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(send("interactive", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+
+        self.assertEqual(4, self.scheduler.queue_depth())
+        self.assertEqual(1, self.scheduler.queue_depth(Priority.INTERACTIVE))
+
+        await asyncio.gather(interactive, *bulk)
+
+        self.assertEqual(["interactive", "bulk-0", "bulk-1", "bulk-2"], order)
+        self.assertEqual(0, self.scheduler.queue_depth())
+        self.assertEqual(4, self.scheduler.stats[Priority.BULK].granted)
+        self.assertGreater(self.scheduler.stats[Priority.BULK].average_wait, 0)
+
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        await self.scheduler.acquire()
+        cancelled = asyncio.create_task(self.scheduler.acquire())
+        waiting = asyncio.create_task(self.scheduler.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        await waiting
+
+        self.assertEqual(0, self.scheduler.queue_depth())
+        self.assertEqual(2, self.scheduler.stats[Priority.INTERACTIVE].granted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from iolite_client.client import Discovered
+from iolite_client.entity import Blind, InFloorValve, RadiatorValve, Room
+
+
+def _valve(identifier: str, room: str, battery_level: int, manufacturer="Danfoss"):
+    return RadiatorValve(
+        identifier, identifier, room, manufacturer, 21.0, battery_level, "auto", 10
+    )
+
+
+class DiscoveredQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.discovered = Discovered()
+        self.bedroom = Room("bedroom", "Bedroom")
+        self.kitchen = Room("kitchen", "Kitchen")
+        self.discovered.add_room(self.bedroom)
+        self.discovered.add_room(self.kitchen)
+        self.discovered.add_device(_valve("valve-1", "bedroom", 10))
+        self.discovered.add_device(_valve("valve-2", "kitchen", 50))
+        self.discovered.add_device(_valve("valve-3", "office", 5, "Eurotronic"))
+        self.discovered.add_device(
+            InFloorValve("floor-1", "Floor", "kitchen", "Möhlenhoff", 20, 22, "ok")
+        )
+        self.discovered.add_device(Blind("blind-1", "Blind", "bedroom", "Somfy", 0))
+        self.discovered.add_device(Blind("blind-2", "Blind", "kitchen", "Somfy", 0))
+
+    def identifiers(self, query) -> set:
+        return {device.identifier for device in query}
+
+    def test_range_filter(self):
+        query = self.discovered.query(RadiatorValve).where("battery_level", lt=20)
+
+        self.assertEqual({"valve-1", "valve-3"}, self.identifiers(query))
+        self.assertEqual(
+            {"valve-1"},
+            self.identifiers(
+                self.discovered.query().where("battery_level", gt=5, le=10)
+            ),
+        )
+
+    def test_range_filter_excludes_devices_without_attribute(self):
+        query = self.discovered.query().where("battery_level")
+
+        self.assertEqual({"valve-1", "valve-2", "valve-3"}, self.identifiers(query))
+
+    def test_manufacturer(self):
+        query = self.discovered.query().from_manufacturer("Möhlenhoff", "Eurotronic")
+
+        self.assertEqual({"floor-1", "valve-3"}, self.identifiers(query))
+
+    def test_rooms(self):
+        query = self.discovered.query("blind").in_rooms(self.bedroom, "kitchen")
+
+        self.assertEqual({"blind-1", "blind-2"}, self.identifiers(query))
+        self.assertEqual(
+            {"valve-3"}, self.identifiers(self.discovered.query().in_rooms("office"))
+        )
+
+    def test_model_name(self):
+        valve = self.discovered.find_device_by_identifier("valve-2")
+        updated = _valve("valve-2", "kitchen", 50)
+        updated.model_name = "Ally"
+        self.discovered.merge_device(updated)
+
+        self.assertEqual([valve], list(self.discovered.query().with_model("Ally")))
+        self.assertNotIn(valve, list(self.discovered.query().with_model(None)))
+
+    def test_query_is_evaluated_lazily(self):
+        query = self.discovered.query(RadiatorValve)
+
+        self.discovered.add_device(_valve("valve-4", "kitchen", 90))
+        self.discovered.remove_device(
+            self.discovered.find_device_by_identifier("valve-1")
+        )
+
+        self.assertEqual({"valve-2", "valve-3", "valve-4"}, self.identifiers(query))
+        self.assertEqual(3, query.count())
+
+    def test_moved_device_is_reindexed(self):
+        self.discovered.merge_device(_valve("valve-1", "kitchen", 10))
+
+        self.assertEqual(
+            {"valve-1", "valve-2"},
+            self.identifiers(self.discovered.query(RadiatorValve).in_rooms("kitchen")),
+        )
+        self.assertEqual(
+            set(),
+            self.identifiers(
+                self.discovered.query().in_rooms("bedroom").of_type(RadiatorValve)
+            ),
+        )
+
+    def test_first(self):
+        self.assertIsNone(self.discovered.query().from_manufacturer("Nobody").first())
+        self.assertEqual(
+            "floor-1", self.discovered.query(InFloorValve).first().identifier
+        )
@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch
+
+from iolite_client.reconnect import Backoff, ConnectionStats
+
+
+class BackoffTest(unittest.TestCase):
+    def test_delay_grows_exponentially_without_jitter(self):
+        backoff = Backoff(initial=1, maximum=60, factor=2, jitter=0)
+        self.assertEqual([1, 2, 4, 8], [backoff.next_delay() for _ in range(4)])
+
+    def test_delay_is_capped(self):
+        backoff = Backoff(initial=10, maximum=15, factor=2, jitter=0)
+        self.assertEqual([10, 15, 15], [backoff.next_delay() for _ in range(3)])
+
+    def test_jitter_shortens_delay(self):
+        backoff = Backoff(initial=10, jitter=0.5)
+        with patch("iolite_client.reconnect.random.uniform", return_value=0.5):
+            self.assertEqual(5, backoff.next_delay())
+
+    def test_reset(self):
+        backoff = Backoff(initial=1, jitter=0)
+        backoff.next_delay()
+        backoff.next_delay()
+        backoff.reset()
+        self.assertEqual(1, backoff.next_delay())
+
+    def test_invalid_jitter(self):
+        with self.assertRaises(ValueError):
+            Backoff(jitter=2)
+
+
+class ConnectionStatsTest(unittest.TestCase):
+    def test_tracks_reconnects_and_downtime(self):
+        stats = ConnectionStats()
+        with patch("iolite_client.reconnect.time.monotonic", side_effect=[10, 13.5]):
+            stats.mark_disconnected()
+            stats.mark_reconnected()
+
+        self.assertEqual(1, stats.reconnects)
+        self.assertEqual(3.5, stats.downtime)
+        self.assertIsNone(stats.disconnected_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
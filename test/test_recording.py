@@ -0,0 +1,138 @@
+import os
+import tempfile
+import time
+import unittest
+from test.test_client import FakeWebSocket, action_success, fake_connect
+
+import pytest
+
+from iolite_client.client import Client
+from iolite_client.entity import Blind
+from iolite_client.recording import (
+    APPLICATION,
+    HEATING,
+    INBOUND,
+    OUTBOUND,
+    FrameRecorder,
+    RecordedFrame,
+    Replayer,
+    read_recording,
+)
+from iolite_client.request_handler import ClassMap
+
+
+def model_event(blind_level: int) -> str:
+    return (
+        '{"class":"ModelEventResponse","requestID":"devices_subscription","events":'
+        "[{\"objectQuery\":\"devices[id='3']/properties[name='blindLevel']\","
+        f'"value":{blind_level}}}]}}'
+    )
+
+
+class FrameRecorderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def assert_round_trip(self, name: str):
+        path = os.path.join(self.directory.name, name)
+        with FrameRecorder(path) as recorder:
+            recorder.record(OUTBOUND, APPLICATION, '{"class":"SubscribeRequest"}')
+            recorder.record(INBOUND, HEATING, b"[]")
+
+        frames = list(read_recording(path))
+
+        self.assertEqual(2, recorder.frames)
+        self.assertEqual(
+            [
+                (OUTBOUND, APPLICATION, '{"class":"SubscribeRequest"}'),
+                (INBOUND, HEATING, "[]"),
+            ],
+            [(frame.direction, frame.channel, frame.data) for frame in frames],
+        )
+        self.assertLessEqual(frames[0].timestamp, frames[1].timestamp)
+
+    def test_round_trip(self):
+        self.assert_round_trip("session.jsonl")
+
+    def test_round_trip_compressed(self):
+        self.assert_round_trip("session.jsonl.gz")
+
+    def test_record_after_close_is_ignored(self):
+        recorder = FrameRecorder(os.path.join(self.directory.name, "session.jsonl"))
+        recorder.close()
+        recorder.record(INBOUND, APPLICATION, "{}")
+        self.assertEqual(0, recorder.frames)
+
+
+@pytest.mark.enable_socket
+class RecordAndReplayTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "session.jsonl")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def create_client(self) -> Client:
+        client = Client("sid", "user", "pass")
+        client.discovered.add_device(Blind("3", "Blind", "room-1", "Generic", 10))
+        return client
+
+    async def test_client_records_session(self):
+        websocket = FakeWebSocket(action_success)
+        client = Client("sid", "user", "pass", recorder=FrameRecorder(self.path))
+        client._ws_connect = fake_connect(websocket)
+
+        async with client:
+            websocket.push({"class": ClassMap.KeepAliveRequest.value})
+            await client.async_set_property("1", "blindLevel", 10)
+        client.recorder.close()
+
+        directions = [frame.direction for frame in read_recording(self.path)]
+        self.assertEqual([INBOUND, OUTBOUND, OUTBOUND, INBOUND], directions)
+
+    async def test_replay_applies_inbound_frames(self):
+        frames = [
+            RecordedFrame(0.0, INBOUND, APPLICATION, model_event(20)),
+            RecordedFrame(0.0, OUTBOUND, APPLICATION, '{"class":"ActionRequest"}'),
+            RecordedFrame(0.0, INBOUND, APPLICATION, '{"class":"KeepAliveRequest"}'),
+            RecordedFrame(0.0, INBOUND, APPLICATION, model_event(30)),
+            RecordedFrame(0.0, INBOUND, APPLICATION, "not json"),
+        ]
+        client = self.create_client()
+
+        replayer = Replayer(client, frames, speed=None)
+        stats = await replayer.run()
+
+        self.assertEqual(4, stats.frames)
+        self.assertEqual(1, stats.failed)
+        self.assertEqual(
+            30, client.discovered.find_device_by_identifier("3").blind_level
+        )
+        self.assertEqual(
+            [ClassMap.KeepAliveResponse.value],
+            [request["class"] for request in replayer.requests],
+        )
+
+    async def test_replay_keeps_accelerated_pace(self):
+        frames = [
+            RecordedFrame(10.0, INBOUND, APPLICATION, model_event(20)),
+            RecordedFrame(10.2, INBOUND, APPLICATION, model_event(30)),
+        ]
+
+        started = time.monotonic()
+        stats = await Replayer(self.create_client(), frames, speed=4).run()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertLess(stats.elapsed, 1)
+
+    def test_invalid_speed(self):
+        with self.assertRaises(ValueError):
+            Replayer(self.create_client(), [], speed=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
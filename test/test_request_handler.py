@@ -1,10 +1,149 @@
+import asyncio
+import time
 import unittest
 
+import pytest
+
+from iolite_client.exceptions import RequestTimeoutError
+from iolite_client.metrics import Metrics
 from iolite_client.request_handler import RequestHandler
 
 
+class RecordingMetrics(Metrics):
+    def __init__(self):
+        self.in_flight = []
+        self.action_latencies = []
+
+    def set_in_flight(self, requests: int):
+        self.in_flight.append(requests)
+
+    def observe_action_latency(self, seconds: float):
+        self.action_latencies.append(seconds)
+
+
 class RequestHandlerTest(unittest.TestCase):
+    @pytest.mark.enable_socket
+    def test_futures_of_closed_loop_are_skipped(self):
+        request_handler = RequestHandler(timeout=0.05)
+
+        async def wait_elsewhere():
+            request = request_handler.get_query_request("situationProfileModel")
+            return request, request_handler.get_response(request["requestID"])
+
+        loop = asyncio.new_event_loop()
+        request, future = loop.run_until_complete(wait_elsewhere())
+        loop.close()
+        time.sleep(0.1)
+
+        self.assertEqual([request["requestID"]], request_handler.evict_expired())
+        request_handler.fail_waiting(ValueError("closed"))
+        self.assertFalse(future.done())
+        self.assertFalse(request_handler.has_requests())
+
     def test_get_query_request(self):
         request_handler = RequestHandler()
         request = request_handler.get_query_request("situationProfileModel")
         self.assertIsNotNone(request["requestID"])
+
+    def test_get_resubscribe_requests(self):
+        request_handler = RequestHandler()
+        places = request_handler.get_subscribe_request("places")
+        request_handler.get_subscribe_request("devices")
+        request_handler.pop_request(places["requestID"])
+
+        requests = request_handler.get_resubscribe_requests()
+
+        self.assertEqual(
+            ["places", "devices"], [request["objectQuery"] for request in requests]
+        )
+        self.assertNotEqual(places["requestID"], requests[0]["requestID"])
+        self.assertIsNotNone(request_handler.get_request(requests[0]["requestID"]))
+
+    def test_evict_expired(self):
+        request_handler = RequestHandler(timeout=10)
+        stale = request_handler.get_query_request("situationProfileModel", timeout=0)
+
+        evicted = request_handler.evict_expired()
+
+        self.assertEqual([stale["requestID"]], evicted)
+        self.assertIsNone(request_handler.get_request(stale["requestID"]))
+
+    def test_building_request_evicts_stale_requests(self):
+        request_handler = RequestHandler(timeout=10)
+        stale = request_handler.get_query_request("situationProfileModel", timeout=0)
+        fresh = request_handler.get_query_request("situationProfileModel")
+
+        self.assertIsNone(request_handler.get_request(stale["requestID"]))
+        self.assertIsNotNone(request_handler.get_request(fresh["requestID"]))
+
+    def test_answered_requests_are_not_evicted(self):
+        request_handler = RequestHandler()
+        request = request_handler.get_query_request("situationProfileModel", timeout=0)
+        request_handler.resolve(request["requestID"], {"class": "QuerySuccess"})
+
+        self.assertEqual([], request_handler.evict_expired())
+
+    def test_metrics(self):
+        metrics = RecordingMetrics()
+        request_handler = RequestHandler(metrics=metrics)
+        action = request_handler.get_action_request("1", "blindLevel", 10)
+        query = request_handler.get_query_request("situationProfileModel")
+        request_handler.mark_sent(action["requestID"])
+        request_handler.mark_sent(query["requestID"])
+
+        request_handler.resolve(action["requestID"], {"class": "ActionSuccess"})
+        request_handler.resolve(query["requestID"], {"class": "QuerySuccess"})
+
+        self.assertEqual([1, 2, 1, 0], metrics.in_flight)
+        self.assertEqual(1, len(metrics.action_latencies))
+
+
+@pytest.mark.enable_socket
+class RequestHandlerResponseTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.request_handler = RequestHandler()
+
+    async def test_response_resolves_future(self):
+        request = self.request_handler.get_query_request("situationProfileModel")
+        future = self.request_handler.get_response(request["requestID"])
+        response = {"class": "QuerySuccess", "requestID": request["requestID"]}
+
+        self.request_handler.resolve(request["requestID"], response)
+
+        self.assertEqual(response, await future)
+        self.assertFalse(self.request_handler.has_requests())
+
+    async def test_deadline_fails_future(self):
+        request = self.request_handler.get_query_request(
+            "situationProfileModel", timeout=0.01
+        )
+
+        with self.assertRaises(RequestTimeoutError):
+            await self.request_handler.get_response(request["requestID"])
+
+        self.assertFalse(self.request_handler.has_requests())
+
+    async def test_cancelling_future_forgets_request(self):
+        request = self.request_handler.get_query_request("situationProfileModel")
+        future = self.request_handler.get_response(request["requestID"])
+
+        future.cancel()
+        await asyncio.sleep(0)
+
+        self.assertFalse(self.request_handler.has_requests())
+
+    async def test_fail_waiting(self):
+        first = self.request_handler.get_query_request("situationProfileModel")
+        second = self.request_handler.get_query_request("situationProfileModel")
+        first_future = self.request_handler.get_response(first["requestID"])
+        second_future = self.request_handler.get_response(second["requestID"])
+
+        self.request_handler.fail_waiting(ValueError("closed"), [first["requestID"]])
+
+        with self.assertRaises(ValueError):
+            await first_future
+        self.assertFalse(second_future.done())
+
+    async def test_unknown_request(self):
+        with self.assertRaises(KeyError):
+            self.request_handler.get_response("unknown")
@@ -0,0 +1,181 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+import pytest
+
+from iolite_client.client import Client, Discovered
+from iolite_client.entity import Blind, Heating, RadiatorValve, Room, Switch
+from iolite_client.fake_server import FakeHome, FakeIOLiteServer
+from iolite_client.snapshot import (
+    SnapshotError,
+    SnapshotPolicy,
+    dump_snapshot,
+    load_snapshot,
+    restore_snapshot,
+    save_snapshot,
+)
+
+
+def _discovered() -> Discovered:
+    discovered = Discovered()
+    discovered.add_room(Room("room-1", "Living Room"))
+    valve = RadiatorValve("valve-1", "Valve", "room-1", "Danfoss", 21.5, 80, "auto", 12)
+    valve.model_name = "Ally"
+    discovered.add_device(valve)
+    discovered.add_device(Blind("blind-1", "Blind", "room-1", "Somfy", 40))
+    discovered.add_heating(Heating("room-1", "Living Room", 21.5, 22.0, False))
+    # Waiting for a room that has not been discovered
+    discovered.add_device(Switch("switch-1", "Switch", "room-2", "Gira"))
+    discovered.add_heating(Heating("room-2", "Office", 19.0, 20.0, None))
+    return discovered
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "snapshot.json.gz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        save_snapshot(_discovered(), self.path, "sid")
+
+        snapshot = load_snapshot(self.path)
+
+        self.assertEqual("sid", snapshot.sid)
+        self.assertLess(snapshot.age, 5)
+        discovered = snapshot.discovered
+        room = discovered.find_room_by_identifier("room-1")
+        self.assertEqual("Living Room", room.name)
+        self.assertEqual(22.0, room.heating.target_temp)
+        valve = room.devices["valve-1"]
+        self.assertIsInstance(valve, RadiatorValve)
+        self.assertEqual("Ally", valve.model_name)
+        self.assertEqual(80, valve.battery_level)
+        self.assertEqual(40, room.devices["blind-1"].blind_level)
+        self.assertEqual(
+            ["switch-1", "room-2"],
+            [entity.identifier for entity in discovered.unmapped_entities["room-2"]],
+        )
+
+    def test_unmapped_entities_are_mapped_once_room_is_added(self):
+        snapshot = restore_snapshot(dump_snapshot(_discovered()))
+
+        snapshot.discovered.add_room(Room("room-2", "Office"))
+
+        room = snapshot.discovered.find_room_by_identifier("room-2")
+        self.assertIn("switch-1", room.devices)
+        self.assertEqual(20.0, room.heating.target_temp)
+
+    def test_missing_snapshot(self):
+        self.assertIsNone(load_snapshot(self.path))
+
+    def test_unreadable_snapshot(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot")
+
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+
+    def test_unsupported_version(self):
+        with gzip.open(self.path, "wt") as f:
+            f.write('{"version": 0}')
+
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+
+    def test_truncated_snapshot(self):
+        without_created_at = dump_snapshot(_discovered())
+        del without_created_at["created_at"]
+        with_truncated_device = dump_snapshot(_discovered())
+        with_truncated_device["devices"][0] = "valve-1"
+
+        for malformed in (
+            without_created_at,
+            with_truncated_device,
+            {"version": 1, "rooms": [None]},
+            [dump_snapshot(_discovered())],
+        ):
+            with self.assertRaises(SnapshotError):
+                restore_snapshot(malformed)
+
+    def test_policy(self):
+        policy = SnapshotPolicy(revalidate_after=60, max_age=3600)
+        snapshot = restore_snapshot(dump_snapshot(Discovered()))
+
+        self.assertFalse(policy.needs_revalidation(snapshot))
+        snapshot.created_at = time.time() - 120
+        self.assertTrue(policy.needs_revalidation(snapshot))
+        self.assertTrue(policy.is_usable(snapshot))
+        snapshot.created_at = time.time() - 7200
+        self.assertFalse(policy.is_usable(snapshot))
+
+
+@pytest.mark.enable_socket
+class WarmStartTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "snapshot.json.gz")
+        self.home = FakeHome.synthetic("sid", rooms=2, devices_per_room=2)
+        self.server = FakeIOLiteServer([self.home], "user", "pass")
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        self.directory.cleanup()
+
+    def create_client(self) -> Client:
+        client = Client("sid", "user", "pass")
+        client.BASE_URL = self.server.ws_url
+        return client
+
+    async def test_discovers_and_saves_without_snapshot(self):
+        client = self.create_client()
+
+        self.assertFalse(await client.async_warm_start(self.path))
+
+        self.assertEqual(4, len(client.discovered.get_devices()))
+        self.assertEqual(4, len(load_snapshot(self.path).discovered.get_devices()))
+
+    async def test_fresh_snapshot_skips_discovery(self):
+        await self.create_client().async_warm_start(self.path)
+        connections = self.server.connections
+
+        client = self.create_client()
+        self.assertTrue(await client.async_warm_start(self.path))
+
+        self.assertEqual(4, len(client.discovered.get_devices()))
+        self.assertEqual(connections, self.server.connections)
+
+    async def test_stale_snapshot_is_revalidated_in_place(self):
+        await self.create_client().async_warm_start(self.path)
+        self.home.find_device("sid-device-1")["properties"][0]["value"] = 99
+
+        client = self.create_client()
+        self.assertTrue(
+            await client.async_warm_start(self.path, SnapshotPolicy(revalidate_after=0))
+        )
+        blind = client.discovered.find_device_by_identifier("sid-device-1")
+        self.assertNotEqual(99, blind.blind_level)
+
+        await client._revalidation
+        self.assertEqual(99, blind.blind_level)
+        self.assertEqual(
+            99,
+            load_snapshot(self.path)
+            .discovered.find_device_by_identifier("sid-device-1")
+            .blind_level,
+        )
+
+    async def test_snapshot_of_other_home_is_ignored(self):
+        save_snapshot(_discovered(), self.path, "other")
+
+        client = self.create_client()
+
+        self.assertFalse(await client.async_warm_start(self.path))
+        self.assertIsNone(client.discovered.find_device_by_identifier("valve-1"))
+        self.assertEqual("sid", load_snapshot(self.path).sid)
@@ -0,0 +1,163 @@
+import importlib.util
+import unittest
+from array import array
+from unittest import mock
+
+from iolite_client import telemetry
+from iolite_client.client import Client, Discovered
+from iolite_client.entity import Blind, Heating, HumiditySensor, RadiatorValve, Room
+from iolite_client.model_event import PropertyChange
+from iolite_client.telemetry import RingBuffer, TelemetryStore, summarize
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RingBufferTest(unittest.TestCase):
+    def test_keeps_latest_samples_in_order(self):
+        buffer = RingBuffer(3)
+        for i in range(5):
+            buffer.append(float(i), i * 10)
+
+        timestamps, values = buffer.window()
+
+        self.assertEqual(3, len(buffer))
+        self.assertEqual(array("d", [2, 3, 4]), timestamps)
+        self.assertEqual(array("d", [20, 30, 40]), values)
+
+    def test_window_since(self):
+        buffer = RingBuffer(4)
+        for i in range(6):
+            buffer.append(float(i), i)
+
+        self.assertEqual(array("d", [3, 4, 5]), buffer.window(since=2.5)[1])
+        self.assertEqual(array("d", []), buffer.window(since=6)[1])
+
+    def test_capacity_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+
+class SummarizeTest(unittest.TestCase):
+    def test_summarize(self):
+        stats = summarize(array("d", [1, 5, 3]))
+
+        self.assertEqual(3, stats.count)
+        self.assertEqual(1, stats.minimum)
+        self.assertEqual(5, stats.maximum)
+        self.assertEqual(3, stats.mean)
+
+    def test_summarize_without_numpy(self):
+        with mock.patch.object(telemetry, "numpy", None):
+            stats = summarize(array("d", [2, 4]))
+
+        self.assertEqual(3, stats.mean)
+
+    def test_summarize_nothing(self):
+        self.assertIsNone(summarize(array("d")))
+
+
+class TelemetryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = TelemetryStore(capacity=10, clock=self.clock)
+
+    def test_stats_over_last_seconds(self):
+        for value in (20.0, 21.0, 25.0):
+            self.store.record("valve", "current_env_temp", value)
+            self.clock.now += 60
+
+        stats = self.store.stats("valve", "current_env_temp", last=120)
+
+        self.assertEqual(2, stats.count)
+        self.assertEqual(23.0, stats.mean)
+        self.assertEqual(3, self.store.stats("valve", "current_env_temp").count)
+        self.assertIsNone(self.store.stats("unknown", "current_env_temp"))
+
+    def test_ignores_values_that_are_not_numbers(self):
+        self.store.record("valve", "heating_mode", "auto")
+        self.store.record("heating", "window_open", True)
+        self.store.record("valve", "battery_level", None)
+
+        self.assertEqual([], list(self.store.keys()))
+
+    def test_record_discovered(self):
+        discovered = Discovered()
+        discovered.add_room(Room("room", "Room"))
+        discovered.add_device(
+            RadiatorValve("valve", "Valve", "room", "Danfoss", 20.5, 80, "auto", 10)
+        )
+        discovered.add_device(HumiditySensor("sensor", "Sensor", "room", "X", 21, 45))
+        discovered.add_device(Blind("blind", "Blind", "room", "Somfy", 10))
+        discovered.add_heating(Heating("room", "Room", 20.0, 21.0, False))
+
+        self.store.record_discovered(discovered)
+
+        self.assertCountEqual(
+            [
+                ("valve", "current_env_temp"),
+                ("valve", "valve_position"),
+                ("valve", "battery_level"),
+                ("sensor", "current_env_temp"),
+                ("sensor", "humidity_level"),
+                ("room", "current_temp"),
+                ("room", "target_temp"),
+            ],
+            self.store.keys(),
+        )
+
+    def test_record_change_of_tracked_attribute(self):
+        blind = Blind("blind", "Blind", "room", "Somfy", 10)
+        valve = RadiatorValve("valve", "Valve", "room", "X", 20, 80, "auto", 10)
+
+        self.store.record_change(
+            PropertyChange("blind", "blindLevel", "blind_level", 10, 20, None, blind)
+        )
+        self.store.record_change(
+            PropertyChange(
+                "valve", "valvePosition", "valve_position", 10, 30, None, valve
+            )
+        )
+
+        self.assertEqual([("valve", "valve_position")], list(self.store.keys()))
+
+
+class ClientTelemetryTest(unittest.TestCase):
+    def test_model_events_are_recorded(self):
+        store = TelemetryStore()
+        client = Client("sid", "user", "pass", telemetry=store)
+        client.discovered.add_room(Room("room", "Room"))
+        client.discovered.add_device(
+            RadiatorValve("valve", "Valve", "room", "X", 20, 80, "auto", 10)
+        )
+
+        client._handle_model_event(
+            {
+                "events": [
+                    {
+                        "objectQuery": "devices[id='valve']"
+                        "/properties[name='valvePosition']",
+                        "propertyName": "value",
+                        "value": 35,
+                    }
+                ]
+            }
+        )
+
+        self.assertEqual(array("d", [35]), store.series("valve", "valve_position")[1])
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+class NumpySummarizeTest(unittest.TestCase):
+    def test_matches_pure_python(self):
+        values = array("d", [3.5, -1.0, 7.25, 0.0])
+
+        with mock.patch.object(telemetry, "numpy", None):
+            expected = summarize(values)
+
+        self.assertEqual(expected, summarize(values))
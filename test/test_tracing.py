@@ -0,0 +1,145 @@
+import unittest
+from test.test_client import FakeWebSocket, action_success, fake_connect
+
+import pytest
+
+from iolite_client.client import Client
+from iolite_client.exceptions import RequestTimeoutError
+from iolite_client.request_handler import RequestHandler
+from iolite_client.tracing import OpenTelemetryTracer, Span, Tracer
+
+
+class CollectingTracer(Tracer):
+    def __init__(self):
+        self.started = []
+        self.ended = []
+
+    def on_start(self, span: Span):
+        self.started.append(span.name)
+
+    def on_end(self, span: Span):
+        self.ended.append(span)
+
+    def names(self):
+        return [span.name for span in self.ended]
+
+
+class FakeOpenTelemetrySpan:
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.exceptions: list = []
+        self.status = None
+        self.end_time = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, error):
+        self.exceptions.append(error)
+
+    def set_status(self, status):
+        self.status = status
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeOpenTelemetryTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, attributes=None, start_time=None):
+        span = FakeOpenTelemetrySpan(name, attributes or {})
+        self.spans.append(span)
+        return span
+
+
+class TracerTest(unittest.TestCase):
+    def test_span_records_exception(self):
+        tracer = CollectingTracer()
+
+        with self.assertRaises(ValueError):
+            with tracer.span("operation", {"key": "value"}):
+                raise ValueError("failed")
+
+        span = tracer.ended[0]
+        self.assertEqual(["operation"], tracer.started)
+        self.assertIsInstance(span.error, ValueError)
+        self.assertEqual({"key": "value"}, span.attributes)
+        self.assertGreaterEqual(span.duration, 0)
+
+    def test_span_ends_once(self):
+        tracer = CollectingTracer()
+        span = tracer.start_span("operation")
+        span.end()
+        span.end()
+        self.assertEqual(1, len(tracer.ended))
+
+    def test_open_telemetry(self):
+        otel = FakeOpenTelemetryTracer()
+        tracer = OpenTelemetryTracer(otel)
+
+        with tracer.span("operation", {"key": "value"}) as span:
+            span.set_attribute("late", 1)
+
+        self.assertEqual("operation", otel.spans[0].name)
+        self.assertEqual({"key": "value", "late": 1}, otel.spans[0].attributes)
+        self.assertIsNotNone(otel.spans[0].end_time)
+
+    def test_open_telemetry_error(self):
+        otel = FakeOpenTelemetryTracer()
+
+        with self.assertRaises(ValueError):
+            with OpenTelemetryTracer(otel).span("operation"):
+                raise ValueError("failed")
+
+        self.assertEqual(1, len(otel.spans[0].exceptions))
+
+
+@pytest.mark.enable_socket
+class RequestTracingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_request_span_is_keyed_by_request_id(self):
+        tracer = CollectingTracer()
+        request_handler = RequestHandler(tracer=tracer)
+        request = request_handler.get_action_request("1", "blindLevel", 10)
+        request_handler.mark_sent(request["requestID"])
+
+        request_handler.resolve(request["requestID"], {"class": "ActionSuccess"})
+
+        span = tracer.ended[0]
+        self.assertEqual("iolite.request", span.name)
+        self.assertEqual(request["requestID"], span.attributes["iolite.request_id"])
+        self.assertEqual("ActionSuccess", span.attributes["iolite.response_class"])
+
+    async def test_timed_out_request_span_has_error(self):
+        tracer = CollectingTracer()
+        request_handler = RequestHandler(tracer=tracer)
+        request = request_handler.get_query_request("situationProfileModel", timeout=0)
+        request_handler.mark_sent(request["requestID"])
+
+        with self.assertRaises(RequestTimeoutError):
+            await request_handler.get_response(request["requestID"])
+
+        self.assertIsInstance(tracer.ended[0].error, RequestTimeoutError)
+
+    async def test_client_spans(self):
+        tracer = CollectingTracer()
+        client = Client("sid", "user", "pass", tracer=tracer)
+        client._ws_connect = fake_connect(FakeWebSocket(action_success))
+
+        await client.async_set_property("1", "blindLevel", 10)
+
+        self.assertEqual(
+            ["iolite.websocket.connect", "iolite.request", "iolite.set_property"],
+            tracer.names(),
+        )
+        connect = tracer.ended[0]
+        self.assertEqual(
+            "/bus/websocket/application/json", connect.attributes["url.path"]
+        )
+        self.assertTrue(connect.attributes["tls"])
+
+
+if __name__ == "__main__":
+    unittest.main()